@@ -4,7 +4,24 @@
 
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Optional, Union
+
+from utils._njit import njit
+from strategies._ta_kernels import _ema_update
+
+
+@njit(cache=True)
+def _ema_last(values, alpha):
+    """
+    EMA (adjust=False) 递推到末端，只返回最后一个值
+    
+    逐步调用 _ema_update，缺失值处理与 ema_span 及 pandas ewm(adjust=False, ignore_na=False) 相同
+    """
+    weighted = values[0]
+    old_wt = 1.0
+    for i in range(1, values.shape[0]):
+        weighted, old_wt = _ema_update(weighted, old_wt, values[i], alpha)
+    return weighted
 
 
 class TechnicalFactors:
@@ -20,6 +37,20 @@ class TechnicalFactors:
         """指数移动平均"""
         return data.ewm(span=period, adjust=False).mean()
     
+    @staticmethod
+    def sma_tail(data: Union[pd.Series, np.ndarray], period: int) -> float:
+        """简单移动平均的最新值 (等于 sma(data, period).iloc[-1]，数据不足为NaN)"""
+        values = np.asarray(data, dtype=np.float64)
+        return float(values[-period:].mean()) if len(values) >= period else float('nan')
+    
+    @staticmethod
+    def ema_tail(data: Union[pd.Series, np.ndarray], period: int) -> float:
+        """指数移动平均的最新值 (等于 ema(data, period).iloc[-1]，不生成整列)"""
+        values = np.asarray(data, dtype=np.float64)
+        if len(values) == 0:
+            return float('nan')
+        return float(_ema_last(values, 2.0 / (period + 1)))
+    
     @staticmethod
     def rsi(data: pd.Series, period: int = 14) -> pd.Series:
         """RSI指标"""
@@ -60,11 +91,12 @@ class TechnicalFactors:
     @staticmethod
     def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
         """ATR平均真实波幅"""
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
+        h = high.to_numpy(dtype=np.float64)
+        l = low.to_numpy(dtype=np.float64)
+        prev = np.concatenate(([np.nan], close.to_numpy(dtype=np.float64)[:-1]))
+        # 三者取最大 (忽略 NaN，首根K线即为 high - low)
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))
+        atr = pd.Series(tr, index=high.index).rolling(window=period).mean()
         return atr
     
     @staticmethod
@@ -5,6 +5,7 @@
 
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
@@ -29,6 +30,9 @@ except ImportError:
 class FundamentalData:
     """基本面数据获取"""
     
+    # 同一会话内最多缓存的 (股票, 年份) 报表数，超出时淘汰最久未用的
+    STATEMENT_CACHE_SIZE = 4096
+    
     def __init__(self, cache_dir: str = None, use_cache: bool = True):
         """
         初始化
@@ -39,6 +43,7 @@ class FundamentalData:
         """
         self.cache_dir = cache_dir or 'data/fundamental_cache'
         self.use_cache = use_cache
+        self._statement_cache: OrderedDict = OrderedDict()
         os.makedirs(self.cache_dir, exist_ok=True)
         
         print(f"数据源状态: yfinance={'✓' if YFINANCE_AVAILABLE else '✗'}, akshare={'✓' if AKSHARE_AVAILABLE else '✗'}")
@@ -89,6 +94,22 @@ class FundamentalData:
         Returns:
             财务数据字典
         """
+        # 估值/比率/增长等指标都基于同一份报表，同一会话内每只股票只取一次
+        key = (symbol, year)
+        if self.use_cache and key in self._statement_cache:
+            self._statement_cache.move_to_end(key)
+            return dict(self._statement_cache[key])
+        
+        data = self._fetch_financial_statement(symbol, year)
+        # 获取失败时的模拟数据不缓存，下次调用重新请求
+        if self.use_cache and data.get('source') != 'mock':
+            self._statement_cache[key] = data
+            if len(self._statement_cache) > self.STATEMENT_CACHE_SIZE:
+                self._statement_cache.popitem(last=False)
+        return dict(data)
+    
+    def _fetch_financial_statement(self, symbol: str, year: int = None) -> Dict:
+        """按股票类型从数据源获取财务报表，失败时返回模拟数据"""
         stock_type = self._get_stock_type(symbol)
         
         # 尝试获取真实数据
@@ -251,18 +272,20 @@ class FundamentalData:
             'source': 'mock'
         }
     
-    def calculate_valuation(self, symbol: str, price: float) -> Dict:
+    def calculate_valuation(self, symbol: str, price: float, financial: Dict = None) -> Dict:
         """
         计算估值指标
         
         Args:
             symbol: 股票代码
             price: 当前价格
+            financial: 已获取的财务报表 (None时自行获取)
         
         Returns:
             估值指标字典
         """
-        financial = self.get_financial_statement(symbol)
+        if financial is None:
+            financial = self.get_financial_statement(symbol)
         
         # 从真实数据获取估值
         pe_ratio = financial.get('pe_ratio') or financial.get('pe') or 0
@@ -289,9 +312,10 @@ class FundamentalData:
             'source': financial.get('source', 'unknown')
         }
     
-    def get_financial_ratios(self, symbol: str) -> Dict:
-        """获取财务比率"""
-        financial = self.get_financial_statement(symbol)
+    def get_financial_ratios(self, symbol: str, financial: Dict = None) -> Dict:
+        """获取财务比率 (financial 为已获取的财务报表时直接使用)"""
+        if financial is None:
+            financial = self.get_financial_statement(symbol)
         
         return {
             'profitability': {
@@ -313,9 +337,10 @@ class FundamentalData:
             }
         }
     
-    def get_dividend_info(self, symbol: str) -> Dict:
-        """获取分红信息"""
-        financial = self.get_financial_statement(symbol)
+    def get_dividend_info(self, symbol: str, financial: Dict = None) -> Dict:
+        """获取分红信息 (financial 为已获取的财务报表时直接使用)"""
+        if financial is None:
+            financial = self.get_financial_statement(symbol)
         
         return {
             'symbol': symbol,
@@ -324,9 +349,10 @@ class FundamentalData:
             'payout_ratio': financial.get('payout_ratio', 0),
         }
     
-    def get_growth_metrics(self, symbol: str) -> Dict:
-        """获取增长指标"""
-        financial = self.get_financial_statement(symbol)
+    def get_growth_metrics(self, symbol: str, financial: Dict = None) -> Dict:
+        """获取增长指标 (financial 为已获取的财务报表时直接使用)"""
+        if financial is None:
+            financial = self.get_financial_statement(symbol)
         
         return {
             'revenue_growth': financial.get('revenue_growth', 0),
@@ -388,18 +414,41 @@ class FundamentalData:
         Returns:
             完整的基本面数据
         """
-        # 如果没有提供价格，尝试获取实时价格
+        quote = self.get_realtime_quote(symbol)
+        
+        # 如果没有提供价格，使用实时价格
         if price is None:
-            quote = self.get_realtime_quote(symbol)
             price = quote.get('price', 0)
         
+        snap = self.snapshot(symbol, price)
+        return {
+            'quote': quote,
+            'financial': snap['statement'],
+            'valuation': snap['valuation'],
+            'ratios': snap['ratios'],
+            'dividend': snap['dividend'],
+            'growth': snap['growth'],
+        }
+    
+    def snapshot(self, symbol: str, price: float) -> Dict:
+        """
+        只取一次财务报表，计算全部派生指标
+        
+        Args:
+            symbol: 股票代码
+            price: 当前价格
+        
+        Returns:
+            {'statement', 'valuation', 'ratios', 'dividend', 'growth'}
+        """
+        financial = self.get_financial_statement(symbol)
+        
         return {
-            'quote': self.get_realtime_quote(symbol),
-            'financial': self.get_financial_statement(symbol),
-            'valuation': self.calculate_valuation(symbol, price),
-            'ratios': self.get_financial_ratios(symbol),
-            'dividend': self.get_dividend_info(symbol),
-            'growth': self.get_growth_metrics(symbol),
+            'statement': financial,
+            'valuation': self.calculate_valuation(symbol, price, financial),
+            'ratios': self.get_financial_ratios(symbol, financial),
+            'dividend': self.get_dividend_info(symbol, financial),
+            'growth': self.get_growth_metrics(symbol, financial),
         }
 
 
@@ -26,7 +26,7 @@ def load_stock(code: str) -> pd.DataFrame:
         raise FileNotFoundError(f"数据文件不存在: {filename}")
     
     df = pd.read_csv(filepath, parse_dates=['Date'], index_col='Date')
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     return df
 
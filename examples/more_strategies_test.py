@@ -43,7 +43,7 @@ def run_backtest(symbol, strategy_names, initial_capital=300000):
     if df is None or len(df) < 200:
         return None
     
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     hybrid = create_hybrid(strategy_names)
     
     engine = BacktestEngine(initial_capital=initial_capital, commission=0.001, slippage=0.001, stamp_duty=0.001)
@@ -51,11 +51,16 @@ def run_backtest(symbol, strategy_names, initial_capital=300000):
     position = 0
     entry_price = 0
     
+    # 一次性计算全部信号，避免逐bar构造 df.iloc[:i+1] 前缀
+    close_arr = df['close'].to_numpy(dtype=np.float64)
+    precomputed = hybrid.precompute(df)
+    sig_arr = precomputed['signal'].to_numpy()
+    strength_arr = precomputed['strength'].to_numpy()
+    
     for i in range(50, len(df)):
-        price = df['close'].iloc[i]
-        result = hybrid.analyze(df.iloc[:i+1])
+        price = close_arr[i]
         
-        if position == 0 and result['signal'] == 1 and result['strength'] >= 0.3:
+        if position == 0 and sig_arr[i] == 1 and strength_arr[i] >= 0.3:
             amount = engine.cash * 0.5
             quantity = int(amount / price / 100) * 100
             if quantity > 0:
@@ -51,7 +51,7 @@ def run_multi_strategy_backtest(symbol, start_date, end_date, initial_capital=30
         print(f"❌ 数据不足")
         return None
     
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     # 初始化策略
     strategy = CombinedStrategy()
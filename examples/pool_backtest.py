@@ -6,6 +6,8 @@
 
 import sys
 import random
+import argparse
+import multiprocessing as mp
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -13,17 +15,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 from data.fetcher import DataFetcher
 from backtest.engine import BacktestEngine
 from strategies.signals import generate_signals
 from backtest.performance import PerformanceAnalyzer
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
 # A股股票池
 ASTOCK_POOL = [
     ('600519.SS', '贵州茅台'),
@@ -47,7 +44,7 @@ def get_pool_data(symbols, period="5y"):
         print(f"  获取 {symbol} 数据...", end=" ")
         df = fetcher.download(symbol, period=period)
         if df is not None and len(df) > 200:
-            df.columns = df.columns.str.lower()
+            df.columns = [c.lower() for c in df.columns.tolist()]
             data[symbol] = df
             print(f"✓ {len(df)} 条")
         else:
@@ -136,19 +133,29 @@ def run_pool_backtest(pool, initial_capital=1000000):
     position = 0
     trade_log = []
     
+    # 交易日期（使用第一个股票的日期）与预分配的权益数组
+    first_symbol = next(iter(pool_data))
+    dates_index = pool_data[first_symbol].index
+    equity_values = np.empty(max(min_len - 50, 0), dtype=np.float64)
+    
+    # 收盘价矩阵 (交易日 x 股票) 与持仓数量向量，用于逐日盯市
+    pool_symbols = list(pool_data)
+    symbol_col = {sym: j for j, sym in enumerate(pool_symbols)}
+    close_matrix = np.column_stack(
+        [pool_data[sym]['close'].to_numpy(dtype=np.float64)[:min_len] for sym in pool_symbols]
+    )
+    held_qty = np.zeros(len(pool_symbols), dtype=np.float64)
+    
     # 遍历每一天
     for i in range(50, min_len):  # 跳过前50天等待指标稳定
-        # 获取当前日期（使用第一个股票的日期）
-        first_symbol = list(pool_data.keys())[0]
-        date = pool_data[first_symbol].index[i]
+        date = dates_index[i]
         
         # 如果没有持仓，选择最优股票买入
         if position == 0:
             best_stock = select_best_stock(pool_data, i, signals_cache)
             
             if best_stock and best_stock in pool_data:
-                df = pool_data[best_stock]
-                price = df['close'].iloc[i]
+                price = close_matrix[i, symbol_col[best_stock]]
                 
                 # 买入一半仓位
                 amount = engine.cash * 0.5
@@ -159,13 +166,13 @@ def run_pool_backtest(pool, initial_capital=1000000):
                     if result:
                         current_stock = best_stock
                         position = 1
+                        held_qty[symbol_col[best_stock]] += quantity
                         name = dict(pool).get(best_stock, best_stock)
                         trade_log.append(f"买入 {date.date()} {name} @ {price:.2f} x {quantity}")
         
         # 如果有持仓，检查是否卖出
         elif position == 1 and current_stock:
-            df = pool_data[current_stock]
-            price = df['close'].iloc[i]
+            price = close_matrix[i, symbol_col[current_stock]]
             signal = signals_cache[current_stock].iloc[i]
             
             # 卖出信号 或 发现更好机会
@@ -175,21 +182,16 @@ def run_pool_backtest(pool, initial_capital=1000000):
                     engine.sell(date, current_stock, price, quantity=pos.quantity)
                     name = dict(pool).get(current_stock, current_stock)
                     trade_log.append(f"卖出 {date.date()} {name} @ {price:.2f}")
+                    held_qty[symbol_col[current_stock]] = 0
                     position = 0
                     current_stock = None
         
         # 更新权益
-        equity = engine.cash
-        for sym, pos in engine.positions.items():
-            if sym in pool_data:
-                equity += pos.quantity * pool_data[sym]['close'].iloc[i]
-        engine.equity_history.append(equity)
-        engine.dates.append(date)
+        equity_values[i - 50] = engine.cash + held_qty @ close_matrix[i]
     
     # 最终平仓
     if position == 1 and current_stock:
-        first_symbol = list(pool_data.keys())[0]
-        date = pool_data[first_symbol].index[-1]
+        date = dates_index[-1]
         price = pool_data[current_stock]['close'].iloc[-1]
         pos = engine.positions.get(current_stock)
         if pos:
@@ -199,11 +201,11 @@ def run_pool_backtest(pool, initial_capital=1000000):
     
     # 计算结果
     initial = initial_capital
-    final = engine.equity_history[-1] if engine.equity_history else initial
+    final = equity_values[-1] if len(equity_values) else initial
     total_return = (final - initial) / initial * 100
     
     # 绩效分析
-    equity_curve = pd.Series(engine.equity_history, index=engine.dates)
+    equity_curve = pd.Series(equity_values, index=dates_index[50:min_len])
     analyzer = PerformanceAnalyzer(equity_curve, engine.trades)
     metrics = analyzer.calculate_all()
     
@@ -222,6 +224,15 @@ def run_pool_backtest(pool, initial_capital=1000000):
 
 def plot_result(result, pool, output_path):
     """绘制结果图表"""
+    # matplotlib 较重，仅在绘图时加载
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
+    # 设置中文字体
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+    
     fig, axes = plt.subplots(2, 1, figsize=(14, 10))
     
     # 图1: 权益曲线
@@ -270,9 +281,22 @@ def plot_result(result, pool, output_path):
     
     plt.tight_layout()
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
     print(f"\n✅ 图表已保存: {output_path}")
 
+def start_plot_process(result, pool, output_path):
+    """在子进程中绘图，主进程无需等待 matplotlib"""
+    # 子进程只需要绘图用到的字段，不传递整个股票池数据
+    plot_data = {k: v for k, v in result.items() if k != 'pool_data'}
+    proc = mp.Process(target=plot_result, args=(plot_data, pool, output_path))
+    proc.start()
+    return proc
+
 def main():
+    parser = argparse.ArgumentParser(description="决策团队选股回测 - 股票池模式")
+    parser.add_argument("--plot", action="store_true", help="生成回测结果图表")
+    args = parser.parse_args()
+    
     print("="*60)
     print("🎯 决策团队选股回测 - 股票池模式")
     print("="*60)
@@ -304,9 +328,11 @@ def main():
         for log in result['trade_log']:
             print(f"  {log}")
         
-        # 绘图
-        output_path = Path(__file__).parent / 'pool_backtest_result.png'
-        plot_result(result, selected_pool, output_path)
+        # 绘图（子进程中进行）
+        plot_proc = None
+        if args.plot:
+            output_path = Path(__file__).parent / 'pool_backtest_result.png'
+            plot_proc = start_plot_process(result, selected_pool, output_path)
         
         # 更新MD文档
         md_path = Path(__file__).parent / 'backtest_pool_test.md'
@@ -351,6 +377,9 @@ def main():
         
         md_path.write_text(md_content)
         print(f"\n✅ 文档已更新: {md_path}")
+        
+        if plot_proc is not None:
+            plot_proc.join()
 
 if __name__ == "__main__":
     main()
@@ -10,7 +10,6 @@ Simple Moving Average Crossover Strategy
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
 
@@ -93,6 +92,11 @@ def backtest(data: pd.DataFrame, initial_capital: float = 10000):
 
 def plot_results(data: pd.DataFrame, symbol: str):
     """绘制结果"""
+    # matplotlib 较重，仅在绘图时加载
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
     # 确保只使用有效数据
     plot_data = data.dropna().copy()
     
@@ -138,7 +142,8 @@ def plot_results(data: pd.DataFrame, symbol: str):
     print(f"📊 图表已保存到: backtests/{symbol}_ma_crossover.png")
 
 
-def run_strategy(symbol: str = "AAPL", short_ma: int = 20, long_ma: int = 50):
+def run_strategy(symbol: str = "AAPL", short_ma: int = 20, long_ma: int = 50,
+                 plot: bool = False):
     """运行策略"""
     print(f"=" * 50)
     print(f"策略: 移动平均线交叉")
@@ -176,14 +181,19 @@ def run_strategy(symbol: str = "AAPL", short_ma: int = 20, long_ma: int = 50):
     print("=" * 50)
     
     # 绘图
-    plot_results(data, symbol)
+    if plot:
+        plot_results(data, symbol)
     
     return results
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
     
+    parser = argparse.ArgumentParser(description="简单移动平均线交叉策略")
     # 默认测试AAPL
-    symbol = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
-    run_strategy(symbol)
+    parser.add_argument("symbol", nargs="?", default="AAPL", help="股票代码")
+    parser.add_argument("--plot", action="store_true", help="生成回测结果图表")
+    args = parser.parse_args()
+    
+    run_strategy(args.symbol, plot=args.plot)
@@ -4,25 +4,23 @@
 随机选取20只A股，挑选3只进行回测
 """
 
+import os
 import sys
-import random
 from pathlib import Path
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 from data.fetcher import DataFetcher
 from backtest.engine import BacktestEngine
 from strategies.signals import generate_signals
 from backtest.performance import PerformanceAnalyzer
-
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+from utils._njit import njit
 
 # A股股票池随机 (模拟选择20只) - 排除指数
 ASTOCK_POOL = [
@@ -55,27 +53,62 @@ ASTOCK_POOL = [
     '600900.SS',  # 长江电力
     '601166.SS',  # 兴业银行
     '600050.SS',  # 中国联通
-    '600050.SS',  # 中国联通
 ]
 
-def select_random_stocks(pool, n=20):
-    """随机选择n只股票"""
-    selected = random.sample(pool, min(n, len(pool)))
-    return selected
+# 去重后的股票池和随机数生成器，模块加载时构建一次
+_POOL = np.array(list(dict.fromkeys(ASTOCK_POOL)))
+_RNG = np.random.default_rng()
+
+def select_random_stocks(pool=_POOL, n=20):
+    """随机选择n只股票(不重复)"""
+    if pool is not _POOL:
+        pool = np.array(list(dict.fromkeys(pool)))
+    return _RNG.choice(pool, size=min(n, len(pool)), replace=False).tolist()
+
+@lru_cache(maxsize=64)
+def _load(symbol, period):
+    """下载并缓存行情数据(列名统一为小写)，同一 (symbol, period) 只下载一次"""
+    fetcher = DataFetcher()
+    df = fetcher.download(symbol, period=period)
+    df.columns = [c.lower() for c in df.columns.tolist()]  # 统一列名为小写
+    return df
+
+@njit
+def _run_state_machine(sig):
+    """
+    按 空仓->买入->持仓->卖出 的状态推导开平仓点
+    
+    Args:
+        sig: 信号数组 (1=买入, -1=卖出)
+    
+    Returns:
+        (entry_mask, exit_mask) 开仓/平仓布尔数组
+    """
+    n = len(sig)
+    entry_mask = np.zeros(n, dtype=np.bool_)
+    exit_mask = np.zeros(n, dtype=np.bool_)
+    holding = False
+    for i in range(n):
+        if not holding and sig[i] == 1:
+            entry_mask[i] = True
+            holding = True
+        elif holding and sig[i] == -1:
+            exit_mask[i] = True
+            holding = False
+    return entry_mask, exit_mask
 
-def backtest_stock(symbol, start_date, end_date, initial_capital=10000000):
-    """回测单只股票"""
+def backtest_stock(symbol, start_date, end_date, initial_capital=10000000, df=None):
+    """回测单只股票 (df 为已下载的数据时直接使用，否则自行获取)"""
     print(f"\n{'='*50}")
     print(f"回测: {symbol}")
     print(f"时间: {start_date} ~ {end_date}")
     print(f"{'='*50}")
     
-    fetcher = DataFetcher()
-    
-    # 获取数据
-    print(f"正在获取 {symbol} 数据...")
-    df = fetcher.download(symbol, period="5y")
-    df.columns = df.columns.str.lower()  # 统一列名为小写
+    # 获取数据 (缓存副本，避免修改缓存中的数据)
+    if df is None:
+        print(f"正在获取 {symbol} 数据...")
+        df = _load(symbol, "5y")
+    df = df.copy()
     
     if df.empty or len(df) < 100:
         print(f"❌ {symbol} 数据不足，跳过")
@@ -83,8 +116,7 @@ def backtest_stock(symbol, start_date, end_date, initial_capital=10000000):
     
     print(f"✓ 获取数据 {len(df)} 条")
     
-    # 生成信号 (使用MACD策略) - 统一列名为小写
-    df.columns = df.columns.str.lower()
+    # 生成信号 (使用MACD策略，列名已在 _load 中统一为小写)
     signals = generate_signals(df, 'macd', {'fast': 12, 'slow': 26, 'signal': 9})
     
     # 回测
@@ -95,57 +127,76 @@ def backtest_stock(symbol, start_date, end_date, initial_capital=10000000):
         stamp_duty=0.001
     )
     
-    position = 0  # 0=空仓, 1=持仓
+    # 一次性取出 numpy 数组，避免逐bar的 .iloc 查找
+    start = 20  # 跳过前20天（等待指标计算）
+    dates = df.index
+    close_arr = df['close'].to_numpy(dtype=np.float64)
+    sig_arr = signals.to_numpy(dtype=np.int64)
+    n = len(df) - start
+    
+    if n <= 0:
+        print(f"❌ 无交易记录")
+        return None
     
-    for i in range(20, len(df)):  # 跳过前20天（等待指标计算）
-        date = df.index[i]
-        price = df['close'].iloc[i]
-        signal = signals.iloc[i]
+    # 现金和持仓只在交易发生时变化，记录变化点后再展开为逐日序列
+    event_pos = [0]
+    event_cash = [engine.cash]
+    event_qty = [0]
+    held_qty = 0
+    
+    # 先推导开平仓点，循环只遍历这些交易日
+    entry_mask, exit_mask = _run_state_machine(sig_arr[start:])
+    events = np.flatnonzero(entry_mask | exit_mask) + start
+    k = 0
+    while k < len(events):
+        i = events[k]
+        k += 1
+        date = dates[i]
+        price = close_arr[i]
         
-        if signal == 1 and position == 0:  # 买入信号且空仓
+        if entry_mask[i - start]:  # 买入信号且空仓
             # 买入一半仓位
             amount = engine.cash * 0.5
             quantity = int(amount / price / 100) * 100  # 整手
-            if quantity > 0:
-                engine.buy(date, symbol, price, quantity=quantity)
-                position = 1
-                print(f"  买入 {date.date()} @ {price:.2f} x {quantity}")
+            if quantity <= 0 or not engine.buy(date, symbol, price, quantity=quantity):
+                # 买入失败仍为空仓，从下一bar起重新推导
+                entry_mask[i - start + 1:], exit_mask[i - start + 1:] = _run_state_machine(sig_arr[i + 1:])
+                events = np.flatnonzero(entry_mask | exit_mask) + start
+                k = np.searchsorted(events, i + 1)
+                continue
+            held_qty = quantity
+            print(f"  买入 {date.date()} @ {price:.2f} x {quantity}")
         
-        elif signal == -1 and position == 1:  # 卖出信号且持仓
+        else:  # 卖出信号且持仓
             # 卖出全部
-            pos = engine.positions.get(symbol)
-            if pos:
-                engine.sell(date, symbol, price, quantity=pos.quantity)
-                position = 0
-                print(f"  卖出 {date.date()} @ {price:.2f}")
+            engine.sell(date, symbol, price, quantity=held_qty)
+            held_qty = 0
+            print(f"  卖出 {date.date()} @ {price:.2f}")
         
-        # 更新权益
-        equity = engine.cash
-        for sym, pos in engine.positions.items():
-            equity += pos.quantity * df['close'].iloc[i]
-        engine.equity_history.append(equity)
-        engine.dates.append(date)
+        event_pos.append(i - start)
+        event_cash.append(engine.cash)
+        event_qty.append(held_qty)
+    
+    # 权益曲线 = 现金 + 持仓 * 收盘价（向量化）
+    seg = np.searchsorted(event_pos, np.arange(n), side='right') - 1
+    cash_path = np.asarray(event_cash, dtype=np.float64)[seg]
+    qty_path = np.asarray(event_qty, dtype=np.float64)[seg]
+    equity_arr = cash_path + qty_path * close_arr[start:]
     
     # 最终平仓
-    if position == 1:
-        date = df.index[-1]
-        price = df['close'].iloc[-1]
-        pos = engine.positions.get(symbol)
-        if pos:
-            engine.sell(date, symbol, price, quantity=pos.quantity)
-            print(f"  最终平仓 {date.date()} @ {price:.2f}")
+    if held_qty > 0:
+        date = dates[-1]
+        price = close_arr[-1]
+        engine.sell(date, symbol, price, quantity=held_qty)
+        print(f"  最终平仓 {date.date()} @ {price:.2f}")
     
     # 计算结果
-    if not engine.equity_history:
-        print(f"❌ 无交易记录")
-        return None
-    
     initial = initial_capital
-    final = engine.equity_history[-1]
+    final = equity_arr[-1]
     total_return = (final - initial) / initial * 100
     
     # 创建权益曲线
-    equity_curve = pd.Series(engine.equity_history, index=engine.dates)
+    equity_curve = pd.Series(equity_arr, index=dates[start:])
     
     # 绩效分析
     analyzer = PerformanceAnalyzer(equity_curve, engine.trades)
@@ -174,26 +225,42 @@ def backtest_stock(symbol, start_date, end_date, initial_capital=10000000):
         'signals': signals
     }
 
+def _backtest_one(symbol, df, start_date, end_date):
+    """进程池入口：用主进程预取的数据回测单只股票"""
+    return backtest_stock(symbol, start_date, end_date, df=df)
+
 def plot_backtest(results, output_path):
     """绘制回测图表"""
+    # matplotlib 较重，仅在绘图时加载；只输出PNG，使用无界面的Agg后端
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
+    # 设置中文字体
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.rcParams['path.simplify_threshold'] = 1.0
+    
     fig, axes = plt.subplots(3, 1, figsize=(14, 12))
     
     # 图1: 权益曲线对比
     ax1 = axes[0]
     benchmark_returns = []
     
+    # 日线降采样为约每周一个点，线条栅格化以减少矢量顶点
     for i, r in enumerate(results):
         if r:
-            ax1.plot(r['equity_curve'].index, r['equity_curve'].values, 
-                    label=f"{r['symbol']} ({r['return']:.1f}%)", linewidth=2)
+            curve = r['equity_curve'].iloc[::5]
+            ax1.plot(curve.index, curve.values, 
+                    label=f"{r['symbol']} ({r['return']:.1f}%)", linewidth=2, rasterized=True)
     
     # 添加基准 (买入持有)
     if results[0]:
         df = results[0]['df']
         if len(df) > 0:
-            benchmark = df['close'] / df['close'].iloc[0] * results[0]['initial']
-            ax1.plot(df.index, benchmark.values, '--', label='基准(买入持有)', 
-                    color='gray', alpha=0.7)
+            benchmark = (df['close'] / df['close'].iloc[0] * results[0]['initial']).iloc[::5]
+            ax1.plot(benchmark.index, benchmark.values, '--', label='基准(买入持有)', 
+                    color='gray', alpha=0.7, rasterized=True)
     
     ax1.set_title('权益曲线对比', fontsize=14, fontweight='bold')
     ax1.set_xlabel('日期')
@@ -252,6 +319,7 @@ def plot_backtest(results, output_path):
     
     plt.tight_layout()
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
     print(f"\n✅ 图表已保存: {output_path}")
 
 def main():
@@ -261,7 +329,7 @@ def main():
     
     # 随机选择20只股票
     print("\n📋 第一步: 随机选择20只A股")
-    selected_20 = select_random_stocks(ASTOCK_POOL, 20)
+    selected_20 = select_random_stocks(_POOL, 20)
     print(f"随机选中的20只股票:")
     for i, s in enumerate(selected_20, 1):
         print(f"  {i:2d}. {s}")
@@ -278,11 +346,14 @@ def main():
     print(f"\n📅 回测时间: {start_date} ~ {end_date} (近5年)")
     print(f"💰 初始资金: 100,000")
     
-    # 回测
-    results = []
-    for symbol in selected_3:
-        result = backtest_stock(symbol, start_date, end_date)
-        results.append(result)
+    # 并发预取数据 (yfinance 下载为 I/O 密集)，结果进入 _load 缓存
+    with ThreadPoolExecutor(max_workers=len(selected_3)) as ex:
+        frames = list(ex.map(lambda s: _load(s, "5y"), selected_3))
+    
+    # 回测 (各股票互相独立，CPU 密集，分进程并行；绘图留在主进程)
+    run_one = partial(_backtest_one, start_date=start_date, end_date=end_date)
+    with ProcessPoolExecutor(max_workers=min(len(selected_3), os.cpu_count() or 1)) as ex:
+        results = list(ex.map(run_one, selected_3, frames))
     
     # 汇总
     print("\n" + "="*60)
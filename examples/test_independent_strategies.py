@@ -4,11 +4,15 @@
 演示如何选择和组合策略
 """
 
+import os
 import sys
 from pathlib import Path
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 
 from data.fetcher import DataFetcher
@@ -44,22 +48,24 @@ def test_strategy_selection():
     print("  hybrid = create_hybrid(['momentum', 'rsi'], params={'rsi': {'oversold': 30}})")
 
 
-def run_backtest(strategy_names, symbol='600519.SS', initial_capital=300000):
-    """运行回测"""
+def run_backtest(strategy_names, symbol='600519.SS', initial_capital=300000, df=None):
+    """运行回测 (df 为已下载的数据时直接使用，否则自行获取)"""
     print(f"\n{'='*50}")
     print(f"回测: {symbol}")
     print(f"策略: {strategy_names}")
     print(f"{'='*50}")
     
     # 获取数据
-    fetcher = DataFetcher()
-    df = fetcher.download(symbol, period="1y")
+    if df is None:
+        fetcher = DataFetcher()
+        df = fetcher.download(symbol, period="1y")
     
     if df is None or len(df) < 200:
         print(f"❌ 数据不足")
         return None
     
-    df.columns = df.columns.str.lower()
+    df = df.copy()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     # 创建混合策略
     hybrid = create_hybrid(strategy_names)
@@ -76,22 +82,32 @@ def run_backtest(strategy_names, symbol='600519.SS', initial_capital=300000):
     
     position = 0
     entry_price = 0
+    held_qty = 0
     
-    for i in range(50, len(df)):
-        price = df['close'].iloc[i]
-        
-        # 获取信号
-        result = hybrid.analyze(df.iloc[:i+1])
+    # 预分配权益数组
+    start = 50
+    equity_arr = np.empty(max(len(df) - start, 0), dtype=np.float64)
+    close_arr = df['close'].to_numpy(dtype=np.float64)
+    
+    # 一次性计算全部信号，循环中按下标取值
+    precomputed = hybrid.precompute(df)
+    sig_arr = precomputed['signal'].to_numpy()
+    strength_arr = precomputed['strength'].to_numpy()
+    recommendation_arr = precomputed['recommendation'].to_numpy()
+    
+    for i in range(start, len(df)):
+        price = close_arr[i]
         
         # 交易逻辑
-        if position == 0 and result['signal'] == 1 and result['strength'] >= 0.3:
+        if position == 0 and sig_arr[i] == 1 and strength_arr[i] >= 0.3:
             amount = engine.cash * 0.5
             quantity = int(amount / price / 100) * 100
             if quantity > 0:
                 engine.buy(df.index[i], symbol, price, quantity=quantity)
+                held_qty = quantity
                 position = 1
                 entry_price = price
-                print(f"买入 @ {price:.2f} 信号:{result['recommendation']}")
+                print(f"买入 @ {price:.2f} 信号:{recommendation_arr[i]}")
         
         elif position == 1:
             # 止损/止盈
@@ -100,18 +116,15 @@ def run_backtest(strategy_names, symbol='600519.SS', initial_capital=300000):
                 if pos:
                     engine.sell(df.index[i], symbol, price, quantity=pos.quantity)
                     print(f"卖出 @ {price:.2f} 原因:{'止损' if price < entry_price * 0.95 else '止盈'}")
+                    held_qty = 0
                     position = 0
         
         # 更新权益
-        equity = engine.cash
-        for sym, pos in engine.positions.items():
-            equity += pos.quantity * price
-        engine.equity_history.append(equity)
-        engine.dates.append(df.index[i])
+        equity_arr[i - start] = engine.cash + held_qty * price
     
     # 结果
     initial = initial_capital
-    final = engine.equity_history[-1] if engine.equity_history else initial
+    final = equity_arr[-1] if len(equity_arr) else initial
     total_return = (final - initial) / initial * 100
     
     print(f"\n📊 结果:")
@@ -140,10 +153,12 @@ def main():
         ['momentum', 'breakout', 'rsi', 'ma', 'volume', 'macd'],  # 全部
     ]
     
-    results = []
-    for strategies in test_cases:
-        ret = run_backtest(strategies, '601888.SS')
-        results.append((strategies, ret))
+    # 所有组合共用同一份数据，只下载一次；各组合分进程并行回测
+    symbol = '601888.SS'
+    df = DataFetcher().download(symbol, period="1y")
+    run_one = partial(run_backtest, symbol=symbol, df=df)
+    with ProcessPoolExecutor(max_workers=min(len(test_cases), os.cpu_count() or 1)) as ex:
+        results = list(zip(test_cases, ex.map(run_one, test_cases)))
     
     # 汇总
     print("\n" + "="*60)
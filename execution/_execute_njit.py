@@ -0,0 +1,140 @@
+"""
+订单成交核心计算
+纯标量运算, 安装 numba 时编译为机器码
+"""
+
+import numpy as np
+
+from utils._njit import njit
+
+
+@njit(cache=True)
+def apply_fill(cash, held_qty, avg_price, is_buy, quantity, price,
+               exec_mult, commission, cash_mult):
+    """
+    计算一笔成交后的资金与持仓
+    
+    买卖方向的差异全部折进 exec_mult / cash_mult 两个系数 (见 fill_multipliers)
+    
+    Args:
+        cash: 当前现金
+        held_qty: 当前持仓数量 (无持仓为0)
+        avg_price: 当前持仓均价
+        is_buy: 是否买入
+        quantity: 成交数量
+        price: 当前价格
+        exec_mult: 成交价系数 (含滑点)
+        commission: 手续费率
+        cash_mult: 现金变动系数 (按成交额计, 含手续费和印花税)
+    
+    Returns:
+        (是否成交, 现金, 持仓数量, 持仓均价, 成交价, 手续费)
+    """
+    exec_price = price * exec_mult
+    gross = quantity * exec_price
+    fee = gross * commission
+    cash_delta = gross * cash_mult
+    
+    # 检查资金 / 持仓
+    if (is_buy and cash + cash_delta < 0) or (not is_buy and held_qty < quantity):
+        return False, cash, held_qty, avg_price, exec_price, fee
+    
+    cash += cash_delta
+    if not is_buy:
+        held_qty -= quantity
+    elif held_qty > 0:
+        total_value = avg_price * held_qty + exec_price * quantity
+        held_qty += quantity
+        avg_price = total_value / held_qty
+    else:
+        held_qty = quantity
+        avg_price = exec_price
+    
+    return True, cash, held_qty, avg_price, exec_price, fee
+
+
+@njit(cache=True)
+def fill_multipliers(is_buy, slippage, commission, stamp_duty):
+    """
+    买卖方向对应的成交价系数和现金变动系数
+
+    Returns:
+        (exec_mult, cash_mult)
+    """
+    if is_buy:
+        return 1 + slippage, -(1 + commission)
+    return 1 - slippage, 1 - commission - stamp_duty
+
+
+@njit(cache=True)
+def run_signals(prices, signals, cash, held_qty, avg_price, position_frac,
+                slippage, commission, stamp_duty):
+    """
+    按信号数组逐bar模拟单只标的交易
+    
+    信号为1且空仓时用 position_frac 比例的现金买入, 信号为-1且持仓时全部卖出。
+    
+    Args:
+        prices: 价格数组
+        signals: 信号数组 (1=买入, -1=卖出, 其他=不动)
+        cash: 初始现金
+        held_qty: 初始持仓数量
+        avg_price: 初始持仓均价
+        position_frac: 买入使用的现金比例
+        slippage: 滑点
+        commission: 手续费率
+        stamp_duty: 印花税率 (仅卖出)
+    
+    Returns:
+        (权益数组, 成交bar下标, 是否买入, 成交数量, 成交价, 手续费,
+         最终现金, 最终持仓数量, 最终持仓均价)
+    """
+    n = len(prices)
+    equity = np.empty(n, dtype=np.float64)
+    
+    # 成交记录按最坏情况 (每个bar一笔) 预分配, 最后截断
+    trade_bar = np.empty(n, dtype=np.int64)
+    trade_is_buy = np.empty(n, dtype=np.bool_)
+    trade_qty = np.empty(n, dtype=np.int64)
+    trade_price = np.empty(n, dtype=np.float64)
+    trade_fee = np.empty(n, dtype=np.float64)
+    n_trades = 0
+    
+    buy_exec_mult, buy_cash_mult = fill_multipliers(True, slippage, commission, stamp_duty)
+    sell_exec_mult, sell_cash_mult = fill_multipliers(False, slippage, commission, stamp_duty)
+    
+    for i in range(n):
+        price = prices[i]
+        sig = signals[i]
+        
+        quantity = 0
+        is_buy = False
+        if sig == 1 and held_qty == 0 and price > 0:
+            quantity = int(cash * position_frac / (price * (1 + slippage)))
+            is_buy = True
+        elif sig == -1 and held_qty > 0:
+            quantity = held_qty
+        
+        if quantity > 0:
+            if is_buy:
+                exec_mult, cash_mult = buy_exec_mult, buy_cash_mult
+            else:
+                exec_mult, cash_mult = sell_exec_mult, sell_cash_mult
+            ok, cash, held_qty, avg_price, exec_price, fee = apply_fill(
+                cash, held_qty, avg_price, is_buy, quantity, price,
+                exec_mult, commission, cash_mult
+            )
+            if ok:
+                trade_bar[n_trades] = i
+                trade_is_buy[n_trades] = is_buy
+                trade_qty[n_trades] = quantity
+                trade_price[n_trades] = exec_price
+                trade_fee[n_trades] = fee
+                n_trades += 1
+        
+        equity[i] = cash + held_qty * price
+    
+    return (equity, trade_bar[:n_trades], trade_is_buy[:n_trades],
+            trade_qty[:n_trades], trade_price[:n_trades], trade_fee[:n_trades],
+            cash, held_qty, avg_price)
+
@@ -2,12 +2,18 @@
 模拟交易执行模块
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+from ._execute_njit import apply_fill, fill_multipliers, run_signals
+
+# 印花税率 (仅卖出)
+STAMP_DUTY = 0.001
+
 
 class OrderType(Enum):
     """订单类型"""
@@ -23,7 +29,7 @@ class OrderStatus(Enum):
     REJECTED = "REJECTED"   # 已拒绝
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     """订单"""
     order_id: str
@@ -40,7 +46,7 @@ class Order:
     notes: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """持仓"""
     symbol: str
@@ -64,10 +70,105 @@ class TradingSimulator:
         self.commission = commission
         self.slippage = slippage
         
+        # 买/卖方向的 (成交价系数, 现金变动系数) 查表
+        self._fill_mult = {
+            'BUY': fill_multipliers(True, slippage, commission, STAMP_DUTY),
+            'SELL': fill_multipliers(False, slippage, commission, STAMP_DUTY),
+        }
+        
         self.positions: Dict[str, Position] = {}
+        self._sync_position_arrays()
         self.orders: List[Order] = []
+        self._orders_by_id: Dict[str, Order] = {}
+        self._pending_count = 0
         self.order_id_counter = 0
-        self.trade_history = []
+        
+        # 成交记录按列存放在预分配数组中，容量不足时翻倍
+        self._th_cap = 256
+        self._th_n = 0
+        self._th_tz = None  # 首笔成交时间的时区，时间列按 UTC 纳秒存放
+        self._alloc_trade_buffers(self._th_cap)
+    
+    def _alloc_trade_buffers(self, cap: int):
+        """分配(或扩容)成交记录数组，保留已有记录"""
+        n = getattr(self, '_th_n', 0)
+        new = {
+            '_th_order_id': np.empty(cap, dtype=object),
+            '_th_symbol': np.empty(cap, dtype=object),
+            '_th_is_buy': np.empty(cap, dtype=np.bool_),
+            '_th_qty': np.empty(cap, dtype=np.int64),
+            '_th_price': np.empty(cap, dtype=np.float64),
+            '_th_fee': np.empty(cap, dtype=np.float64),
+            '_th_ts': np.empty(cap, dtype=np.int64),
+        }
+        for name, arr in new.items():
+            if n:
+                arr[:n] = getattr(self, name)[:n]
+            setattr(self, name, arr)
+        self._th_cap = cap
+    
+    def _record_trade(self, order: 'Order', price: float, fee: float):
+        """追加一条成交记录"""
+        if self._th_n == self._th_cap:
+            self._alloc_trade_buffers(self._th_cap * 2)
+        
+        k = self._th_n
+        self._th_order_id[k] = order.order_id
+        self._th_symbol[k] = order.symbol
+        self._th_is_buy[k] = order.action == 'BUY'
+        self._th_qty[k] = order.quantity
+        self._th_price[k] = price
+        self._th_fee[k] = fee
+        self._th_ts[k] = self._ts_value(order.filled_at)
+        self._th_n = k + 1
+    
+    def _record_trades(self, orders: List['Order'], is_buy: np.ndarray, qty: np.ndarray,
+                       price: np.ndarray, fee: np.ndarray, ts: np.ndarray):
+        """批量追加成交记录 (ts 为 UTC 纳秒数组)"""
+        m = len(orders)
+        if m == 0:
+            return
+        if self._th_n + m > self._th_cap:
+            cap = self._th_cap
+            while cap < self._th_n + m:
+                cap *= 2
+            self._alloc_trade_buffers(cap)
+        
+        k = slice(self._th_n, self._th_n + m)
+        self._th_order_id[k] = [o.order_id for o in orders]
+        self._th_symbol[k] = [o.symbol for o in orders]
+        self._th_is_buy[k] = is_buy
+        self._th_qty[k] = qty
+        self._th_price[k] = price
+        self._th_fee[k] = fee
+        self._th_ts[k] = ts
+        self._th_n += m
+    
+    def _ts_value(self, timestamp) -> int:
+        """成交时间转为 UTC 纳秒 (无时区时按原值)，首笔成交记下时区"""
+        ts = pd.Timestamp(timestamp)
+        if self._th_n == 0:
+            self._th_tz = ts.tz
+        return ts.value
+    
+    @property
+    def trade_history(self) -> pd.DataFrame:
+        """成交记录 (访问时才组装DataFrame，时间列使用首笔成交的时区)"""
+        n = self._th_n
+        timestamps = pd.to_datetime(self._th_ts[:n], utc=True)
+        if self._th_tz is None:
+            timestamps = timestamps.tz_localize(None)
+        else:
+            timestamps = timestamps.tz_convert(self._th_tz)
+        return pd.DataFrame({
+            'order_id': self._th_order_id[:n],
+            'symbol': self._th_symbol[:n],
+            'action': np.where(self._th_is_buy[:n], 'BUY', 'SELL'),
+            'quantity': self._th_qty[:n],
+            'price': self._th_price[:n],
+            'commission': self._th_fee[:n],
+            'timestamp': timestamps,
+        })
     
     def create_order(
         self,
@@ -76,9 +177,10 @@ class TradingSimulator:
         quantity: int,
         order_type: OrderType = OrderType.MARKET,
         price: float = None,
-        notes: str = ""
+        notes: str = "",
+        timestamp: datetime = None
     ) -> Order:
-        """创建订单"""
+        """创建订单 (timestamp 为空时使用当前时间)"""
         self.order_id_counter += 1
         order = Order(
             order_id=f"ORD_{self.order_id_counter:06d}",
@@ -87,117 +189,212 @@ class TradingSimulator:
             order_type=order_type,
             quantity=quantity,
             price=price,
+            created_at=timestamp if timestamp is not None else datetime.now(),
             notes=notes
         )
         self.orders.append(order)
+        self._orders_by_id[order.order_id] = order
+        self._pending_count += 1
         return order
     
-    def execute_order(self, order: Order, current_price: float) -> bool:
-        """执行订单"""
+    def execute_order(self, order: Order, current_price: float,
+                      timestamp: datetime = None) -> bool:
+        """执行订单 (timestamp 为成交时间，回测时传入bar时间，为空时使用当前时间)"""
         if order.status != OrderStatus.PENDING:
             return False
         
-        # 计算成交价
-        if order.action == 'BUY':
-            exec_price = current_price * (1 + self.slippage)
-        else:
-            exec_price = current_price * (1 - self.slippage)
+        is_buy = order.action == 'BUY'
+        # 无论成交还是拒绝，订单都离开待成交状态
+        self._pending_count -= 1
         
-        # 计算成本
-        total_cost = order.quantity * exec_price
-        commission_cost = total_cost * self.commission
+        if not is_buy and order.symbol not in self.positions:
+            order.status = OrderStatus.REJECTED
+            return False
         
-        if order.action == 'BUY':
-            # 检查资金
-            if total_cost + commission_cost > self.cash:
-                order.status = OrderStatus.REJECTED
-                return False
-            
-            # 扣除资金
-            self.cash -= (total_cost + commission_cost)
-            
-            # 更新持仓
-            if order.symbol in self.positions:
-                pos = self.positions[order.symbol]
-                total_value = pos.avg_price * pos.quantity + exec_price * order.quantity
-                pos.quantity += order.quantity
-                pos.avg_price = total_value / pos.quantity
-            else:
-                self.positions[order.symbol] = Position(
-                    symbol=order.symbol,
-                    quantity=order.quantity,
-                    avg_price=exec_price,
-                    entry_date=datetime.now()
-                )
+        pos = self.positions.get(order.symbol)
+        held_qty = pos.quantity if pos else 0
+        avg_price = pos.avg_price if pos else 0.0
         
-        else:  # SELL
-            if order.symbol not in self.positions:
-                order.status = OrderStatus.REJECTED
-                return False
-            
-            pos = self.positions[order.symbol]
-            if pos.quantity < order.quantity:
-                order.status = OrderStatus.REJECTED
-                return False
-            
-            # 计算收益
-            gross = order.quantity * exec_price
-            commission_cost = gross * self.commission
-            stamp_duty = gross * 0.001 if order.action == 'SELL' else 0
-            net = gross - commission_cost - stamp_duty
-            
-            # 更新现金
-            self.cash += net
-            
-            # 更新持仓
-            pos.quantity -= order.quantity
-            if pos.quantity == 0:
-                del self.positions[order.symbol]
+        # 资金、持仓、成交价和手续费由 apply_fill 统一计算
+        exec_mult, cash_mult = self._fill_mult[order.action]
+        ok, cash, held_qty, avg_price, exec_price, commission_cost = apply_fill(
+            self.cash, held_qty, avg_price, is_buy, order.quantity, current_price,
+            exec_mult, self.commission, cash_mult
+        )
+        if not ok:
+            order.status = OrderStatus.REJECTED
+            return False
+        
+        if timestamp is None:
+            timestamp = datetime.now()
+        
+        # 写回现金和持仓
+        self.cash = cash
+        if held_qty == 0:
+            self.positions.pop(order.symbol, None)
+        elif pos:
+            pos.quantity = held_qty
+            pos.avg_price = avg_price
+        else:
+            self.positions[order.symbol] = Position(
+                symbol=order.symbol,
+                quantity=held_qty,
+                avg_price=avg_price,
+                entry_date=timestamp
+            )
+        self._sync_position_arrays()
         
         # 更新订单状态
         order.status = OrderStatus.FILLED
         order.filled_price = exec_price
         order.filled_quantity = order.quantity
-        order.filled_at = datetime.now()
+        order.filled_at = timestamp
         
         # 记录交易
-        self.trade_history.append({
-            'order_id': order.order_id,
-            'symbol': order.symbol,
-            'action': order.action,
-            'quantity': order.quantity,
-            'price': exec_price,
-            'commission': commission_cost,
-            'timestamp': order.filled_at
-        })
+        self._record_trade(order, exec_price, commission_cost)
         
         return True
     
     def process_market_order(self, symbol: str, action: str, quantity: int, 
-                            current_price: float, notes: str = "") -> Order:
+                            current_price: float, notes: str = "",
+                            timestamp: datetime = None) -> Order:
         """处理市价单"""
-        order = self.create_order(symbol, action, quantity, OrderType.MARKET, notes=notes)
-        self.execute_order(order, current_price)
+        if timestamp is None:
+            timestamp = datetime.now()
+        order = self.create_order(symbol, action, quantity, OrderType.MARKET,
+                                  notes=notes, timestamp=timestamp)
+        self.execute_order(order, current_price, timestamp)
         return order
     
+    def run_vectorized(
+        self,
+        prices: np.ndarray,
+        signals: np.ndarray,
+        position_frac: float = 0.5,
+        symbol: str = 'UNKNOWN',
+        index=None
+    ) -> Tuple[pd.Series, pd.DataFrame]:
+        """
+        按整段信号批量回测单只标的
+
+        信号为1且空仓时用 position_frac 比例的现金买入, 信号为-1且持仓时全部卖出。
+        逐bar撮合在 run_signals 内一次完成, 结束后按成交批量生成已成交 Order
+        并追加成交记录, 状态与逐笔调用 process_market_order 一致。
+
+        Args:
+            prices: 价格序列
+            signals: 信号序列 (1=买入, -1=卖出, 其他=不动)
+            position_frac: 买入使用的现金比例
+            symbol: 股票代码
+            index: 权益曲线和成交记录使用的索引 (如日期), 默认按bar序号;
+                不是 DatetimeIndex 时成交时间记为当前时间
+
+        Returns:
+            (权益曲线, 成交记录DataFrame)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        signals = np.asarray(signals, dtype=np.int64)
+        if index is None:
+            index = pd.RangeIndex(len(prices))
+        
+        pos = self.positions.get(symbol)
+        held_qty = pos.quantity if pos else 0
+        avg_price = pos.avg_price if pos else 0.0
+        
+        (equity, trade_bar, trade_is_buy, trade_qty, trade_price, trade_fee,
+         cash, held_qty, avg_price) = run_signals(
+            prices, signals, float(self.cash), int(held_qty), float(avg_price),
+            position_frac, self.slippage, self.commission, STAMP_DUTY
+        )
+        
+        # 写回现金和持仓
+        self.cash = float(cash)
+        if held_qty == 0:
+            self.positions.pop(symbol, None)
+        elif pos:
+            pos.quantity = int(held_qty)
+            pos.avg_price = float(avg_price)
+        else:
+            self.positions[symbol] = Position(
+                symbol=symbol,
+                quantity=int(held_qty),
+                avg_price=float(avg_price),
+                entry_date=index[trade_bar[-1]]
+            )
+        self._sync_position_arrays()
+        
+        # 成交时间: 日期索引取对应bar, 否则同 process_market_order 取当前时间
+        if isinstance(index, pd.DatetimeIndex):
+            fill_times = index[trade_bar]
+            ts = fill_times.asi8
+            if self._th_n == 0 and len(fill_times):
+                self._th_tz = fill_times.tz
+        else:
+            now = datetime.now()
+            fill_times = [now] * len(trade_bar)
+            ts = np.full(len(trade_bar), self._ts_value(now), dtype=np.int64)
+        
+        # 生成已成交订单
+        orders = []
+        for is_buy, qty, price, filled_at in zip(trade_is_buy.tolist(), trade_qty.tolist(),
+                                                 trade_price.tolist(), fill_times):
+            self.order_id_counter += 1
+            orders.append(Order(
+                order_id=f"ORD_{self.order_id_counter:06d}",
+                symbol=symbol,
+                action='BUY' if is_buy else 'SELL',
+                order_type=OrderType.MARKET,
+                quantity=qty,
+                filled_price=price,
+                filled_quantity=qty,
+                status=OrderStatus.FILLED,
+                created_at=filled_at,
+                filled_at=filled_at
+            ))
+        self.orders.extend(orders)
+        self._orders_by_id.update((o.order_id, o) for o in orders)
+        self._record_trades(orders, trade_is_buy, trade_qty, trade_price, trade_fee, ts)
+        
+        equity_curve = pd.Series(equity, index=index)
+        trades = pd.DataFrame({
+            'symbol': symbol,
+            'action': np.where(trade_is_buy, 'BUY', 'SELL'),
+            'quantity': trade_qty,
+            'price': trade_price,
+            'commission': trade_fee,
+            'timestamp': index[trade_bar],
+        })
+        
+        return equity_curve, trades
+    
     def cancel_order(self, order_id: str) -> bool:
         """取消订单"""
-        for order in self.orders:
-            if order.order_id == order_id and order.status == OrderStatus.PENDING:
-                order.status = OrderStatus.CANCELLED
-                return True
+        order = self._orders_by_id.get(order_id)
+        if order and order.status == OrderStatus.PENDING:
+            order.status = OrderStatus.CANCELLED
+            self._pending_count -= 1
+            return True
         return False
     
+    def _sync_position_arrays(self):
+        """持仓变化后重建代码/数量/均价向量，与 positions 顺序一致"""
+        self._symbols: List[str] = list(self.positions)
+        self._qty = np.array([p.quantity for p in self.positions.values()], dtype=np.float64)
+        self._avg_price_vec = np.array([p.avg_price for p in self.positions.values()], dtype=np.float64)
+    
     def get_portfolio_value(self, prices: Dict[str, float]) -> float:
         """获取组合市值"""
-        positions_value = 0
-        for symbol, pos in self.positions.items():
-            if symbol in prices:
-                positions_value += pos.quantity * prices[symbol]
-                pos.unrealized_pnl = (prices[symbol] - pos.avg_price) * pos.quantity
-            else:
-                pos.unrealized_pnl = 0
-        return self.cash + positions_value
+        if not self._symbols:
+            return self.cash
+        
+        # 缺少报价的持仓不计市值，未实现盈亏记为0
+        priced = np.array([s in prices for s in self._symbols])
+        price_vec = np.array([prices.get(s, 0.0) for s in self._symbols], dtype=np.float64)
+        pnls = np.where(priced, (price_vec - self._avg_price_vec) * self._qty, 0.0)
+        for pos, pnl in zip(self.positions.values(), pnls.tolist()):
+            pos.unrealized_pnl = pnl
+        
+        return self.cash + float(self._qty @ price_vec)
     
     def get_position(self, symbol: str) -> Optional[Position]:
         """获取持仓"""
@@ -208,8 +405,8 @@ class TradingSimulator:
         return {
             'cash': self.cash,
             'positions_count': len(self.positions),
-            'pending_orders': len([o for o in self.orders if o.status == OrderStatus.PENDING]),
-            'total_trades': len(self.trade_history)
+            'pending_orders': self._pending_count,
+            'total_trades': self._th_n
         }
     
     def print_status(self):
@@ -219,8 +416,8 @@ class TradingSimulator:
         print("="*50)
         print(f"现金:        ${self.cash:,.2f}")
         print(f"持仓数量:    {len(self.positions)}")
-        print(f"待成交订单:  {len([o for o in self.orders if o.status == OrderStatus.PENDING])}")
-        print(f"总交易次数:  {len(self.trade_history)}")
+        print(f"待成交订单:  {self._pending_count}")
+        print(f"总交易次数:  {self._th_n}")
         
         if self.positions:
             print("\n📈 持仓明细:")
@@ -237,11 +434,12 @@ class StrategyExecutor:
         self.simulator = simulator
     
     def execute_signal(self, symbol: str, signal: str, current_price: float, 
-                      quantity: int = None):
+                      quantity: int = None, timestamp: datetime = None):
         """
         执行信号
         
         signal: 'BUY', 'SELL', 'HOLD', 'CLOSE_ALL'
+        timestamp: bar时间 (回测时传入，为空时使用当前时间)
         """
         if signal == 'HOLD':
             return
@@ -253,20 +451,23 @@ class StrategyExecutor:
                 quantity = int(available / (current_price * 1.001))
             
             if quantity > 0:
-                self.simulator.process_market_order(symbol, 'BUY', quantity, current_price)
+                self.simulator.process_market_order(symbol, 'BUY', quantity, current_price,
+                                                    timestamp=timestamp)
                 print(f"🟢 买入 {symbol} {quantity}股 @ ${current_price:.2f}")
         
         elif signal == 'SELL':
             pos = self.simulator.get_position(symbol)
             if pos:
                 sell_qty = quantity or pos.quantity
-                self.simulator.process_market_order(symbol, 'SELL', sell_qty, current_price)
+                self.simulator.process_market_order(symbol, 'SELL', sell_qty, current_price,
+                                                    timestamp=timestamp)
                 print(f"🔴 卖出 {symbol} {sell_qty}股 @ ${current_price:.2f}")
         
         elif signal == 'CLOSE_ALL':
             pos = self.simulator.get_position(symbol)
             if pos:
-                self.simulator.process_market_order(symbol, 'SELL', pos.quantity, current_price)
+                self.simulator.process_market_order(symbol, 'SELL', pos.quantity, current_price,
+                                                    timestamp=timestamp)
                 print(f"🔴 清仓 {symbol} {pos.quantity}股 @ ${current_price:.2f}")
 
 
@@ -0,0 +1,42 @@
+"""
+仓位管理核心计算
+安装 numba 时编译为机器码并按 f 并行
+"""
+
+import numpy as np
+
+from utils._njit import njit, prange
+
+
+@njit(cache=True, parallel=True)
+def optimal_f_log_twr(f_grid, trades, max_loss):
+    """
+    计算每个 f 下的对数TWR
+    
+    逐笔连乘持有期收益, 乘积接近上下溢时才折算为对数累加,
+    不生成 f×N 的中间矩阵; 出现非正收益即视为破产, 记为 -inf。
+    
+    Args:
+        f_grid: 候选 f 数组
+        trades: 交易盈亏数组
+        max_loss: 最大单笔亏损 (正值)
+    
+    Returns:
+        与 f_grid 等长的对数TWR数组
+    """
+    log_twr = np.empty(f_grid.shape[0], dtype=np.float64)
+    for i in prange(f_grid.shape[0]):
+        scale = f_grid[i] / max_loss
+        total = 0.0
+        prod = 1.0
+        for j in range(trades.shape[0]):
+            ratio = 1.0 + scale * trades[j]
+            if ratio <= 0:
+                total = -np.inf
+                break
+            prod *= ratio
+            if prod > 1e100 or prod < 1e-100:
+                total += np.log(prod)
+                prod = 1.0
+        log_twr[i] = total + np.log(prod)
+    return log_twr
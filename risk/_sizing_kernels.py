@@ -0,0 +1,73 @@
+"""
+仓位计算标量内核
+安装 numba 时编译为机器码, 回测逐bar调用不再经过 Python 浮点装箱
+"""
+
+import numpy as np
+
+from utils._njit import njit, prange
+
+
+@njit(cache=True)
+def fixed_amount(capital, amount, price):
+    """按金额计算整手数量"""
+    quantity = int(amount / price / 100) * 100  # 整手
+    return max(0, quantity)
+
+
+@njit(cache=True)
+def fixed_percent(capital, percent, price):
+    """按资金比例计算整手数量"""
+    return fixed_amount(capital, capital * percent, price)
+
+
+@njit(cache=True)
+def fixed_shares(capital, shares, price, max_percent):
+    """目标股数, 不超过最大仓位比例"""
+    max_shares = int(capital * max_percent / price / 100) * 100
+    return min(shares, max_shares)
+
+
+@njit(cache=True)
+def kelly(capital, win_rate, avg_win, avg_loss, price, max_kelly):
+    """Kelly公式仓位, 比例限制在 [0, max_kelly]"""
+    if avg_loss <= 0:
+        return 0
+    
+    # Kelly = W - (1-W)/R
+    win_loss_ratio = avg_win / avg_loss
+    k = win_rate - (1 - win_rate) / win_loss_ratio
+    k = max(min(k, max_kelly), 0)
+    
+    return fixed_amount(capital, capital * k, price)
+
+
+@njit(cache=True)
+def volatility_based(capital, target_vol, historical_vol, price, max_percent):
+    """按目标波动率调整的仓位, 基础10%, 最多2倍"""
+    if historical_vol <= 0:
+        return 0
+    
+    vol_ratio = min(target_vol / historical_vol, 2.0)
+    percent = min(max_percent, 0.1 * vol_ratio)
+    
+    return fixed_amount(capital, capital * percent, price)
+
+
+@njit(cache=True, parallel=True)
+def kelly_batch(capital, win_rate, avg_win, avg_loss, price, max_kelly):
+    """
+    批量 Kelly 仓位 (参数扫描/组合内多标的)
+    
+    Args:
+        capital, win_rate, avg_win, avg_loss, price, max_kelly: 等长 float64 数组
+    
+    Returns:
+        int64 数量数组
+    """
+    n = capital.shape[0]
+    out = np.empty(n, dtype=np.int64)
+    for i in prange(n):
+        out[i] = kelly(capital[i], win_rate[i], avg_win[i], avg_loss[i],
+                       price[i], max_kelly[i])
+    return out
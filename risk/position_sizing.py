@@ -3,7 +3,46 @@
 """
 
 import numpy as np
-from typing import Dict, Optional
+import pandas as pd
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Tuple
+
+from utils._njit import NUMBA_AVAILABLE
+from ._kernels import optimal_f_log_twr
+from . import _sizing_kernels
+
+
+@lru_cache(maxsize=1024)
+def _optimal_f_core(trades_bytes: bytes) -> Optional[float]:
+    """
+    Optimal F 网格搜索 (按交易序列字节缓存，逐bar重复调用时直接命中)
+    
+    Args:
+        trades_bytes: float64 交易盈亏序列的字节
+    
+    Returns:
+        最优f，无亏损交易时返回 None
+    """
+    trades_arr = np.frombuffer(trades_bytes, dtype=np.float64)
+    max_loss = abs(trades_arr.min())
+    
+    if max_loss == 0:
+        return None
+    
+    # 取对数求和代替连乘，长交易序列不会上溢/下溢；出现非正收益的f视为破产
+    f_grid = np.arange(0.01, 1.0, 0.01)
+    if NUMBA_AVAILABLE:
+        # 编译内核逐f累加，不生成 f×N 的中间矩阵
+        log_twr = optimal_f_log_twr(f_grid, trades_arr, max_loss)
+    else:
+        # 所有f一次算出TWR: 每行为一个f下各笔交易的收益率，log1p 避免 1+x 的精度损失
+        returns = np.outer(f_grid, trades_arr / max_loss)
+        ruined = (returns <= -1.0).any(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_twr = np.where(ruined, -np.inf, np.log1p(returns).sum(axis=1))
+    
+    return float(f_grid[log_twr.argmax()]) if np.isfinite(log_twr).any() else 0
 
 
 class PositionSizing:
@@ -22,8 +61,7 @@ class PositionSizing:
         Returns:
             可买入数量
         """
-        quantity = int(amount / price / 100) * 100  # 整手
-        return max(0, quantity)
+        return _sizing_kernels.fixed_amount(capital, amount, price)
     
     @staticmethod
     def fixed_percent(capital: float, percent: float, price: float) -> int:
@@ -38,8 +76,7 @@ class PositionSizing:
         Returns:
             可买入数量
         """
-        amount = capital * percent
-        return PositionSizing.fixed_amount(capital, amount, price)
+        return _sizing_kernels.fixed_percent(capital, percent, price)
     
     @staticmethod
     def fixed_shares(capital: float, shares: int, price: float, max_percent: float = 0.3) -> int:
@@ -55,10 +92,7 @@ class PositionSizing:
         Returns:
             实际买入数量
         """
-        max_amount = capital * max_percent
-        max_shares = int(max_amount / price / 100) * 100
-        
-        return min(shares, max_shares)
+        return _sizing_kernels.fixed_shares(capital, shares, price, max_percent)
     
     @staticmethod
     def kelly(capital: float, win_rate: float, avg_win: float, 
@@ -77,20 +111,23 @@ class PositionSizing:
         Returns:
             买入数量
         """
-        if avg_loss <= 0:
-            return 0
-        
-        # Kelly = W - (1-W)/R
-        # W = win_rate, R = avg_win/avg_loss
-        win_loss_ratio = avg_win / avg_loss
-        kelly = win_rate - (1 - win_rate) / win_loss_ratio
-        
-        # 限制最大仓位
-        kelly = min(kelly, max_kelly)
-        kelly = max(kelly, 0)  # 不允许负数
+        return _sizing_kernels.kelly(capital, win_rate, avg_win, avg_loss,
+                                     price, max_kelly)
+    
+    @staticmethod
+    def kelly_batch(capital, win_rate, avg_win, avg_loss, price,
+                    max_kelly=0.25) -> np.ndarray:
+        """
+        批量Kelly仓位 (参数可为标量或数组，按广播对齐)
         
-        amount = capital * kelly
-        return PositionSizing.fixed_amount(capital, amount, price)
+        Returns:
+            int64 买入数量数组
+        """
+        args = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in
+                                     (capital, win_rate, avg_win, avg_loss, price, max_kelly)))
+        shape = args[0].shape
+        flat = [np.ascontiguousarray(a).ravel() for a in args]
+        return _sizing_kernels.kelly_batch(*flat).reshape(shape)
     
     @staticmethod
     def volatility_based(capital: float, target_vol: float, 
@@ -109,17 +146,23 @@ class PositionSizing:
         Returns:
             买入数量
         """
-        if historical_vol <= 0:
+        return _sizing_kernels.volatility_based(capital, target_vol, historical_vol,
+                                                price, max_percent)
+    
+    @staticmethod
+    def _count_sign(sequence: list, positive: bool) -> int:
+        """统计序列中盈利(positive=True)或亏损笔数"""
+        if sequence is None or len(sequence) == 0:
             return 0
         
-        # 波动率调整仓位
-        vol_ratio = target_vol / historical_vol
-        vol_ratio = min(vol_ratio, 2.0)  # 最多2倍
+        # 短序列直接计数，省去构造数组的开销
+        if len(sequence) < 32:
+            if positive:
+                return sum(1 for x in sequence if x > 0)
+            return sum(1 for x in sequence if x < 0)
         
-        percent = min(max_percent, 0.1 * vol_ratio)  # 基础10%仓位
-        
-        amount = capital * percent
-        return PositionSizing.fixed_amount(capital, amount, price)
+        arr = np.asarray(sequence, dtype=np.float64)
+        return int(np.count_nonzero(arr > 0 if positive else arr < 0))
     
     @staticmethod
     def martingale(capital: float, base_amount: float, price: float,
@@ -137,11 +180,8 @@ class PositionSizing:
         Returns:
             买入数量
         """
-        if sequence is None:
-            sequence = []
-        
         # 计算连续亏损次数
-        losses = sum(1 for x in sequence if x < 0) if sequence else 0
+        losses = PositionSizing._count_sign(sequence, positive=False)
         
         # 亏损后翻倍
         amount = base_amount * (2 ** losses)
@@ -165,11 +205,8 @@ class PositionSizing:
         Returns:
             买入数量
         """
-        if sequence is None:
-            sequence = []
-        
         # 计算连续盈利次数
-        wins = sum(1 for x in sequence if x > 0) if sequence else 0
+        wins = PositionSizing._count_sign(sequence, positive=True)
         
         # 盈利后加仓
         amount = base_amount * (1.5 ** wins)
@@ -196,35 +233,31 @@ class PositionSizing:
             return PositionSizing.fixed_percent(capital, 0.1, price)
         
         # 计算Optimal F
-        trades_arr = np.array(trades)
-        max_loss = abs(trades_arr.min())
+        trades_bytes = np.ascontiguousarray(trades, dtype=np.float64).tobytes()
+        best_f = _optimal_f_core(trades_bytes)
         
-        if max_loss == 0:
+        if best_f is None:
             return PositionSizing.fixed_percent(capital, 0.1, price)
         
-        # 遍历找最优f
-        best_f = 0
-        best_twr = 0
-        
-        for f in np.arange(0.01, 1.0, 0.01):
-            # 计算TWR
-            twr = 1
-            for t in trades_arr:
-                if t > 0:
-                    twr *= (1 + f * t / max_loss)
-                else:
-                    twr *= (1 + f * t / max_loss)
-            
-            if twr > best_twr:
-                best_twr = twr
-                best_f = f
-        
         # 应用仓位
         percent = min(best_f * 0.1, max_percent)
         
         return PositionSizing.fixed_percent(capital, percent, price)
 
 
+@dataclass(slots=True)
+class _Position:
+    """组合持仓 (兼容 pos['quantity'] 形式的下标访问)"""
+    quantity: int
+    avg_price: float
+    
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+    
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+
 class Portfolio:
     """组合管理"""
     
@@ -239,8 +272,52 @@ class Portfolio:
         self.capital = capital
         self.cash = capital
         self.max_positions = max_positions
-        self.positions = {}  # {symbol: {'quantity': int, 'avg_price': float}}
-        self.history = []
+        self.positions: Dict[str, _Position] = {}
+        self._sync_arrays()
+        
+        # 历史记录按列存放在预分配数组中，容量不足时翻倍
+        self._hist_len = 0
+        self._hist_cap = 256
+        self._hist_cash = np.empty(self._hist_cap, dtype=np.float64)
+        self._hist_pos = np.empty(self._hist_cap, dtype=np.float64)
+        self._hist_total = np.empty(self._hist_cap, dtype=np.float64)
+    
+    @property
+    def history(self) -> pd.DataFrame:
+        """历史记录 (访问时才组装DataFrame)"""
+        n = self._hist_len
+        return pd.DataFrame({
+            'cash': self._hist_cash[:n],
+            'position_value': self._hist_pos[:n],
+            'total_value': self._hist_total[:n],
+        })
+    
+    def _sync_arrays(self):
+        """持仓变化后重建代码/数量/均价向量，与 positions 顺序一致"""
+        self._symbols = list(self.positions)
+        self._qty = np.array([p.quantity for p in self.positions.values()], dtype=np.float64)
+        self._avg_px = np.array([p.avg_price for p in self.positions.values()], dtype=np.float64)
+        self._prices_buf = np.zeros(len(self._symbols), dtype=np.float64)
+    
+    def mark_to_market(self, prices: Mapping[str, float]) -> Tuple[float, np.ndarray]:
+        """
+        按当前价格计算持仓市值和各持仓权重
+        
+        Args:
+            prices: 当前价格 {symbol: price}，缺少报价的持仓按0计
+        
+        Returns:
+            (持仓市值, 与 positions 顺序一致的权重数组)
+        """
+        n = len(self._symbols)
+        self._prices_buf[:] = np.fromiter((prices.get(s, 0.0) for s in self._symbols),
+                                          dtype=np.float64, count=n)
+        values = self._qty * self._prices_buf
+        position_value = float(values.sum())
+        
+        total = self.cash + position_value
+        weights = values / total if total != 0 else np.zeros(n, dtype=np.float64)
+        return position_value, weights
     
     def can_buy(self) -> bool:
         """是否可以买入"""
@@ -266,18 +343,16 @@ class Portfolio:
         if symbol in self.positions:
             # 补仓
             pos = self.positions[symbol]
-            total_cost = pos['avg_price'] * pos['quantity'] + price * quantity
-            pos['quantity'] += quantity
-            pos['avg_price'] = total_cost / pos['quantity']
+            total_cost = pos.avg_price * pos.quantity + price * quantity
+            pos.quantity += quantity
+            pos.avg_price = total_cost / pos.quantity
         else:
             if not self.can_buy():
                 return False
-            self.positions[symbol] = {
-                'quantity': quantity,
-                'avg_price': price
-            }
+            self.positions[symbol] = _Position(quantity=quantity, avg_price=price)
         
         self.cash -= cost
+        self._sync_arrays()
         return True
     
     def sell(self, symbol: str, price: float, quantity: int = None) -> float:
@@ -297,16 +372,17 @@ class Portfolio:
         
         pos = self.positions[symbol]
         
-        if quantity is None or quantity >= pos['quantity']:
+        if quantity is None or quantity >= pos.quantity:
             # 全部卖出
-            quantity = pos['quantity']
+            quantity = pos.quantity
             del self.positions[symbol]
         else:
             # 部分卖出
-            pos['quantity'] -= quantity
+            pos.quantity -= quantity
         
         proceeds = price * quantity
         self.cash += proceeds
+        self._sync_arrays()
         
         return proceeds
     
@@ -320,29 +396,94 @@ class Portfolio:
         Returns:
             持仓市值
         """
-        value = 0
-        for symbol, pos in self.positions.items():
-            if symbol in prices:
-                value += pos['quantity'] * prices[symbol]
-        return value
+        return self.mark_to_market(prices)[0]
+    
+    def snapshot(self, prices: Dict[str, float]) -> Tuple[float, float, Dict[str, float]]:
+        """
+        一次估值同时得到总权益、持仓市值和持仓权重
+        
+        Args:
+            prices: 当前价格 {symbol: price}
+        
+        Returns:
+            (总权益, 持仓市值, 权重 {symbol: weight})，总权益为0时权重为空
+        """
+        position_value, weights = self.mark_to_market(prices)
+        total = self.cash + position_value
+        if total == 0:
+            return total, position_value, {}
+        
+        return total, position_value, {s: float(w) for s, w in zip(self._symbols, weights)
+                                       if s in prices}
     
     def get_total_value(self, prices: Dict[str, float]) -> float:
         """获取总权益"""
-        return self.cash + self.get_position_value(prices)
+        return self.cash + self.mark_to_market(prices)[0]
     
     def get_weights(self, prices: Dict[str, float]) -> Dict[str, float]:
         """获取持仓权重"""
-        total = self.get_total_value(prices)
-        if total == 0:
-            return {}
+        return self.snapshot(prices)[2]
+    
+    def replay(self, trades: pd.DataFrame):
+        """
+        批量回放已成交的交易记录 (回测用)，结果与逐笔 buy/sell 一致
+        
+        交易视为已成交，不再检查资金和持仓数限制，卖出数量不应超过持仓。
         
-        weights = {}
-        for symbol, pos in self.positions.items():
-            if symbol in prices:
-                weight = pos['quantity'] * prices[symbol] / total
-                weights[symbol] = weight
+        Args:
+            trades: 按时间排序，列为 symbol, side ('BUY'/'SELL'), price, qty
+        """
+        if len(trades) == 0:
+            return
+        
+        symbols = trades['symbol'].to_numpy()
+        is_buy = trades['side'].to_numpy() == 'BUY'
+        price = trades['price'].to_numpy(dtype=np.float64)
+        qty = trades['qty'].to_numpy(dtype=np.int64)
+        signed = np.where(is_buy, qty, -qty)
+        self.cash -= float(signed @ price)
+        
+        # 按代码汇总: 净数量、买入量/金额、最后一笔买入与第一笔卖出的位置
+        row = np.arange(len(trades))
+        agg = pd.DataFrame({
+            'symbol': symbols,
+            'net': signed,
+            'buy_qty': np.where(is_buy, qty, 0),
+            'buy_amount': np.where(is_buy, qty * price, 0.0),
+            'last_buy': np.where(is_buy, row, -1),
+            'first_sell': np.where(is_buy, len(trades), row),
+        }).groupby('symbol', sort=False).agg(
+            {'net': 'sum', 'buy_qty': 'sum', 'buy_amount': 'sum',
+             'last_buy': 'max', 'first_sell': 'min'})
+        
+        for symbol, net, buy_qty, buy_amount, last_buy, first_sell in agg.itertuples():
+            pos = self.positions.get(symbol)
+            held = pos.quantity if pos else 0
+            quantity = held + net
+            if quantity <= 0:
+                self.positions.pop(symbol, None)
+                continue
+            
+            if first_sell > last_buy:
+                # 卖出都在买入之后: 均价即原持仓与各笔买入的加权平均
+                avg_price = ((pos.avg_price * held if pos else 0.0) + buy_amount) / (held + buy_qty)
+            else:
+                # 买卖交错时按时间顺序重算 (卖出不改变均价，清仓后重新计)
+                avg_price = pos.avg_price if pos else 0.0
+                rows = symbols == symbol
+                for buy, p, q in zip(is_buy[rows], price[rows], qty[rows]):
+                    if buy:
+                        avg_price = (avg_price * held + p * q) / (held + q)
+                        held += q
+                    else:
+                        held = max(held - q, 0)
+            
+            if pos:
+                pos.quantity, pos.avg_price = int(quantity), float(avg_price)
+            else:
+                self.positions[symbol] = _Position(quantity=int(quantity), avg_price=float(avg_price))
         
-        return weights
+        self._sync_arrays()
     
     def rebalance(self, target_weights: Dict[str, float], prices: Dict[str, float]):
         """
@@ -354,38 +495,57 @@ class Portfolio:
         """
         total_value = self.get_total_value(prices)
         
-        # 全部清仓
-        for symbol in list(self.positions.keys()):
-            pos = self.positions[symbol]
-            if symbol in prices:
-                self.sell(symbol, prices[symbol], pos['quantity'])
+        # 全部清仓 (有报价的持仓一次结算)
+        sold = [s for s in self._symbols if s in prices]
+        if sold:
+            sold_px = np.array([prices[s] for s in sold], dtype=np.float64)
+            sold_qty = np.array([self.positions[s].quantity for s in sold], dtype=np.float64)
+            self.cash += float(sold_qty @ sold_px)
+            for s in sold:
+                del self.positions[s]
+        
+        # 按目标权重计算整手数量
+        targets = [s for s in target_weights if s in prices]
+        px = np.array([prices[s] for s in targets], dtype=np.float64)
+        weights = np.array([target_weights[s] for s in targets], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            qty = np.floor(total_value * weights / px / 100) * 100
+        buy = qty > 0
+        cost = px * qty
+        
+        # 资金和持仓数都够时一次买入；否则按目标顺序逐只买入，余额不足或满仓的跳过
+        slots = self.max_positions - len(self.positions)
+        if (px[buy] > 0).all() and buy.sum() <= slots and cost[buy].sum() <= self.cash:
+            for s, p, q in zip(np.array(targets, dtype=object)[buy], px[buy], qty[buy]):
+                self.positions[s] = _Position(quantity=int(q), avg_price=float(p))
+            self.cash -= float(cost[buy].sum())
+        else:
+            for s, p, q, c in zip(targets, px, qty, cost):
+                if q <= 0 or c > self.cash or len(self.positions) >= self.max_positions or self.cash <= 0:
+                    continue
+                self.positions[s] = _Position(quantity=int(q), avg_price=float(p))
+                self.cash -= c
         
-        # 按目标权重买入
-        for symbol, weight in target_weights.items():
-            if symbol in prices:
-                amount = total_value * weight
-                quantity = int(amount / prices[symbol] / 100) * 100
-                if quantity > 0:
-                    self.buy(symbol, prices[symbol], quantity)
+        self._sync_arrays()
     
     def record(self, prices: Dict[str, float]):
         """记录当前状态"""
-        total_value = self.get_total_value(prices)
-        self.history.append({
-            'cash': self.cash,
-            'position_value': self.get_position_value(prices),
-            'total_value': total_value
-        })
+        position_value = self.mark_to_market(prices)[0]
+        
+        if self._hist_len == self._hist_cap:
+            self._hist_cap *= 2
+            for name in ('_hist_cash', '_hist_pos', '_hist_total'):
+                arr = np.empty(self._hist_cap, dtype=np.float64)
+                arr[:self._hist_len] = getattr(self, name)[:self._hist_len]
+                setattr(self, name, arr)
+        
+        k = self._hist_len
+        self._hist_cash[k] = self.cash
+        self._hist_pos[k] = position_value
+        self._hist_total[k] = self.cash + position_value
+        self._hist_len = k + 1
     
-    def get_returns(self) -> list:
+    def get_returns(self) -> np.ndarray:
         """获取收益率序列"""
-        if not self.history:
-            return []
-        
-        values = [h['total_value'] for h in self.history]
-        returns = []
-        for i in range(1, len(values)):
-            ret = (values[i] - values[i-1]) / values[i-1]
-            returns.append(ret)
-        
-        return returns
+        values = self._hist_total[:self._hist_len]
+        return np.diff(values) / values[:-1]
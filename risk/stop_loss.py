@@ -2,15 +2,17 @@
 风控模块 - 止损机制
 """
 
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Dict, Mapping
+from dataclasses import dataclass, replace
 from datetime import datetime
 
 
-@dataclass
+@dataclass(frozen=True)
 class StopLossRule:
-    """止损规则"""
+    """止损规则 (不可变, 修改通过 StopLossManager.set_enabled / add_rule 替换)"""
     name: str
     type: str  # 'fixed', 'trailing', 'atr'
     value: float  # 百分比或ATR倍数
@@ -21,12 +23,71 @@ class StopLossManager:
     """止损管理器"""
     
     def __init__(self):
-        self.rules = {}
+        self._rules: Dict[str, StopLossRule] = {}
         self.positions = {}  # symbol -> entry_info
+        self._compile_rules()
+    
+    @property
+    def rules(self) -> Mapping[str, StopLossRule]:
+        """当前规则 (只读视图, 增删改通过 add_rule / remove_rule / set_enabled)"""
+        return MappingProxyType(self._rules)
     
     def add_rule(self, rule: StopLossRule):
-        """添加止损规则"""
-        self.rules[rule.name] = rule
+        """添加止损规则 (同名规则被替换)"""
+        self._rules[rule.name] = rule
+        self._compile_rules()
+    
+    def remove_rule(self, name: str) -> bool:
+        """删除止损规则, 不存在时返回 False"""
+        if self._rules.pop(name, None) is None:
+            return False
+        self._compile_rules()
+        return True
+    
+    def set_enabled(self, name: str, enabled: bool = True) -> bool:
+        """启用/停用止损规则, 不存在时返回 False"""
+        rule = self._rules.get(name)
+        if rule is None:
+            return False
+        self._rules[name] = replace(rule, enabled=enabled)
+        self._compile_rules()
+        return True
+    
+    def _compile_rules(self):
+        """规则变化时把启用的规则阈值固化到检查函数中，检查时不再逐条查字典"""
+        def threshold(name):
+            rule = self._rules.get(name)
+            return rule.value if rule is not None and rule.enabled else None
+        
+        fixed_loss = threshold('fixed_loss')
+        fixed_profit = threshold('fixed_profit')
+        trailing = threshold('trailing')
+        atr_mult = threshold('atr')
+        self._thresholds = (fixed_loss, fixed_profit, trailing, atr_mult)
+        
+        def _check(entry_price, current_price, atr, high_price):
+            # 计算收益率
+            return_pct = (current_price - entry_price) / entry_price
+            
+            # 固定止损
+            if fixed_loss is not None and return_pct <= -fixed_loss:
+                return 'STOP_LOSS'
+            
+            # 止盈
+            if fixed_profit is not None and return_pct >= fixed_profit:
+                return 'TAKE_PROFIT'
+            
+            # 移动止损
+            if trailing is not None and high_price and current_price <= high_price * (1 - trailing):
+                return 'STOP_LOSS'
+            
+            # ATR止损
+            if atr_mult is not None and atr and current_price <= entry_price - atr * atr_mult:
+                return 'STOP_LOSS'
+            
+            return None
+        
+        self._check = _check
     
     def set_positions(self, positions: Dict):
         """设置持仓"""
@@ -49,35 +110,54 @@ class StopLossManager:
         if symbol not in self.positions:
             return None
         
-        position = self.positions[symbol]
+        return self._check(entry_price, current_price, atr, high_price)
+    
+    def check_stop_loss_batch(
+        self,
+        entry_price: np.ndarray,
+        current_price: np.ndarray,
+        high_price: np.ndarray = None,
+        atr: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        批量检查多只持仓是否触发止损，规则及优先级与 check_stop_loss 相同
         
-        # 计算收益率
-        return_pct = (current_price - entry_price) / entry_price
+        Args:
+            entry_price: 入场价格数组
+            current_price: 当前价格数组
+            high_price: 持仓期最高价数组 (0或NaN表示不检查移动止损)
+            atr: ATR数组 (0或NaN表示不检查ATR止损)
         
-        # 检查固定止损
-        if 'fixed_loss' in self.rules and self.rules['fixed_loss'].enabled:
-            if return_pct <= -self.rules['fixed_loss'].value:
-                return 'STOP_LOSS'
+        Returns:
+            int8数组: 0=不触发, 1=STOP_LOSS, 2=TAKE_PROFIT
+        """
+        entry_price = np.asarray(entry_price, dtype=np.float64)
+        current_price = np.asarray(current_price, dtype=np.float64)
+        fixed_loss, fixed_profit, trailing, atr_mult = self._thresholds
         
-        # 检查止盈
-        if 'fixed_profit' in self.rules and self.rules['fixed_profit'].enabled:
-            if return_pct >= self.rules['fixed_profit'].value:
-                return 'TAKE_PROFIT'
+        return_pct = (current_price - entry_price) / entry_price
         
-        # 检查移动止损
-        if 'trailing' in self.rules and self.rules['trailing'].enabled:
-            if high_price:
-                trailing_stop = high_price * (1 - self.rules['trailing'].value)
-                if current_price <= trailing_stop:
-                    return 'STOP_LOSS'
+        conds, codes = [], []
+        if fixed_loss is not None:
+            conds.append(return_pct <= -fixed_loss)
+            codes.append(1)
+        if fixed_profit is not None:
+            conds.append(return_pct >= fixed_profit)
+            codes.append(2)
+        if trailing is not None and high_price is not None:
+            high_price = np.asarray(high_price, dtype=np.float64)
+            conds.append((high_price != 0) & (current_price <= high_price * (1 - trailing)))
+            codes.append(1)
+        if atr_mult is not None and atr is not None:
+            atr = np.asarray(atr, dtype=np.float64)
+            conds.append((atr != 0) & (current_price <= entry_price - atr * atr_mult))
+            codes.append(1)
         
-        # 检查ATR止损
-        if 'atr' in self.rules and self.rules['atr'].enabled and atr:
-            atr_stop = entry_price - atr * self.rules['atr'].value
-            if current_price <= atr_stop:
-                return 'STOP_LOSS'
+        if not conds:
+            return np.zeros(len(entry_price), dtype=np.int8)
         
-        return None
+        # np.select 取第一个成立的条件，与逐条检查的先后顺序一致
+        return np.select(conds, codes, default=0).astype(np.int8)
     
     def calculate_position_size(
         self,
@@ -159,23 +239,36 @@ class RiskMonitor:
     
     def check_risk(self, current_equity: float) -> Dict[str, bool]:
         """检查风险状态"""
-        # 当前回撤
-        if self.peak_equity > 0:
-            current_drawdown = (self.peak_equity - current_equity) / self.peak_equity
+        # 当前回撤和当日亏损比例各算一次
+        peak = self.peak_equity
+        if peak > 0:
+            drawdown_exceeded = (peak - current_equity) / peak >= self.max_drawdown
+            daily_loss_exceeded = abs(self.today_pnl) / peak >= self.daily_loss_limit
         else:
-            current_drawdown = 0
+            drawdown_exceeded = 0 >= self.max_drawdown
+            daily_loss_exceeded = False
         
         return {
-            'drawdown_exceeded': current_drawdown >= self.max_drawdown,
-            'daily_loss_exceeded': abs(self.today_pnl) / self.peak_equity >= self.daily_loss_limit if self.peak_equity > 0 else False,
-            'should_stop': current_drawdown >= self.max_drawdown or 
-                          (abs(self.today_pnl) / self.peak_equity >= self.daily_loss_limit if self.peak_equity > 0 else False)
+            'drawdown_exceeded': drawdown_exceeded,
+            'daily_loss_exceeded': daily_loss_exceeded,
+            'should_stop': drawdown_exceeded or daily_loss_exceeded
         }
     
     def get_risk_report(self, positions: Dict, prices: Dict, capital: float) -> str:
         """生成风险报告"""
-        total_value = sum(pos['quantity'] * prices.get(pos['symbol'], 0) 
-                        for pos in positions.values())
+        # 一次取出数量/成本/现价，市值和盈亏用向量计算
+        symbols = list(positions)
+        qtys = np.fromiter((positions[s]['quantity'] for s in symbols),
+                           dtype=np.int64, count=len(symbols))
+        entry = np.fromiter((positions[s]['entry_price'] for s in symbols),
+                            dtype=np.float64, count=len(symbols))
+        curr = np.fromiter((prices.get(s, 0) for s in symbols),
+                           dtype=np.float64, count=len(symbols))
+        values = qtys * curr
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(entry != 0, (curr - entry) / entry * 100, 0.0)
+        
+        total_value = float(values.sum())
         position_ratio = total_value / capital if capital > 0 else 0
         
         current_drawdown = 0
@@ -193,10 +286,10 @@ class RiskMonitor:
 
 持仓明细:
 """
-        for symbol, pos in positions.items():
-            value = pos['quantity'] * prices.get(symbol, 0)
-            pnl_pct = (prices.get(symbol, 0) - pos['entry_price']) / pos['entry_price'] * 100
-            report += f"  {symbol}: {pos['quantity']}股, 成本:{pos['entry_price']:.2f}, 当前:{prices.get(symbol, 0):.2f}, 盈亏:{pnl_pct:+.1f}%\n"
+        report += "".join(
+            f"  {symbol}: {qty}股, 成本:{e:.2f}, 当前:{c:.2f}, 盈亏:{pnl:+.1f}%\n"
+            for symbol, qty, e, c, pnl in zip(symbols, qtys, entry, curr, pnl_pct)
+        )
         
         return report
 
@@ -257,3 +350,14 @@ if __name__ == "__main__":
     # 计算仓位
     size = manager.calculate_position_size(100000, 150, 0.05)
     print(f"建议买入: {size}股")
+    
+    # 风险报告 (持仓按字典键取代码, 成本为0时盈亏记为0%)
+    monitor = RiskMonitor()
+    monitor.update(115000)
+    report = monitor.get_risk_report(
+        {**manager.positions, 'NEW': {'entry_price': 0, 'quantity': 10}},
+        {'AAPL': 140, 'NEW': 5},
+        capital=100000
+    )
+    assert 'AAPL: 100股' in report and 'NEW: 10股' in report and '+0.0%' in report
+    print(report)
@@ -7,12 +7,22 @@
 import sys
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from data.fundamental import FundamentalData
 from data.fetcher import DataFetcher
+from utils._json import dumps as _dump
+
+
+# 筛选结果列，及条件中的简写 (如 pe_max -> pe_ratio 上限)
+SCREEN_COLUMNS = ['symbol', 'pe_ratio', 'pb_ratio', 'roe', 'net_margin']
+CRITERIA_ALIASES = {'pe': 'pe_ratio', 'pb': 'pb_ratio'}
 
 
 class FundamentalAnalysis:
@@ -37,9 +47,9 @@ class FundamentalAnalysis:
         """
         try:
             data = self.fd.get_financial_statement(symbol)
-            return json.dumps(data, ensure_ascii=False, indent=2)
+            return _dump(data)
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def get_valuation(self, symbol: str, price: float = None) -> str:
         """
@@ -62,55 +72,74 @@ class FundamentalAnalysis:
                     price = 0
             
             valuation = self.fd.calculate_valuation(symbol, price)
-            return json.dumps(valuation, ensure_ascii=False, indent=2)
+            return _dump(valuation)
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def get_financial_ratios(self, symbol: str) -> str:
         """获取财务比率"""
         try:
             ratios = self.fd.get_financial_ratios(symbol)
-            return json.dumps(ratios, ensure_ascii=False, indent=2)
+            return _dump(ratios)
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
+    
+    def _one_row(self, symbol: str):
+        """单只股票的筛选结果行，获取失败返回 None"""
+        try:
+            valuation = self.fd.calculate_valuation(symbol, 10)
+            ratios = self.fd.get_financial_ratios(symbol)
+            
+            return {
+                'symbol': symbol,
+                'pe_ratio': valuation.get('pe_ratio', 0),
+                'pb_ratio': valuation.get('pb_ratio', 0),
+                'roe': ratios['profitability']['roe'],
+                'net_margin': ratios['profitability']['net_margin'],
+            }
+        except Exception:
+            return None
     
-    def screen_stocks(self, criteria: dict) -> str:
+    def screen_stocks(self, criteria: dict, symbols: list) -> str:
         """
         选股筛选
         
         Args:
-            criteria: 筛选条件
+            criteria: 筛选条件，形如 {'pe_max': 20, 'roe_min': 0.15}
+            symbols: 候选股票代码列表
         
         Returns:
             JSON格式结果
         """
         try:
-            stocks = self.fd.screening(criteria)
+            if not symbols:
+                raise ValueError("需要提供候选股票代码 symbols")
             
-            # 获取每只股票的基本面
-            results = []
-            for symbol in stocks:
-                try:
-                    valuation = self.fd.calculate_valuation(symbol, 10)
-                    ratios = self.fd.get_financial_ratios(symbol)
-                    
-                    results.append({
-                        'symbol': symbol,
-                        'pe_ratio': valuation.get('pe_ratio', 0),
-                        'pb_ratio': valuation.get('pb_ratio', 0),
-                        'roe': ratios['profitability']['roe'],
-                        'net_margin': ratios['profitability']['net_margin'],
-                    })
-                except:
+            # 获取每只股票的基本面 (网络请求为主，多线程并发，结果保持原顺序)
+            with ThreadPoolExecutor(max_workers=16) as ex:
+                rows = list(ex.map(self._one_row, symbols))
+            df = pd.DataFrame([row for row in rows if row is not None], columns=SCREEN_COLUMNS)
+            if df.empty:
+                raise ValueError(f"未获取到任何股票的基本面数据: {symbols}")
+            
+            # 条件整列比较，一次得到筛选掩码
+            mask = np.ones(len(df), dtype=bool)
+            for key, value in criteria.items():
+                base, _, bound = key.rpartition('_')
+                col = CRITERIA_ALIASES.get(base, base)
+                if bound not in ('min', 'max') or col not in df.columns or col == 'symbol':
                     continue
+                values = df[col].to_numpy(dtype=np.float64)
+                mask &= values >= value if bound == 'min' else values <= value
+            results = df[mask].to_dict(orient='records')
             
-            return json.dumps({
+            return _dump({
                 "criteria": criteria,
                 "results": results,
                 "count": len(results)
-            }, ensure_ascii=False, indent=2)
+            })
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def compare_stocks(self, symbols: list) -> str:
         """对比多只股票"""
@@ -119,9 +148,8 @@ class FundamentalAnalysis:
             
             for symbol in symbols:
                 try:
-                    valuation = self.fd.calculate_valuation(symbol, 10)
-                    ratios = self.fd.get_financial_ratios(symbol)
-                    growth = self.fd.get_growth_metrics(symbol)
+                    snap = self.fd.snapshot(symbol, 10)
+                    valuation, ratios, growth = snap['valuation'], snap['ratios'], snap['growth']
                     
                     results.append({
                         'symbol': symbol,
@@ -144,9 +172,9 @@ class FundamentalAnalysis:
                 }
             }
             
-            return json.dumps(comparison, ensure_ascii=False, indent=2)
+            return _dump(comparison)
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def comprehensive_analysis(self, symbol: str) -> str:
         """综合基本面分析"""
@@ -155,12 +183,11 @@ class FundamentalAnalysis:
             df = self.fetcher.download(symbol, period="1d")
             price = df['Close'].iloc[-1] if df is not None and len(df) > 0 else 0
             
-            # 获取各项数据
-            financial = self.fd.get_financial_statement(symbol)
-            valuation = self.fd.calculate_valuation(symbol, price)
-            ratios = self.fd.get_financial_ratios(symbol)
-            dividend = self.fd.get_dividend_info(symbol)
-            growth = self.fd.get_growth_metrics(symbol)
+            # 获取各项数据 (财务报表只取一次)
+            snap = self.fd.snapshot(symbol, price)
+            financial, valuation, ratios, dividend, growth = (
+                snap['statement'], snap['valuation'], snap['ratios'],
+                snap['dividend'], snap['growth'])
             
             # 综合评分
             score = 0
@@ -190,9 +217,9 @@ class FundamentalAnalysis:
                 'rating': 'A' if score >= 80 else 'B' if score >= 60 else 'C' if score >= 40 else 'D'
             }
             
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            return _dump(result)
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
 
 
 def main():
@@ -218,8 +245,10 @@ def main():
     elif args.command == "ratios":
         print(fa.get_financial_ratios(args.symbol))
     elif args.command == "screen":
+        if not args.symbols:
+            parser.error("screen 需要 --symbols 指定候选股票")
         criteria = json.loads(args.criteria) if args.criteria else {}
-        print(fa.screen_stocks(criteria))
+        print(fa.screen_stocks(criteria, args.symbols.split(',')))
     elif args.command == "compare":
         symbols = args.symbols.split(',') if args.symbols else []
         print(fa.compare_stocks(symbols))
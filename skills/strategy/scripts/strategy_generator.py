@@ -4,17 +4,26 @@
 自动生成量化交易策略代码
 """
 
+import os
 import sys
 import json
 import argparse
+from collections import defaultdict
+from string import Template
+from functools import lru_cache
+from typing import Dict
 from pathlib import Path
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from data.fetcher import DataFetcher
 from backtest.engine import BacktestEngine
 from strategies.signals import generate_signals, SignalType
+from utils._json import dumps as _dump
 
 
 class StrategyGenerator:
@@ -23,7 +32,7 @@ class StrategyGenerator:
     TEMPLATES = {
         'MA_CROSSOVER': '''
 """
-{strategy_name} - 均线交叉策略
+${strategy_name} - 均线交叉策略
 自动生成
 """
 
@@ -31,43 +40,43 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from strategies._ta_kernels import sma_running
+
 
-class {class_name}:
+class ${class_name}:
     """均线交叉策略"""
     
-    def __init__(self, fast_period: int = {fast}, slow_period: int = {slow}):
+    def __init__(self, fast_period: int = ${fast}, slow_period: int = ${slow}):
         self.fast_period = fast_period
         self.slow_period = slow_period
-        self.name = "{strategy_name}"
+        self.name = "${strategy_name}"
     
     def generate_signals(self, data: pd.DataFrame) -> pd.Series:
         """生成交易信号"""
         close = data['close']
         
-        fast_ma = close.rolling(window=self.fast_period).mean()
-        slow_ma = close.rolling(window=self.slow_period).mean()
+        price = close.to_numpy(dtype=np.float64)
+        fast_ma = sma_running(price, self.fast_period)
+        slow_ma = sma_running(price, self.slow_period)
         
-        # 信号
-        signal = pd.Series(0, index=data.index)
-        signal[fast_ma > slow_ma] = 1   # 买入
-        signal[fast_ma <= slow_ma] = -1 # 卖出
+        # 快线在上为1，在下为-1，均线未形成为0
+        state = np.where(fast_ma > slow_ma, 1, np.where(fast_ma <= slow_ma, -1, 0)).astype(np.int8)
         
         # 只在交叉时产生信号
-        signal = signal.diff()
-        signal[signal >= 0] = 0
-        signal[signal < 0] = -1
+        cross = np.diff(state, prepend=state[:1])
+        signal = np.where(cross < 0, -1, 0).astype(np.int8)
         
-        return signal
+        return pd.Series(signal, index=data.index)
     
     def get_params(self) -> Dict:
-        return {{
+        return {
             'fast_period': self.fast_period,
             'slow_period': self.slow_period
-        }}
+        }
 ''',
         'RSI_STRATEGY': '''
 """
-{strategy_name} - RSI均值回归策略
+${strategy_name} - RSI均值回归策略
 自动生成
 """
 
@@ -75,44 +84,44 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from strategies._ta_kernels import sma_running
 
-class {class_name}:
+
+class ${class_name}:
     """RSI均值回归策略"""
     
-    def __init__(self, period: int = {period}, oversold: int = {oversold}, overbought: int = {overbought}):
+    def __init__(self, period: int = ${period}, oversold: int = ${oversold}, overbought: int = ${overbought}):
         self.period = period
         self.oversold = oversold
         self.overbought = overbought
-        self.name = "{strategy_name}"
+        self.name = "${strategy_name}"
     
     def generate_signals(self, data: pd.DataFrame) -> pd.Series:
         """生成交易信号"""
         close = data['close']
         
         # 计算RSI
-        delta = close.diff()
-        gain = delta.where(delta > 0, 0).rolling(window=self.period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        delta = np.diff(close.to_numpy(dtype=np.float64), prepend=np.nan)
+        gain = sma_running(np.where(delta > 0, delta, 0.0), self.period)
+        loss = sma_running(np.where(delta < 0, -delta, 0.0), self.period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
         
-        # 信号
-        signal = pd.Series(0, index=data.index)
-        signal[rsi < self.oversold] = 1   # 超卖买入
-        signal[rsi > self.overbought] = -1 # 超买卖出
+        # 信号: 超卖买入, 超买卖出
+        signal = np.select([rsi > self.overbought, rsi < self.oversold], [-1, 1], 0).astype(np.int8)
         
-        return signal
+        return pd.Series(signal, index=data.index)
     
     def get_params(self) -> Dict:
-        return {{
+        return {
             'period': self.period,
             'oversold': self.oversold,
             'overbought': self.overbought
-        }}
+        }
 ''',
         'MACD_TREND': '''
 """
-{strategy_name} - MACD趋势策略
+${strategy_name} - MACD趋势策略
 自动生成
 """
 
@@ -120,44 +129,43 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from strategies._ta_kernels import macd_histogram
+
 
-class {class_name}:
+class ${class_name}:
     """MACD趋势策略"""
     
-    def __init__(self, fast: int = {fast}, slow: int = {slow}, signal: int = {signal}):
+    def __init__(self, fast: int = ${macd_fast}, slow: int = ${macd_slow}, signal: int = ${signal}):
         self.fast = fast
         self.slow = slow
         self.signal = signal
-        self.name = "{strategy_name}"
+        self.name = "${strategy_name}"
     
     def generate_signals(self, data: pd.DataFrame) -> pd.Series:
         """生成交易信号"""
-        close = data['close']
+        price = data['close'].to_numpy(dtype=np.float64)
         
-        # 计算MACD
-        ema_fast = close.ewm(span=self.fast, adjust=False).mean()
-        ema_slow = close.ewm(span=self.slow, adjust=False).mean()
-        macd = ema_fast - ema_slow
-        signal_line = macd.ewm(span=self.signal, adjust=False).mean()
+        # 计算MACD柱 (快线/慢线/信号线单次遍历)
+        histogram = macd_histogram(price, self.fast, self.slow, self.signal)
         
         # 金叉死叉
-        histogram = macd - signal_line
-        signal = pd.Series(0, index=data.index)
-        signal[(histogram > 0) & (histogram.shift(1) <= 0)] = 1  # 金叉
-        signal[(histogram < 0) & (histogram.shift(1) >= 0)] = -1 # 死叉
+        prev = np.concatenate(([np.nan], histogram[:-1]))
+        golden = (histogram > 0) & (prev <= 0)
+        dead = (histogram < 0) & (prev >= 0)
+        signal = np.select([dead, golden], [-1, 1], 0).astype(np.int8)
         
-        return signal
+        return pd.Series(signal, index=data.index)
     
     def get_params(self) -> Dict:
-        return {{
+        return {
             'fast': self.fast,
             'slow': self.slow,
             'signal': self.signal
-        }}
+        }
 ''',
         'BOLL_BREAKOUT': '''
 """
-{strategy_name} - 布林带突破策略
+${strategy_name} - 布林带突破策略
 自动生成
 """
 
@@ -165,87 +173,120 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from strategies._ta_kernels import sma_running, std_running
 
-class {class_name}:
+
+class ${class_name}:
     """布林带突破策略"""
     
-    def __init__(self, period: int = {period}, std_dev: float = {std_dev}):
+    def __init__(self, period: int = ${period}, std_dev: float = ${std_dev}):
         self.period = period
         self.std_dev = std_dev
-        self.name = "{strategy_name}"
+        self.name = "${strategy_name}"
     
     def generate_signals(self, data: pd.DataFrame) -> pd.Series:
         """生成交易信号"""
-        close = data['close']
+        price = data['close'].to_numpy(dtype=np.float64)
         
-        # 计算布林带
-        ma = close.rolling(window=self.period).mean()
-        std = close.rolling(window=self.period).std()
+        # 计算布林带 (滚动均值/标准差单次遍历)
+        ma = sma_running(price, self.period)
+        std = std_running(price, self.period)
         upper = ma + self.std_dev * std
         lower = ma - self.std_dev * std
         
-        # 信号
-        signal = pd.Series(0, index=data.index)
-        signal[close > upper] = 1   # 突破上轨买入
-        signal[close < lower] = -1 # 跌破下轨卖出
+        # 信号: 突破上轨买入, 跌破下轨卖出
+        signal = np.select([price < lower, price > upper], [-1, 1], 0).astype(np.int8)
         
-        return signal
+        return pd.Series(signal, index=data.index)
     
     def get_params(self) -> Dict:
-        return {{
+        return {
             'period': self.period,
             'std_dev': self.std_dev
-        }}
+        }
 ''',
     }
     
+    # 模板在类加载时预编译为 string.Template，渲染时不再逐次解析
+    _COMPILED = {name: Template(code) for name, code in TEMPLATES.items()}
+    
     def __init__(self):
         self.fetcher = DataFetcher()
         self.output_dir = Path(__file__).parent.parent.parent / "strategies" / "generated"
         self.output_dir.mkdir(exist_ok=True, parents=True)
+        # 输出路径前缀，批量生成时直接拼接字符串
+        self._out_prefix = str(self.output_dir) + os.sep
+    
+    @staticmethod
+    def _template_items(template: str, strategy_name: str = None, params: Dict = None):
+        """模板参数 -> (类名, 排序后的参数元组)，元组可直接作为渲染/编译缓存的键"""
+        params = params or {}
+        
+        # 生成类名
+        class_name = (strategy_name or template).upper().replace('-', '_') + 'Strategy'
+        
+        # 填充参数
+        values = {
+            'strategy_name': strategy_name or template,
+            'class_name': class_name,
+            'fast': params.get('fast_period', 5),
+            'slow': params.get('slow_period', 20),
+            'period': params.get('period', 14),
+            'oversold': params.get('oversold', 30),
+            'overbought': params.get('overbought', 70),
+            'macd_fast': params.get('fast', 12),
+            'macd_slow': params.get('slow', 26),
+            'signal': params.get('signal', 9),
+            'std_dev': params.get('std_dev', 2.0),
+        }
+        return class_name, tuple(sorted(values.items()))
+    
+    def build_strategy(self, template: str, strategy_name: str = None,
+                       params: Dict = None) -> type:
+        """
+        直接在内存中生成策略类，不写文件、不经过模块导入
+        
+        Args:
+            template: 模板名称
+            strategy_name: 策略名称
+            params: 模板参数
+        
+        Returns:
+            策略类
+        """
+        if template not in self.TEMPLATES:
+            raise ValueError(f"未知模板: {template}")
+        
+        class_name, items = self._template_items(template, strategy_name, params)
+        namespace = {}
+        exec(_compile(template, items), namespace)
+        return namespace[class_name]
     
     def generate_strategy(self, template: str, strategy_name: str = None, 
                          params: Dict = None) -> str:
         """生成策略代码"""
         if template not in self.TEMPLATES:
-            return json.dumps({
+            return _dump({
                 "error": f"未知模板: {template}",
                 "available_templates": list(self.TEMPLATES.keys())
-            }, ensure_ascii=False)
+            }, indent=False)
         
-        params = params or {}
-        
-        # 生成类名
-        class_name = (strategy_name or template).upper().replace('-', '_') + 'Strategy'
-        
-        # 填充参数
-        template_code = self.TEMPLATES[template].format(
-            strategy_name=strategy_name or template,
-            class_name=class_name,
-            fast=params.get('fast_period', 5),
-            slow=params.get('slow_period', 20),
-            period=params.get('period', 14),
-            oversold=params.get('oversold', 30),
-            overbought=params.get('overbought', 70),
-            fast=params.get('fast', 12),
-            slow=params.get('slow', 26),
-            signal=params.get('signal', 9),
-            std_dev=params.get('std_dev', 2.0)
-        )
+        class_name, items = self._template_items(template, strategy_name, params)
+        template_code = _render(template, items)
         
         # 保存文件
-        filename = f"{class_name.lower()}.py"
-        filepath = self.output_dir / filename
-        filepath.write_text(template_code)
+        filepath = self._out_prefix + f"{class_name.lower()}.py"
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(template_code)
         
-        return json.dumps({
+        return _dump({
             "success": True,
             "strategy_name": strategy_name or template,
             "class_name": class_name,
-            "file": str(filepath),
-            "params": params,
+            "file": filepath,
+            "params": params or {},
             "code": template_code
-        }, ensure_ascii=False, indent=2)
+        })
     
     def backtest_strategy(self, symbol: str, template: str, 
                           start_date: str = None, end_date: str = None,
@@ -255,7 +296,7 @@ class {class_name}:
             # 获取数据
             df = self.fetcher.download(symbol, start=start_date, end=end_date)
             if df.empty:
-                return json.dumps({"error": f"无法获取 {symbol} 数据"}, ensure_ascii=False)
+                return _dump({"error": f"无法获取 {symbol} 数据"}, indent=False)
             
             # 生成信号
             strategy_params = params or {}
@@ -264,29 +305,35 @@ class {class_name}:
             # 回测
             engine = BacktestEngine(initial_capital=100000)
             
-            # 执行回测
-            for i in range(len(df)):
-                date = df.index[i]
-                price = df['Close'].iloc[i]
-                sig = signal.iloc[i] if i < len(signal) else 0
-                
-                if sig == 1:  # 买入
-                    engine.buy(date, symbol, price, amount=10000)
-                elif sig == -1:  # 卖出
-                    if symbol in engine.positions:
-                        qty = engine.positions[symbol].quantity
-                        engine.sell(date, symbol, price, quantity=qty)
-                
-                # 更新权益
-                equity = engine.cash
-                for pos in engine.positions.values():
-                    equity += pos.quantity * price
-                engine.equity_history.append(equity)
-                engine.dates.append(date)
+            # 执行回测: 只在有信号的bar上成交，其余bar现金和持仓不变
+            close = df['Close'].to_numpy(dtype=np.float64)
+            sig = _align_signal(signal, df.index)
+            events = np.flatnonzero((sig == 1) | (sig == -1))
+            
+            # 第0项为初始状态，第k+1项为第k次信号处理后的状态
+            cash_at = np.empty(len(events) + 1, dtype=np.float64)
+            qty_at = np.empty(len(events) + 1, dtype=np.float64)
+            cash_at[0], qty_at[0] = engine.cash, 0
+            for k, i in enumerate(events, start=1):
+                if sig[i] == 1:  # 买入
+                    engine.buy(df.index[i], symbol, close[i], amount=10000)
+                elif symbol in engine.positions:  # 卖出
+                    qty = engine.positions[symbol].quantity
+                    engine.sell(df.index[i], symbol, close[i], quantity=qty)
+                cash_at[k] = engine.cash
+                pos = engine.positions.get(symbol)
+                qty_at[k] = pos.quantity if pos else 0
+            
+            # 每个bar取最近一次成交后的现金和持仓，整列计算权益
+            state = np.searchsorted(events, np.arange(len(df)), side='right')
+            equity = cash_at[state] + qty_at[state] * close
+            # 引擎的权益/日期记录约定为列表
+            engine.equity_history = equity.tolist()
+            engine.dates = df.index.tolist()
             
             # 计算结果
             initial = 100000
-            final = engine.equity_history[-1] if engine.equity_history else initial
+            final = float(equity[-1]) if len(equity) else initial
             total_return = (final - initial) / initial * 100
             
             result = {
@@ -298,37 +345,89 @@ class {class_name}:
                     "final_capital": round(final, 2),
                     "total_return_pct": round(total_return, 2),
                     "total_trades": len(engine.trades),
-                    "winning_trades": sum(1 for t in engine.trades if t.action == 'SELL' and 
-                                         t.price > next((x for x in engine.trades if x.symbol == t.symbol and x.action == 'BUY'), None))
+                    "winning_trades": _count_winning_trades(engine.trades)
                 }
             }
             
-            return json.dumps(result, ensure_ascii=False, indent=2)
-            
+            return _dump(result)
+        
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def list_templates(self) -> str:
-        """列出所有模板"""
-        templates = []
-        for name, code in self.TEMPLATES.items():
-            # 提取策略描述
-            desc = ""
-            if "MA_CROSSOVER" in name:
-                desc = "均线交叉策略，快线突破慢线买入"
-            elif "RSI" in name:
-                desc = "RSI均值回归，低于30买入高于70卖出"
-            elif "MACD" in name:
-                desc = "MACD金叉死叉策略"
-            elif "BOLL" in name:
-                desc = "布林带突破策略"
-            
-            templates.append({
-                "name": name,
-                "description": desc
-            })
-        
-        return json.dumps({"templates": templates}, ensure_ascii=False, indent=2)
+        """列出所有模板 (内容固定，模块加载时已生成)"""
+        return _LIST_TEMPLATES_JSON
+
+
+def _align_signal(signal: pd.Series, index: pd.Index) -> np.ndarray:
+    """
+    信号对齐到K线，返回与 index 等长的数组 (无信号处为0)
+    
+    信号与K线同索引 (或非时间索引) 时按位置对应；信号在更粗的时间网格上时，
+    每个信号落在时间不早于它的第一根K线上
+    """
+    sig = np.zeros(len(index), dtype=np.float64)
+    values = signal.to_numpy(dtype=np.float64)
+    
+    if (signal.index.equals(index) or not isinstance(index, pd.DatetimeIndex)
+            or not isinstance(signal.index, pd.DatetimeIndex)):
+        n = min(len(index), len(values))
+        sig[:n] = values[:n]
+        return sig
+    
+    pos = index.searchsorted(signal.index, side='left')
+    inside = pos < len(index)
+    sig[pos[inside]] = values[inside]
+    return sig
+
+
+def _count_winning_trades(trades: list) -> int:
+    """
+    统计盈利的卖出笔数
+    
+    每笔卖出与同一代码自上次卖出以来的买入配对，卖价高于这些买入的加权均价即为盈利。
+    按代码累计未平仓的买入金额和数量，单次遍历完成配对
+    """
+    amount = defaultdict(float)
+    quantity = defaultdict(float)
+    wins = 0
+    for t in trades:
+        if t.action == 'SELL':
+            qty = quantity.pop(t.symbol, 0.0)
+            cost = amount.pop(t.symbol, 0.0)
+            if qty and t.price > cost / qty:
+                wins += 1
+        else:
+            amount[t.symbol] += t.price * t.quantity
+            quantity[t.symbol] += t.quantity
+    return wins
+
+
+# 模板描述
+_DESCRIPTIONS = {
+    'MA_CROSSOVER': "均线交叉策略，快线突破慢线买入",
+    'RSI_STRATEGY': "RSI均值回归，低于30买入高于70卖出",
+    'MACD_TREND': "MACD金叉死叉策略",
+    'BOLL_BREAKOUT': "布林带突破策略",
+}
+
+_LIST_TEMPLATES_JSON = _dump({
+    "templates": [{"name": name, "description": _DESCRIPTIONS.get(name, "")}
+                  for name in StrategyGenerator.TEMPLATES]
+})
+
+
+@lru_cache(maxsize=512)
+def _render(template: str, items: tuple) -> str:
+    """按 (模板名, 参数) 渲染策略代码，参数扫描时重复组合直接命中缓存"""
+    return StrategyGenerator._COMPILED[template].substitute(dict(items))
+
+
+@lru_cache(maxsize=512)
+def _compile(template: str, items: tuple):
+    """渲染并编译为代码对象，相同 (模板名, 参数) 只编译一次"""
+    class_name = dict(items)['class_name']
+    return compile(_render(template, items), f"<{class_name}>", "exec")
 
 
 def main():
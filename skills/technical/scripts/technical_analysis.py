@@ -5,9 +5,14 @@
 """
 
 import sys
-import json
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
 
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -15,6 +20,77 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from data.fetcher import DataFetcher
 from data.factors.technical import TechnicalFactors
 from strategies.signals import SignalGenerator, SignalType
+from utils._json import dumps as _dump
+
+
+# 技术分析使用的行情列
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 行情缓存: 有效期(秒) 与最大条目数
+CACHE_TTL = 300
+CACHE_SIZE = 256
+
+
+def _ensure_column_major(df: pd.DataFrame) -> pd.DataFrame:
+    """每列重建为独立的连续数组，按列读取 (滚动/EMA) 时顺序访问内存"""
+    return pd.DataFrame({c: np.ascontiguousarray(df[c].to_numpy()) for c in df.columns},
+                        index=df.index)
+
+
+def _tail_indicators(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                     period: int) -> dict:
+    """
+    只用序列末端计算各指标的最新值，不生成整列 Series
+    
+    口径与 TechnicalFactors 相同 (RSI/ATR 为简单均值，BOLL 为样本标准差)
+    
+    Args:
+        close, high, low: float64 价格数组
+        period: RSI/ATR 周期
+    
+    Returns:
+        指标名 -> 最新值
+    """
+    nan = float('nan')
+    sma_tail = TechnicalFactors.sma_tail
+    out = {f"MA{n}": sma_tail(close, n) for n in (5, 10, 20, 60)}
+    
+    # RSI: 末端 period 个涨跌幅的平均涨幅/平均跌幅 (首个差分按0计，同 pandas)
+    seg = close[-(period + 1):]
+    delta = np.diff(seg, prepend=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = sma_tail(np.where(delta > 0, delta, 0.0), period)
+        loss = sma_tail(np.where(delta < 0, -delta, 0.0), period)
+        out['RSI'] = float(100 - 100 / (1 + np.float64(gain) / loss))
+    
+    # 布林带 (20日)
+    if len(close) >= 20:
+        middle = float(close[-20:].mean())
+        std = float(close[-20:].std(ddof=1))
+        out['BOLL'] = (middle + 2 * std, middle, middle - 2 * std)
+    else:
+        out['BOLL'] = (nan, nan, nan)
+    
+    # ATR: 真实波幅取三者最大 (忽略缺失的前收盘)
+    h, l, c = high[-(period + 1):], low[-(period + 1):], close[-(period + 1):]
+    prev = np.concatenate(([np.nan], c[:-1]))
+    tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))
+    out['ATR'] = sma_tail(tr, period)
+    
+    # KDJ: 最近3个K值只需要末端 14+2 根K线的最高/最低
+    k_period, d_period = 14, 3
+    n = min(len(close), k_period + d_period - 1)
+    if n >= k_period:
+        lows = np.lib.stride_tricks.sliding_window_view(low[-n:], k_period).min(axis=1)
+        highs = np.lib.stride_tricks.sliding_window_view(high[-n:], k_period).max(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = 100 * (close[-len(lows):] - lows) / (highs - lows)
+        out['K'] = float(k[-1])
+        out['D'] = float(k.mean()) if len(k) == d_period else nan
+    else:
+        out['K'] = out['D'] = nan
+    
+    return out
 
 
 class TechnicalAnalysis:
@@ -23,16 +99,18 @@ class TechnicalAnalysis:
     def __init__(self):
         self.fetcher = DataFetcher()
         self.factors = TechnicalFactors()
+        # (symbol, period) -> (过期时间, 整理后的行情)
+        self._cache = {}
     
     def get_data(self, symbol: str, period: str = "3mo") -> str:
         """获取股票数据"""
         try:
             df = self.fetcher.download(symbol, period=period)
             if df.empty:
-                return json.dumps({"error": f"无法获取 {symbol} 的数据"}, ensure_ascii=False)
+                return _dump({"error": f"无法获取 {symbol} 的数据"}, indent=False)
             return df.to_json(orient='records')
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
     
     def calculate_indicators(self, symbol: str, indicators: str = "RSI,MACD,BOLL", 
                              period: int = 14) -> str:
@@ -47,97 +125,7 @@ class TechnicalAnalysis:
         Returns:
             JSON格式的指标数据
         """
-        try:
-            # 获取数据
-            df = self.fetcher.download(symbol, period="6mo")
-            if df.empty:
-                return json.dumps({"error": f"无法获取 {symbol} 的数据"}, ensure_ascii=False)
-            
-            close = df['Close']
-            high = df['High']
-            low = df['Low']
-            volume = df['Volume']
-            
-            result = {
-                "symbol": symbol,
-                "last_price": float(close.iloc[-1]),
-                "indicators": {}
-            }
-            
-            # 计算各指标
-            ind_list = [i.strip().upper() for i in indicators.split(',')]
-            
-            if 'MA' in ind_list or 'SMA' in ind_list:
-                result['indicators']['MA'] = {
-                    "MA5": float(self.factors.sma(close, 5).iloc[-1]),
-                    "MA10": float(self.factors.sma(close, 10).iloc[-1]),
-                    "MA20": float(self.factors.sma(close, 20).iloc[-1]),
-                    "MA60": float(self.factors.sma(close, 60).iloc[-1]),
-                }
-            
-            if 'EMA' in ind_list:
-                result['indicators']['EMA'] = {
-                    "EMA12": float(self.factors.ema(close, 12).iloc[-1]),
-                    "EMA26": float(self.factors.ema(close, 26).iloc[-1]),
-                }
-            
-            if 'RSI' in ind_list:
-                rsi = self.factors.rsi(close, period)
-                result['indicators']['RSI'] = {
-                    "value": float(rsi.iloc[-1]),
-                    "period": period,
-                    "signal": "超买" if rsi.iloc[-1] > 70 else "超卖" if rsi.iloc[-1] < 30 else "中性"
-                }
-            
-            if 'MACD' in ind_list:
-                macd_df = self.factors.macd(close)
-                result['indicators']['MACD'] = {
-                    "macd": float(macd_df['macd'].iloc[-1]),
-                    "signal": float(macd_df['signal'].iloc[-1]),
-                    "histogram": float(macd_df['histogram'].iloc[-1]),
-                    "crossover": "金叉" if macd_df['histogram'].iloc[-1] > 0 and macd_df['histogram'].iloc[-2] <= 0 
-                                 else "死叉" if macd_df['histogram'].iloc[-1] < 0 and macd_df['histogram'].iloc[-2] >= 0 
-                                 else "中性"
-                }
-            
-            if 'BOLL' in ind_list:
-                boll = self.factors.bollinger_bands(close, period=20)
-                result['indicators']['BOLL'] = {
-                    "upper": float(boll['upper'].iloc[-1]),
-                    "middle": float(boll['middle'].iloc[-1]),
-                    "lower": float(boll['lower'].iloc[-1]),
-                    "position": "上轨" if close.iloc[-1] > boll['upper'].iloc[-1] 
-                               else "下轨" if close.iloc[-1] < boll['lower'].iloc[-1] 
-                               else "中轨"
-                }
-            
-            if 'ATR' in ind_list:
-                atr = self.factors.atr(high, low, close, period)
-                result['indicators']['ATR'] = {
-                    "value": float(atr.iloc[-1]),
-                    "period": period
-                }
-            
-            if 'KDJ' in ind_list:
-                kdj = self.factors.stochastic(high, low, close)
-                result['indicators']['KDJ'] = {
-                    "K": float(kdj['k'].iloc[-1]),
-                    "D": float(kdj['d'].iloc[-1]),
-                    "J": float(3 * kdj['k'].iloc[-1] - 2 * kdj['d'].iloc[-1]),
-                    "signal": "超买" if kdj['k'].iloc[-1] > 80 else "超卖" if kdj['k'].iloc[-1] < 20 else "中性"
-                }
-            
-            if 'ADX' in ind_list:
-                adx = self.factors.adx(high, low, close, period)
-                result['indicators']['ADX'] = {
-                    "value": float(adx.iloc[-1]),
-                    "trend_strength": "强" if adx.iloc[-1] > 25 else "弱"
-                }
-            
-            return json.dumps(result, ensure_ascii=False, indent=2)
-            
-        except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+        return self._run(symbol, self._calculate_indicators, indicators, period)
     
     def generate_signals(self, symbol: str, strategy: str = "combined") -> str:
         """
@@ -150,147 +138,310 @@ class TechnicalAnalysis:
         Returns:
             JSON格式的信号数据
         """
+        return self._run(symbol, self._generate_signals, strategy)
+    
+    def analyze_trend(self, symbol: str) -> str:
+        """分析趋势"""
+        return self._run(symbol, self._analyze_trend)
+    
+    def _load_ohlcv(self, symbol: str, period: str = "6mo") -> pd.DataFrame:
+        """
+        下载并只保留分析用到的 OHLCV 列，结果按 (symbol, period) 缓存 CACHE_TTL 秒
+        
+        价格保持 float64 (指标内核按 float64 计算，输出价格需与行情一致)；
+        成交量按取值范围下转为更窄的整数类型
+        """
+        key = (symbol, period)
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1].copy(deep=False)
+        
+        df = self.fetcher.download(symbol, period=period)
+        if df is None or df.empty:
+            return df
+        df = _ensure_column_major(df[[c for c in OHLCV_COLUMNS if c in df.columns]])
+        if 'Volume' in df.columns:
+            df['Volume'] = pd.to_numeric(df['Volume'], downcast='integer')
+        
+        # 超出容量时淘汰最早写入的条目
+        self._cache.pop(key, None)
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)), None)
+        self._cache[key] = (now + CACHE_TTL, df)
+        return df.copy(deep=False)
+    
+    def _run(self, symbol: str, analyze, *args) -> str:
+        """获取近6个月数据并执行一项分析，结果或错误序列化为JSON"""
         try:
-            df = self.fetcher.download(symbol, period="6mo")
-            if df.empty:
-                return json.dumps({"error": f"无法获取 {symbol} 的数据"}, ensure_ascii=False)
-            
-            generator = SignalGenerator(df)
-            
-            # 各策略信号
-            signals = {}
-            
-            # 均线交叉
-            ma_signal = generator.ma_crossover_signal(5, 20)
-            signals['MA_CROSSOVER'] = {
-                "signal": self._signal_to_str(ma_signal.iloc[-1]),
-                "value": int(ma_signal.iloc[-1])
+            df = self._load_ohlcv(symbol)
+            if df is None or df.empty:
+                return _dump({"error": f"无法获取 {symbol} 的数据"}, indent=False)
+            return _dump(analyze(symbol, df, *args))
+        except Exception as e:
+            return _dump({"error": str(e)}, indent=False)
+    
+    def _calculate_indicators(self, symbol: str, df: pd.DataFrame,
+                              indicators: str = "RSI,MACD,BOLL", period: int = 14) -> dict:
+        """计算技术指标 (基于已获取的数据)"""
+        close = df['Close']
+        high = df['High']
+        low = df['Low']
+        
+        # 价格列只转换一次，末值类指标全部从数组末端计算
+        close_arr = close.to_numpy(dtype=np.float64)
+        high_arr = high.to_numpy(dtype=np.float64)
+        low_arr = low.to_numpy(dtype=np.float64)
+        tail = _tail_indicators(close_arr, high_arr, low_arr, period)
+        last_price = float(close_arr[-1])
+        
+        result = {
+            "symbol": symbol,
+            "last_price": last_price,
+            "indicators": {}
+        }
+        
+        # 计算各指标
+        ind_list = [i.strip().upper() for i in indicators.split(',')]
+        
+        if 'MA' in ind_list or 'SMA' in ind_list:
+            result['indicators']['MA'] = {
+                name: tail[name] for name in ("MA5", "MA10", "MA20", "MA60")
             }
-            
-            # RSI
-            rsi_signal = generator.rsi_signal()
-            signals['RSI'] = {
-                "signal": self._signal_to_str(rsi_signal.iloc[-1]),
-                "value": int(rsi_signal.iloc[-1])
+        
+        if 'EMA' in ind_list:
+            result['indicators']['EMA'] = {
+                "EMA12": self.factors.ema_tail(close_arr, 12),
+                "EMA26": self.factors.ema_tail(close_arr, 26),
             }
-            
-            # MACD
-            macd_signal = generator.macd_signal()
-            signals['MACD'] = {
-                "signal": self._signal_to_str(macd_signal.iloc[-1]),
-                "value": int(macd_signal.iloc[-1])
+        
+        if 'RSI' in ind_list:
+            rsi = tail['RSI']
+            result['indicators']['RSI'] = {
+                "value": rsi,
+                "period": period,
+                "signal": "超买" if rsi > 70 else "超卖" if rsi < 30 else "中性"
             }
-            
-            # 布林带
-            boll_signal = generator.bollinger_breakout()
-            signals['BOLL'] = {
-                "signal": self._signal_to_str(boll_signal.iloc[-1]),
-                "value": int(boll_signal.iloc[-1])
+        
+        if 'MACD' in ind_list:
+            macd_df = self.factors.macd(close)
+            hist = macd_df['histogram'].to_numpy()
+            result['indicators']['MACD'] = {
+                "macd": float(macd_df['macd'].iat[-1]),
+                "signal": float(macd_df['signal'].iat[-1]),
+                "histogram": float(hist[-1]),
+                "crossover": "金叉" if hist[-1] > 0 and hist[-2] <= 0 
+                             else "死叉" if hist[-1] < 0 and hist[-2] >= 0 
+                             else "中性"
             }
-            
-            # 综合信号
-            combined = generator.combined_signal()
-            
-            result = {
-                "symbol": symbol,
-                "last_price": float(df['Close'].iloc[-1]),
-                "date": str(df.index[-1].date()),
-                "signals": signals,
-                "combined": {
-                    "signal": self._signal_to_str(combined.iloc[-1]),
-                    "value": float(combined.iloc[-1])
-                },
-                "recommendation": self._get_recommendation(combined.iloc[-1])
+        
+        if 'BOLL' in ind_list:
+            upper, middle, lower = tail['BOLL']
+            result['indicators']['BOLL'] = {
+                "upper": upper,
+                "middle": middle,
+                "lower": lower,
+                "position": "上轨" if last_price > upper 
+                           else "下轨" if last_price < lower 
+                           else "中轨"
             }
-            
-            return json.dumps(result, ensure_ascii=False, indent=2)
-            
-        except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
-    
-    def analyze_trend(self, symbol: str) -> str:
-        """分析趋势"""
-        try:
-            df = self.fetcher.download(symbol, period="6mo")
-            if df.empty:
-                return json.dumps({"error": f"无法获取 {symbol} 的数据"}, ensure_ascii=False)
-            
-            close = df['Close']
-            
-            # 计算各周期均线
-            ma5 = self.factors.sma(close, 5)
-            ma10 = self.factors.sma(close, 10)
-            ma20 = self.factors.sma(close, 20)
-            ma60 = self.factors.sma(close, 60)
-            
-            # 判断趋势
-            current_price = close.iloc[-1]
-            
-            # 多头排列: MA5 > MA10 > MA20 > MA60
-            bullish = ma5.iloc[-1] > ma10.iloc[-1] > ma20.iloc[-1] > ma60.iloc[-1]
-            bearish = ma5.iloc[-1] < ma10.iloc[-1] < ma20.iloc[-1] < ma60.iloc[-1]
-            
-            if bullish:
-                trend = "上升趋势"
-                direction = "UP"
-            elif bearish:
-                trend = "下降趋势"
-                direction = "DOWN"
-            else:
-                trend = "震荡整理"
-                direction = "SIDEWAYS"
-            
-            # 趋势强度
-            price_change_20d = (close.iloc[-1] - close.iloc[-20]) / close.iloc[-20] * 100 if len(close) >= 20 else 0
-            strength = min(100, abs(price_change_20d) * 5)
-            
-            result = {
-                "symbol": symbol,
-                "last_price": float(current_price),
-                "trend": trend,
-                "direction": direction,
-                "strength": round(strength, 2),
-                "ma排列": {
-                    "MA5": round(float(ma5.iloc[-1]), 2),
-                    "MA10": round(float(ma10.iloc[-1]), 2),
-                    "MA20": round(float(ma20.iloc[-1]), 2),
-                    "MA60": round(float(ma60.iloc[-1]), 2),
-                },
-                "20日涨幅": round(price_change_20d, 2)
+        
+        if 'ATR' in ind_list:
+            result['indicators']['ATR'] = {
+                "value": tail['ATR'],
+                "period": period
             }
-            
-            return json.dumps(result, ensure_ascii=False, indent=2)
-            
-        except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+        
+        if 'KDJ' in ind_list:
+            k, d = tail['K'], tail['D']
+            result['indicators']['KDJ'] = {
+                "K": k,
+                "D": d,
+                "J": 3 * k - 2 * d,
+                "signal": "超买" if k > 80 else "超卖" if k < 20 else "中性"
+            }
+        
+        if 'ADX' in ind_list:
+            adx = self.factors.adx(high, low, close, period)
+            result['indicators']['ADX'] = {
+                "value": float(adx.iat[-1]),
+                "trend_strength": "强" if adx.iat[-1] > 25 else "弱"
+            }
+        
+        return result
+    
+    def _generate_signals(self, symbol: str, df: pd.DataFrame, strategy: str = "combined") -> dict:
+        """生成交易信号 (基于已获取的数据)"""
+        generator = SignalGenerator(df)
+        
+        # 各策略信号
+        signals = {}
+        
+        # 均线交叉
+        ma_signal = generator.ma_crossover_signal(5, 20)
+        signals['MA_CROSSOVER'] = {
+            "signal": self._signal_to_str(ma_signal.iat[-1]),
+            "value": int(ma_signal.iat[-1])
+        }
+        
+        # RSI
+        rsi_signal = generator.rsi_signal()
+        signals['RSI'] = {
+            "signal": self._signal_to_str(rsi_signal.iat[-1]),
+            "value": int(rsi_signal.iat[-1])
+        }
+        
+        # MACD
+        macd_signal = generator.macd_signal()
+        signals['MACD'] = {
+            "signal": self._signal_to_str(macd_signal.iat[-1]),
+            "value": int(macd_signal.iat[-1])
+        }
+        
+        # 布林带
+        boll_signal = generator.bollinger_breakout()
+        signals['BOLL'] = {
+            "signal": self._signal_to_str(boll_signal.iat[-1]),
+            "value": int(boll_signal.iat[-1])
+        }
+        
+        # 综合信号
+        combined = generator.combined_signal()
+        
+        result = {
+            "symbol": symbol,
+            "last_price": float(df['Close'].iat[-1]),
+            "date": str(df.index[-1].date()),
+            "signals": signals,
+            "combined": {
+                "signal": self._signal_to_str(combined.iat[-1]),
+                "value": float(combined.iat[-1])
+            },
+            "recommendation": self._get_recommendation(combined.iat[-1])
+        }
+        
+        return result
+    
+    def _analyze_trend(self, symbol: str, df: pd.DataFrame) -> dict:
+        """分析趋势 (基于已获取的数据)"""
+        close = df['Close']
+        close_arr = close.to_numpy(dtype=np.float64)
+        
+        # 各周期均线只需最新值，直接取末端均值
+        ma5, ma10, ma20, ma60 = (self.factors.sma_tail(close_arr, n) for n in (5, 10, 20, 60))
+        
+        # 判断趋势
+        current_price = close_arr[-1]
+        
+        # 多头排列: MA5 > MA10 > MA20 > MA60
+        bullish = ma5 > ma10 > ma20 > ma60
+        bearish = ma5 < ma10 < ma20 < ma60
+        
+        if bullish:
+            trend = "上升趋势"
+            direction = "UP"
+        elif bearish:
+            trend = "下降趋势"
+            direction = "DOWN"
+        else:
+            trend = "震荡整理"
+            direction = "SIDEWAYS"
+        
+        # 趋势强度
+        price_change_20d = (close_arr[-1] - close_arr[-20]) / close_arr[-20] * 100 if len(close_arr) >= 20 else 0
+        strength = min(100, abs(price_change_20d) * 5)
+        
+        result = {
+            "symbol": symbol,
+            "last_price": float(current_price),
+            "trend": trend,
+            "direction": direction,
+            "strength": round(strength, 2),
+            "ma排列": {
+                "MA5": round(ma5, 2),
+                "MA10": round(ma10, 2),
+                "MA20": round(ma20, 2),
+                "MA60": round(ma60, 2),
+            },
+            "20日涨幅": round(price_change_20d, 2)
+        }
+        
+        return result
+    
+    def _comprehensive(self, symbol: str, df: pd.DataFrame) -> dict:
+        """基于已下载数据的综合报告；单项失败不影响其他项"""
+        if df is None or df.empty:
+            return {"error": f"无法获取 {symbol} 的数据"}
+        
+        def safe(analyze):
+            try:
+                return analyze(symbol, df)
+            except Exception as e:
+                return {"error": str(e)}
+        
+        indicators = safe(self._calculate_indicators)
+        signals = safe(self._generate_signals)
+        trend = safe(self._analyze_trend)
+        
+        return {
+            "symbol": symbol,
+            "last_price": signals.get("last_price"),
+            "date": signals.get("date"),
+            "summary": {
+                "trend": trend.get("trend"),
+                "overall_signal": signals.get("combined", {}).get("signal"),
+                "recommendation": signals.get("recommendation")
+            },
+            "indicators": indicators.get("indicators", {}),
+            "signals": signals.get("signals", {}),
+            "trend": trend
+        }
     
     def comprehensive_analysis(self, symbol: str) -> str:
         """综合技术分析"""
         try:
-            # 获取各项分析
-            indicators = json.loads(self.calculate_indicators(symbol))
-            signals = json.loads(self.generate_signals(symbol))
-            trend = json.loads(self.analyze_trend(symbol))
-            
-            # 构建综合报告
-            result = {
-                "symbol": symbol,
-                "last_price": signals.get("last_price"),
-                "date": signals.get("date"),
-                "summary": {
-                    "trend": trend.get("trend"),
-                    "overall_signal": signals.get("combined", {}).get("signal"),
-                    "recommendation": signals.get("recommendation")
-                },
-                "indicators": indicators.get("indicators", {}),
-                "signals": signals.get("signals", {}),
-                "trend": trend
-            }
-            
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            # 数据只获取一次，各项分析共用
+            df = self._load_ohlcv(symbol)
+            result = self._comprehensive(symbol, df)
+            if "error" in result:
+                return _dump(result, indent=False)
             
+            return _dump(result)
+        
         except Exception as e:
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
+            return _dump({"error": str(e)}, indent=False)
+    
+    def _download_or_error(self, symbol: str):
+        """下载6个月数据，失败时返回异常对象而不抛出"""
+        try:
+            return self._load_ohlcv(symbol)
+        except Exception as e:
+            return e
+    
+    def comprehensive_analysis_batch(self, symbols: List[str]) -> str:
+        """
+        批量综合技术分析
+        
+        下载为网络I/O，多线程并发；指标计算在当前线程执行。
+        
+        Args:
+            symbols: 股票代码列表
+        
+        Returns:
+            JSON格式列表，顺序与 symbols 一致
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            for symbol, df in zip(symbols, ex.map(self._download_or_error, symbols)):
+                if isinstance(df, Exception):
+                    results.append({"symbol": symbol, "error": str(df)})
+                    continue
+                try:
+                    results.append(self._comprehensive(symbol, df))
+                except Exception as e:
+                    results.append({"symbol": symbol, "error": str(e)})
+        
+        return _dump(results)
     
     def _signal_to_str(self, value: int) -> str:
         """转换信号值到字符串"""
@@ -319,9 +470,9 @@ class TechnicalAnalysis:
 
 def main():
     parser = argparse.ArgumentParser(description="技术分析工具")
-    parser.add_argument("command", choices=["indicators", "signals", "trend", "analysis"],
-                       help="命令: indicators-计算指标, signals-生成信号, trend-分析趋势, analysis-综合分析")
-    parser.add_argument("--symbol", "-s", required=True, help="股票代码")
+    parser.add_argument("command", choices=["indicators", "signals", "trend", "analysis", "batch"],
+                       help="命令: indicators-计算指标, signals-生成信号, trend-分析趋势, analysis-综合分析, batch-批量综合分析")
+    parser.add_argument("--symbol", "-s", required=True, help="股票代码 (batch 时为逗号分隔列表)")
     parser.add_argument("--indicators", "-i", default="RSI,MACD,BOLL", help="指标列表")
     parser.add_argument("--period", "-p", type=int, default=14, help="周期")
     parser.add_argument("--strategy", default="combined", help="策略")
@@ -338,6 +489,8 @@ def main():
         print(ta.analyze_trend(args.symbol))
     elif args.command == "analysis":
         print(ta.comprehensive_analysis(args.symbol))
+    elif args.command == "batch":
+        print(ta.comprehensive_analysis_batch(args.symbol.split(',')))
 
 
 if __name__ == "__main__":
@@ -9,6 +9,9 @@ from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from ._ta_kernels import rolling_max, rolling_min, sma_running, std_running
+from .independent._cache import shared_indicators, rolling_mean, ewm_mean
+
 
 class SignalType(Enum):
     """信号类型"""
@@ -24,7 +27,7 @@ class PositionType(Enum):
     CASH = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class TradingSignal:
     """交易信号"""
     date: str
@@ -36,7 +39,7 @@ class TradingSignal:
     confidence: float = 1.0  # 置信度 0-1
 
 
-@dataclass
+@dataclass(slots=True)
 class StrategyResult:
     """策略结果"""
     symbol: str
@@ -55,13 +58,13 @@ class FactorCalculator:
 
     @staticmethod
     def sma(data: pd.Series, period: int) -> pd.Series:
-        """简单移动平均"""
-        return data.rolling(window=period).mean()
+        """简单移动平均 (在 shared_indicators() 作用域内，同一序列同一周期只计算一次)"""
+        return rolling_mean(data, period)
 
     @staticmethod
     def ema(data: pd.Series, period: int) -> pd.Series:
-        """指数移动平均"""
-        return data.ewm(span=period, adjust=False).mean()
+        """指数移动平均 (在 shared_indicators() 作用域内，同一序列同一周期只计算一次)"""
+        return ewm_mean(data, period)
 
     @staticmethod
     def rsi(data: pd.Series, period: int = 14) -> pd.Series:
@@ -75,8 +78,8 @@ class FactorCalculator:
     @staticmethod
     def macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """MACD指标"""
-        ema_fast = data.ewm(span=fast, adjust=False).mean()
-        ema_slow = data.ewm(span=slow, adjust=False).mean()
+        ema_fast = ewm_mean(data, fast)
+        ema_slow = ewm_mean(data, slow)
         macd_line = ema_fast - ema_slow
         signal_line = macd_line.ewm(span=signal, adjust=False).mean()
         histogram = macd_line - signal_line
@@ -85,8 +88,8 @@ class FactorCalculator:
     @staticmethod
     def bollinger_bands(data: pd.Series, period: int = 20, std_dev: float = 2.0) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """布林带"""
-        middle = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
+        middle = rolling_mean(data, period)
+        std = pd.Series(std_running(data.to_numpy(dtype=np.float64), period), index=data.index, name=data.name)
         upper = middle + (std * std_dev)
         lower = middle - (std * std_dev)
         return upper, middle, lower
@@ -94,27 +97,27 @@ class FactorCalculator:
     @staticmethod
     def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
         """平均真实波幅"""
-        tr1 = high - low
-        tr2 = (high - close.shift()).abs()
-        tr3 = (low - close.shift()).abs()
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.rolling(window=period).mean()
+        h = high.to_numpy(dtype=np.float64)
+        l = low.to_numpy(dtype=np.float64)
+        prev = np.concatenate(([np.nan], close.to_numpy(dtype=np.float64)[:-1]))
+        # 三者取最大 (忽略 NaN，首根K线即为 high - low)
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))
+        return pd.Series(tr, index=high.index).rolling(window=period).mean()
 
     @staticmethod
     def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
         """平均趋向指数"""
-        plus_dm = high.diff()
-        minus_dm = -low.diff()
-
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm < 0] = 0
-
-        tr = FactorCalculator.atr(high, low, close, period)
-        plus_di = 100 * (plus_dm.rolling(window=period).mean() / tr)
-        minus_di = 100 * (minus_dm.rolling(window=period).mean() / tr)
-
-        dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
-        return dx.rolling(window=period).mean()
+        h = high.to_numpy(dtype=np.float64)
+        l = low.to_numpy(dtype=np.float64)
+        plus_dm = np.maximum(np.diff(h, prepend=np.nan), 0.0)
+        minus_dm = np.maximum(-np.diff(l, prepend=np.nan), 0.0)
+
+        tr = FactorCalculator.atr(high, low, close, period).to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * (sma_running(plus_dm, period) / tr)
+            minus_di = 100 * (sma_running(minus_dm, period) / tr)
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        return pd.Series(sma_running(dx, period), index=high.index)
 
     @staticmethod
     def stochastic(high: pd.Series, low: pd.Series, close: pd.Series, k_period: int = 14, d_period: int = 3) -> Tuple[pd.Series, pd.Series]:
@@ -130,23 +133,36 @@ class FactorCalculator:
     @staticmethod
     def obv(close: pd.Series, volume: pd.Series) -> pd.Series:
         """能量潮"""
-        obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
-        return obv
+        if not close.index.equals(volume.index):
+            close, volume = close.align(volume)
+        c = close.to_numpy(dtype=np.float64)
+        diff = np.diff(c, prepend=np.nan)
+        # 涨为 +1、跌为 -1，其余 (持平/缺失) 为 0，无分支
+        direction = (diff > 0).view(np.int8) - (diff < 0).view(np.int8)
+        flow = direction * volume.to_numpy(dtype=np.float64)
+        flow[np.isnan(flow)] = 0
+        return pd.Series(np.cumsum(flow), index=close.index)
 
     @staticmethod
     def volume_profile(close: pd.Series, volume: pd.Series, bins: int = 20) -> Dict:
         """成交量分布"""
-        df = pd.DataFrame({'close': close, 'volume': volume}).dropna()
-        if df.empty:
+        if not close.index.equals(volume.index):
+            close, volume = close.align(volume)
+        c = close.to_numpy(dtype=np.float64)
+        v = volume.to_numpy(dtype=np.float64)
+        mask = ~(np.isnan(c) | np.isnan(v))
+        if not mask.all():
+            c, v = c[mask], v[mask]
+        if c.size == 0:
             return {}
 
-        hist, bin_edges = np.histogram(df['close'], bins=bins, weights=df['volume'])
-        max_idx = np.argmax(hist)
+        hist, bin_edges = np.histogram(c, bins=bins, weights=v)
+        max_idx = hist.argmax()
 
         return {
             'poc': (bin_edges[max_idx] + bin_edges[max_idx + 1]) / 2,  # Point of Control
-            'volume_area': sum(hist[hist > np.mean(hist)]),  # Volume Area
-            'total_volume': df['volume'].sum()
+            'volume_area': hist[hist > hist.mean()].sum(),  # Volume Area
+            'total_volume': v.sum()
         }
 
 
@@ -156,12 +172,14 @@ class SignalGenerator:
     @staticmethod
     def golden_cross(df: pd.DataFrame, short_col: str = 'sma_short', long_col: str = 'sma_long') -> pd.Series:
         """黄金交叉 - 短期上穿长期"""
-        return (df[short_col] > df[long_col]) & (df[short_col].shift(1) <= df[long_col].shift(1))
+        short, long = _columns(df, short_col, long_col)
+        return pd.Series(_cross(short, long, np.greater, np.less_equal), index=df.index)
 
     @staticmethod
     def death_cross(df: pd.DataFrame, short_col: str = 'sma_short', long_col: str = 'sma_long') -> pd.Series:
         """死亡交叉 - 短期下穿长期"""
-        return (df[short_col] < df[long_col]) & (df[short_col].shift(1) >= df[long_col].shift(1))
+        short, long = _columns(df, short_col, long_col)
+        return pd.Series(_cross(short, long, np.less, np.greater_equal), index=df.index)
 
     @staticmethod
     def rsi_overbought(df: pd.Series, threshold: float = 70) -> pd.Series:
@@ -176,21 +194,55 @@ class SignalGenerator:
     @staticmethod
     def macd_cross(df: pd.DataFrame, macd_col: str = 'macd', signal_col: str = 'macd_signal') -> pd.Series:
         """MACD金叉/死叉"""
-        golden = (df[macd_col] > df[signal_col]) & (df[macd_col].shift(1) <= df[signal_col].shift(1))
-        death = (df[macd_col] < df[signal_col]) & (df[macd_col].shift(1) >= df[signal_col].shift(1))
+        macd, signal = _columns(df, macd_col, signal_col)
+        golden = pd.Series(_cross(macd, signal, np.greater, np.less_equal), index=df.index)
+        death = pd.Series(_cross(macd, signal, np.less, np.greater_equal), index=df.index)
         return golden, death
 
     @staticmethod
     def breakout(df: pd.DataFrame, period: int = 20) -> pd.Series:
         """价格突破"""
-        high = df['high'].rolling(window=period).max()
-        return df['close'] > high.shift(1)
+        high = rolling_max(df['high'].to_numpy(dtype=np.float64), period)
+        return pd.Series(_compare_prev(df['close'].to_numpy(dtype=np.float64), high, np.greater), index=df.index)
 
     @staticmethod
     def support_break(df: pd.DataFrame, period: int = 20) -> pd.Series:
         """支撑跌破"""
-        low = df['low'].rolling(window=period).min()
-        return df['close'] < low.shift(1)
+        low = rolling_min(df['low'].to_numpy(dtype=np.float64), period)
+        return pd.Series(_compare_prev(df['close'].to_numpy(dtype=np.float64), low, np.less), index=df.index)
+
+
+def _columns(df: pd.DataFrame, *cols: str) -> Tuple[np.ndarray, ...]:
+    """按列名取出 float64 数组"""
+    return tuple(df[col].to_numpy(dtype=np.float64) for col in cols)
+
+
+def _cross(a: np.ndarray, b: np.ndarray, now: np.ufunc, before: np.ufunc) -> np.ndarray:
+    """now(a, b) 且前一根K线 before(a, b)，即交叉发生的位置；首根为 False"""
+    out = np.zeros(len(a), dtype=bool)
+    now(a[1:], b[1:], out=out[1:])
+    out[1:] &= before(a[:-1], b[:-1])
+    return out
+
+
+def _compare_prev(values: np.ndarray, level: np.ndarray, op: np.ufunc) -> np.ndarray:
+    """op(values, 前一根K线的 level)，即 op(values, level.shift(1))；首根及缺失处为 False"""
+    out = np.zeros(len(values), dtype=bool)
+    op(values[1:], level[:-1], out=out[1:])
+    return out
+
+
+def _pnl_array(trades: List[Dict]) -> np.ndarray:
+    """逐笔盈亏数组 (缺少 pnl 的记为 0)"""
+    return np.fromiter((t.get('pnl', 0) for t in trades), dtype=np.float64, count=len(trades))
+
+
+def _nancumprod(values: np.ndarray) -> np.ndarray:
+    """沿第 0 轴累乘，缺失值处保持 NaN 且不中断累乘 (与 Series/DataFrame.cumprod 一致)"""
+    missing = np.isnan(values)
+    out = np.cumprod(np.where(missing, 1.0, values), axis=0)
+    out[missing] = np.nan
+    return out
 
 
 class StrategyEvaluator:
@@ -234,16 +286,16 @@ class StrategyEvaluator:
         """胜率"""
         if not trades:
             return 0
-        winning = sum(1 for t in trades if t.get('pnl', 0) > 0)
-        return winning / len(trades)
+        return int(np.count_nonzero(_pnl_array(trades) > 0)) / len(trades)
 
     @staticmethod
     def profit_factor(trades: List[Dict]) -> float:
         """盈利因子"""
         if not trades:
             return 0
-        gross_profit = sum(t.get('pnl', 0) for t in trades if t.get('pnl', 0) > 0)
-        gross_loss = abs(sum(t.get('pnl', 0) for t in trades if t.get('pnl', 0) < 0))
+        pnl = _pnl_array(trades)
+        gross_profit = float(pnl[pnl > 0].sum())
+        gross_loss = float(-pnl[pnl < 0].sum())
         if gross_loss == 0:
             return float('inf') if gross_profit > 0 else 0
         return gross_profit / gross_loss
@@ -258,24 +310,88 @@ class StrategyEvaluator:
         returns = data['close'].pct_change()
         strategy_returns = returns * position
 
-        # 累计收益
-        cumulative = (1 + strategy_returns).cumprod()
-        market_cumulative = (1 + returns).cumprod()
+        # 累计收益 (在数组上计算一次，各指标共用)
+        cumulative = _nancumprod(1 + strategy_returns.to_numpy(dtype=np.float64))
+        market_cumulative = _nancumprod(1 + returns.to_numpy(dtype=np.float64))
+
+        # 最大回撤: 净值减去历史最高净值 (忽略缺失值)
+        drawdown = cumulative - np.fmax.accumulate(cumulative)
+        valid = ~np.isnan(drawdown)
+        max_drawdown = drawdown[valid].min() if valid.any() else np.nan
 
         # 计算指标
         result = {
-            'total_return': (cumulative.iloc[-1] - 1) if len(cumulative) > 0 else 0,
-            'annualized_return': cumulative.iloc[-1] ** (252 / len(cumulative)) - 1 if len(cumulative) > 0 else 0,
+            'total_return': (cumulative[-1] - 1) if len(cumulative) > 0 else 0,
+            'annualized_return': cumulative[-1] ** (252 / len(cumulative)) - 1 if len(cumulative) > 0 else 0,
             'sharpe_ratio': StrategyEvaluator.sharpe_ratio(strategy_returns.dropna()),
-            'max_drawdown': StrategyEvaluator.max_drawdown(cumulative),
+            'max_drawdown': max_drawdown,
             'win_rate': StrategyEvaluator.win_rate([]),  # 需要成交记录
             'trade_count': (signals.diff().abs() > 0).sum(),
-            'market_return': (market_cumulative.iloc[-1] - 1) if len(market_cumulative) > 0 else 0,
-            'alpha': (cumulative.iloc[-1] - market_cumulative.iloc[-1]) if len(cumulative) > 0 else 0
+            'market_return': (market_cumulative[-1] - 1) if len(market_cumulative) > 0 else 0,
+            'alpha': (cumulative[-1] - market_cumulative[-1]) if len(cumulative) > 0 else 0
         }
 
         return result
 
+    @staticmethod
+    def evaluate_universe(prices: pd.DataFrame, signals: pd.DataFrame, risk_free_rate: float = 0.02) -> pd.DataFrame:
+        """
+        批量评估多只股票，指标与 evaluate_strategy 逐只计算的结果相同
+
+        整个股票池按 (日期, 股票) 矩阵沿时间轴一次计算，避免逐只调用的 pandas 开销
+
+        Args:
+            prices: 收盘价矩阵，行为日期、列为股票
+            signals: 持仓信号矩阵，按 prices 的行列对齐，缺失视为空仓
+            risk_free_rate: 年化无风险利率
+
+        Returns:
+            每只股票一行的指标表，列同 evaluate_strategy 的返回字段
+        """
+        signals = signals.reindex(index=prices.index, columns=prices.columns)
+        price = prices.to_numpy(dtype=np.float64)
+        signal = signals.to_numpy(dtype=np.float64)
+        n_days = len(price)
+
+        # 持仓: 前一日信号；收益: 逐日涨跌幅 (首日为 NaN)
+        position = np.zeros_like(signal)
+        position[1:] = np.nan_to_num(signal[:-1], nan=0.0)
+        returns = np.full_like(price, np.nan)
+        returns[1:] = price[1:] / price[:-1] - 1
+        strategy_returns = returns * position
+
+        cumulative = _nancumprod(1 + strategy_returns)
+        market_cumulative = _nancumprod(1 + returns)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if n_days > 0:
+                drawdown = cumulative - np.fmax.accumulate(cumulative, axis=0)
+                max_drawdown = np.fmin.reduce(drawdown, axis=0)
+                final = cumulative[-1]
+                market_final = market_cumulative[-1]
+            else:
+                max_drawdown = final = market_final = np.full(price.shape[1], np.nan)
+
+            # 夏普比率: 忽略缺失值，样本标准差 (ddof=1)，标准差为 0 时记 0
+            valid = ~np.isnan(strategy_returns)
+            count = valid.sum(axis=0)
+            mean = np.where(valid, strategy_returns, 0.0).sum(axis=0) / count
+            deviation = np.where(valid, strategy_returns - mean, 0.0)
+            std = np.sqrt((deviation * deviation).sum(axis=0) / (count - 1))
+            std[count < 2] = np.nan
+            sharpe = np.where(std == 0, 0.0, np.sqrt(252) * (mean - risk_free_rate / 252) / std)
+
+        return pd.DataFrame({
+            'total_return': final - 1 if n_days > 0 else 0,
+            'annualized_return': final ** (252 / n_days) - 1 if n_days > 0 else 0,
+            'sharpe_ratio': sharpe,
+            'max_drawdown': max_drawdown,
+            'win_rate': StrategyEvaluator.win_rate([]),  # 需要成交记录
+            'trade_count': np.count_nonzero(np.abs(np.diff(signal, axis=0)) > 0, axis=0),
+            'market_return': market_final - 1 if n_days > 0 else 0,
+            'alpha': final - market_final if n_days > 0 else 0,
+        }, index=prices.columns)
+
 
 # 导出
 __all__ = [
@@ -285,5 +401,6 @@ __all__ = [
     'StrategyResult',
     'FactorCalculator',
     'SignalGenerator',
-    'StrategyEvaluator'
+    'StrategyEvaluator',
+    'shared_indicators'
 ]
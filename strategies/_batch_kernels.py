@@ -0,0 +1,182 @@
+"""
+多标的批量信号内核
+行情按 [标的, bar] 排成二维数组, 安装 numba 时按标的并行; 每行结果与对应策略 analyze 的末端信号一致
+"""
+
+import numpy as np
+
+from utils._njit import njit, prange
+from ._ta_kernels import macd_tail
+
+
+@njit(cache=True)
+def _tail_mean(x, n):
+    """
+    末端 n 个值的均值
+    
+    不足 n 个或有缺失值时为 NaN; 各值相同时直接取该值, 与 pandas rolling(n).mean() 一致
+    """
+    size = x.shape[0]
+    if size < n:
+        return np.nan
+    total = 0.0
+    comp = 0.0  # Kahan 补偿项
+    first = x[size - n]
+    same = True
+    for i in range(size - n, size):
+        v = x[i]
+        if v != v:
+            return np.nan
+        if v != first:
+            same = False
+        y = v - comp
+        t = total + y
+        comp = (t - total) - y
+        total = t
+    return first if same else total / n
+
+
+@njit(cache=True, parallel=True)
+def momentum_batch(close, period, threshold):
+    """
+    批量动量信号, 对应 MomentumStrategy.analyze
+    
+    Args:
+        close: [标的, bar] float64 数组
+        period: 动量周期
+        threshold: 涨跌幅阈值
+    
+    Returns:
+        (signal, strength) 两个长度为标的数的数组; bar 数不足 period 时全为 0
+    """
+    n, size = close.shape
+    signal = np.zeros(n, dtype=np.int64)
+    strength = np.zeros(n, dtype=np.float64)
+    if size < period or period < 1:
+        return signal, strength
+    for i in prange(n):
+        base = close[i, size - period]
+        momentum = (close[i, size - 1] - base) / base
+        if momentum > threshold:
+            signal[i] = 1
+            strength[i] = min(momentum * 5, 1.0)
+        elif momentum < -threshold:
+            signal[i] = -1
+            strength[i] = min(-momentum * 5, 1.0)
+    return signal, strength
+
+
+@njit(cache=True, parallel=True)
+def ma_batch(close, periods):
+    """
+    批量均线排列信号, 对应 MAStrategy.analyze
+    
+    Args:
+        close: [标的, bar] float64 数组
+        periods: int64 均线周期数组, 由短到长
+    
+    Returns:
+        (signal, strength) 两个长度为标的数的数组
+    """
+    n = close.shape[0]
+    m = periods.shape[0]
+    signal = np.zeros(n, dtype=np.int64)
+    strength = np.zeros(n, dtype=np.float64)
+    for i in prange(n):
+        mas = np.empty(m)
+        for k in range(m):
+            mas[k] = _tail_mean(close[i], periods[k])
+        
+        bull = True
+        bear = True
+        slope = 0.0
+        for k in range(m - 1):
+            if not mas[k] > mas[k + 1]:
+                bull = False
+            if not mas[k] < mas[k + 1]:
+                bear = False
+            slope += (mas[k] - mas[k + 1]) / mas[k + 1]
+        
+        # 多头排列 / 空头排列
+        if bull:
+            signal[i] = 1
+            strength[i] = min(slope / (m - 1) * 10, 1.0) if m > 1 else np.nan
+        elif bear:
+            signal[i] = -1
+            strength[i] = 0.8
+    return signal, strength
+
+
+@njit(cache=True, parallel=True)
+def macd_batch(close, fast, slow, signal_period):
+    """
+    批量 MACD 金叉死叉信号, 对应 MACDStrategy.analyze
+    
+    零轴上下的持有信号不计入投票, 强度记为 0
+    
+    Args:
+        close: [标的, bar] float64 数组
+        fast, slow, signal_period: 快线/慢线/信号线跨度
+    
+    Returns:
+        (signal, strength) 两个长度为标的数的数组
+    """
+    n = close.shape[0]
+    signal = np.zeros(n, dtype=np.int64)
+    strength = np.zeros(n, dtype=np.float64)
+    for i in prange(n):
+        macd_now, hist_prev, hist_now = macd_tail(close[i], fast, slow, signal_period)
+        # 金叉 / 死叉
+        if hist_now > 0 and hist_prev <= 0:
+            signal[i] = 1
+            strength[i] = 0.8
+        elif hist_now < 0 and hist_prev >= 0:
+            signal[i] = -1
+            strength[i] = 0.8
+    return signal, strength
+
+
+@njit(cache=True, parallel=True)
+def rsi_batch(close, period, oversold, overbought):
+    """
+    批量 RSI 反转信号, 对应 RSIStrategy.analyze
+    
+    Args:
+        close: [标的, bar] float64 数组
+        period: RSI周期
+        oversold, overbought: 超卖/超买阈值
+    
+    Returns:
+        (signal, strength) 两个长度为标的数的数组; bar 数不足 period 时全为 0
+    """
+    n, size = close.shape
+    signal = np.zeros(n, dtype=np.int64)
+    strength = np.zeros(n, dtype=np.float64)
+    if size < period or period < 1:
+        return signal, strength
+    for i in prange(n):
+        gain = 0.0
+        loss = 0.0
+        for j in range(size - period, size):
+            # 首根及 NaN 涨跌记为 0
+            if j == 0:
+                continue
+            d = close[i, j] - close[i, j - 1]
+            if d > 0:
+                gain += d
+            elif d < 0:
+                loss -= d
+        if loss > 0:
+            rsi = 100 - 100 / (1 + gain / loss)
+        elif gain > 0:
+            rsi = 100.0
+        else:
+            continue
+        
+        if rsi < oversold:
+            signal[i] = 1
+            strength[i] = (oversold - rsi) / oversold
+        elif rsi > overbought:
+            signal[i] = -1
+            strength[i] = (rsi - overbought) / (100 - overbought)
+    return signal, strength
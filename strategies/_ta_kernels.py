@@ -0,0 +1,312 @@
+"""
+技术指标递推内核
+安装 numba 时编译为机器码; 结果与 pandas rolling(n).mean() / rolling(n).std() / rolling(n).max() / rolling(n).min() / ewm(span, adjust=False).mean() 一致
+"""
+
+import numpy as np
+
+from utils._njit import njit
+
+
+@njit(cache=True)
+def sma_running(x, n):
+    """
+    滑动窗口均值 (滚动求和, 每步加入新值/移出旧值)
+    
+    窗口内有缺失值时为 NaN; 窗口内各值相同时直接取该值, 与 pandas 一致
+    
+    Args:
+        x: float64 数组
+        n: 窗口长度
+    
+    Returns:
+        与 x 等长的均值数组
+    """
+    size = x.shape[0]
+    out = np.full(size, np.nan)
+    total = 0.0
+    comp = 0.0  # Kahan 补偿项
+    nobs = 0
+    same = 0
+    prev = np.nan
+    for i in range(size):
+        v = x[i]
+        if v == v:
+            nobs += 1
+            y = v - comp
+            t = total + y
+            comp = (t - total) - y
+            total = t
+        if i >= n:
+            old = x[i - n]
+            if old == old:
+                nobs -= 1
+                y = -old - comp
+                t = total + y
+                comp = (t - total) - y
+                total = t
+        
+        if v == prev:
+            same += 1
+        else:
+            same = 1
+            prev = v
+        
+        if i >= n - 1 and nobs == n:
+            out[i] = v if same >= n else total / n
+    return out
+
+
+@njit(cache=True)
+def _ema_update(weighted, old_wt, cur, alpha):
+    """EMA 递推一步, 返回新的 (weighted, old_wt)"""
+    is_obs = cur == cur
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if is_obs:
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+    elif is_obs:
+        weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def ema_span(x, span):
+    """
+    指数移动平均 (adjust=False), 缺失值处理同 pandas ewm(ignore_na=False)
+    
+    Args:
+        x: float64 数组
+        span: 跨度, alpha = 2 / (span + 1)
+    
+    Returns:
+        与 x 等长的EMA数组
+    """
+    size = x.shape[0]
+    out = np.empty(size)
+    if size == 0:
+        return out
+    alpha = 2.0 / (span + 1.0)
+    weighted = x[0]
+    old_wt = 1.0
+    out[0] = weighted
+    for i in range(1, size):
+        weighted, old_wt = _ema_update(weighted, old_wt, x[i], alpha)
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True)
+def macd_histogram(x, fast, slow, signal):
+    """
+    MACD 柱 (快慢EMA差 - 其信号线), 三条EMA在一次遍历中同时递推
+    
+    结果与 ema_span(x, fast) - ema_span(x, slow) 再减去其 ema_span(·, signal) 一致
+    
+    Args:
+        x: float64 数组
+        fast, slow, signal: 快线/慢线/信号线跨度
+    
+    Returns:
+        与 x 等长的MACD柱数组
+    """
+    size = x.shape[0]
+    out = np.empty(size)
+    if size == 0:
+        return out
+    a_fast = 2.0 / (fast + 1.0)
+    a_slow = 2.0 / (slow + 1.0)
+    a_sig = 2.0 / (signal + 1.0)
+    f, f_wt = x[0], 1.0
+    s, s_wt = x[0], 1.0
+    g, g_wt = f - s, 1.0
+    out[0] = (f - s) - g
+    for i in range(1, size):
+        f, f_wt = _ema_update(f, f_wt, x[i], a_fast)
+        s, s_wt = _ema_update(s, s_wt, x[i], a_slow)
+        g, g_wt = _ema_update(g, g_wt, f - s, a_sig)
+        out[i] = (f - s) - g
+    return out
+
+
+@njit(cache=True)
+def macd_tail(x, fast, slow, signal):
+    """
+    只取 MACD 末端值, 递推过程不分配数组
+    
+    各值与 macd_histogram 对应位置一致
+    
+    Args:
+        x: float64 数组
+        fast, slow, signal: 快线/慢线/信号线跨度
+    
+    Returns:
+        (最新MACD线, 前一根MACD柱, 最新MACD柱); 数组为空时全为 NaN, 只有一根时前一根柱为 NaN
+    """
+    size = x.shape[0]
+    if size == 0:
+        return np.nan, np.nan, np.nan
+    a_fast = 2.0 / (fast + 1.0)
+    a_slow = 2.0 / (slow + 1.0)
+    a_sig = 2.0 / (signal + 1.0)
+    f, f_wt = x[0], 1.0
+    s, s_wt = x[0], 1.0
+    g, g_wt = f - s, 1.0
+    prev = np.nan
+    hist = (f - s) - g
+    for i in range(1, size):
+        f, f_wt = _ema_update(f, f_wt, x[i], a_fast)
+        s, s_wt = _ema_update(s, s_wt, x[i], a_slow)
+        g, g_wt = _ema_update(g, g_wt, f - s, a_sig)
+        prev = hist
+        hist = (f - s) - g
+    return f - s, prev, hist
+
+
+@njit(cache=True)
+def trix_tail(x, period, signal):
+    """
+    只取 TRIX 末端值 (三重EMA的涨跌幅 * 100, 及其EMA信号线), 递推过程不分配数组
+    
+    Args:
+        x: float64 数组
+        period: 三重EMA跨度
+        signal: 信号线跨度
+    
+    Returns:
+        (前一根TRIX, 前一根信号线, 最新TRIX, 最新信号线); 数组为空时全为 NaN, 只有一根时前一根为 NaN
+    """
+    size = x.shape[0]
+    if size == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    alpha = 2.0 / (period + 1.0)
+    a_sig = 2.0 / (signal + 1.0)
+    e1, w1 = x[0], 1.0
+    e2, w2 = x[0], 1.0
+    e3, w3 = x[0], 1.0
+    trix = np.nan
+    sig, w_sig = np.nan, 1.0
+    trix_prev = np.nan
+    sig_prev = np.nan
+    for i in range(1, size):
+        e3_prev = e3
+        e1, w1 = _ema_update(e1, w1, x[i], alpha)
+        e2, w2 = _ema_update(e2, w2, e1, alpha)
+        e3, w3 = _ema_update(e3, w3, e2, alpha)
+        trix_prev = trix
+        sig_prev = sig
+        trix = (e3 / e3_prev - 1) * 100
+        sig, w_sig = _ema_update(sig, w_sig, trix, a_sig)
+    return trix_prev, sig_prev, trix, sig
+
+
+@njit(cache=True)
+def std_running(x, n):
+    """
+    滑动窗口样本标准差 (ddof=1, Welford 在线更新 + Kahan 补偿)
+    
+    窗口内有缺失值时为 NaN; 窗口内各值相同时为 0; 其余与 pandas rolling(n).std() 相差在舍入误差以内
+    
+    Args:
+        x: float64 数组
+        n: 窗口长度
+    
+    Returns:
+        与 x 等长的标准差数组
+    """
+    size = x.shape[0]
+    out = np.full(size, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    comp = 0.0
+    same = 0
+    prev = np.nan
+    for i in range(size):
+        # 先移出旧值
+        if i >= n:
+            old = x[i - n]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean - comp
+                    y = old - comp
+                    t = mean - y
+                    comp = t + y - mean
+                    mean = mean + t / nobs
+                    ssqdm = ssqdm - (old - prev_mean) * (old - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        
+        # 再加入新值
+        v = x[i]
+        if v == v:
+            nobs += 1
+            if v == prev:
+                same += 1
+            else:
+                same = 1
+            prev = v
+            prev_mean = mean - comp
+            y = v - comp
+            t = y - mean
+            comp = t + mean - y
+            mean = mean + t / nobs
+            ssqdm = ssqdm + (v - prev_mean) * (v - mean)
+        
+        if i >= n - 1 and nobs == n and nobs > 1:
+            if same >= nobs:
+                out[i] = 0.0
+            else:
+                var = ssqdm / (nobs - 1)
+                out[i] = np.sqrt(var) if var > 0 else 0.0
+    return out
+
+
+@njit(cache=True)
+def rolling_max(x, n):
+    """
+    滑动窗口最大值 (单调队列, 每个元素至多入队出队一次)
+    
+    窗口内有缺失值时为 NaN, 与 pandas rolling(n).max() 一致
+    
+    Args:
+        x: float64 数组
+        n: 窗口长度
+    
+    Returns:
+        与 x 等长的最大值数组
+    """
+    size = x.shape[0]
+    out = np.full(size, np.nan)
+    # 队列中存下标, 对应的值从队头到队尾单调递减
+    queue = np.empty(size, dtype=np.int64)
+    head = 0
+    tail = 0
+    nobs = 0
+    for i in range(size):
+        v = x[i]
+        if v == v:
+            nobs += 1
+            while tail > head and x[queue[tail - 1]] <= v:
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        if i >= n:
+            if x[i - n] == x[i - n]:
+                nobs -= 1
+            if tail > head and queue[head] <= i - n:
+                head += 1
+        
+        if i >= n - 1 and nobs == n:
+            out[i] = x[queue[head]]
+    return out
+
+
+@njit(cache=True)
+def rolling_min(x, n):
+    """滑动窗口最小值, 与 pandas rolling(n).min() 一致"""
+    return -rolling_max(-x, n)
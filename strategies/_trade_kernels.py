@@ -0,0 +1,50 @@
+"""
+交易配对内核
+安装 numba 时编译为机器码; 只遍历信号点, 不逐根K线循环
+"""
+
+import numpy as np
+
+from utils._njit import njit
+
+
+@njit(cache=True)
+def pair_long_trades(buy_idx, sell_idx):
+    """
+    按 "空仓才买入、持仓才卖出" 配对买卖点
+    
+    买点取不早于上次卖出后一根K线的第一个买入信号, 卖点取买入之后的第一个卖出信号
+    
+    Args:
+        buy_idx: 买入信号位置 (升序整数数组)
+        sell_idx: 卖出信号位置 (升序整数数组)
+    
+    Returns:
+        (买入位置数组, 卖出位置数组), 期末仍持仓时卖出比买入少一笔
+    """
+    nb = buy_idx.shape[0]
+    ns = sell_idx.shape[0]
+    entries = np.empty(nb, dtype=np.int64)
+    exits = np.empty(nb, dtype=np.int64)
+    n_entry = 0
+    n_exit = 0
+    i = 0
+    j = 0
+    pos = 0
+    while True:
+        while i < nb and buy_idx[i] < pos:
+            i += 1
+        if i == nb:
+            break
+        entry = buy_idx[i]
+        entries[n_entry] = entry
+        n_entry += 1
+        
+        while j < ns and sell_idx[j] <= entry:
+            j += 1
+        if j == ns:
+            break
+        exits[n_exit] = sell_idx[j]
+        n_exit += 1
+        pos = sell_idx[j] + 1
+    return entries[:n_entry], exits[:n_exit]
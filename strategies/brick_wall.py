@@ -14,6 +14,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+from strategies._trade_kernels import pair_long_trades
+
 
 def calculate_brick_indicator(data: pd.DataFrame) -> pd.DataFrame:
     """计算砖型图指标"""
@@ -27,15 +29,22 @@ def calculate_brick_indicator(data: pd.DataFrame) -> pd.DataFrame:
     high_4 = data['High'].rolling(window=4).max()
     low_4 = data['Low'].rolling(window=4).min()
     
+    h4, l4 = high_4.to_numpy(), low_4.to_numpy()
+    close = data['Close'].to_numpy(dtype=np.float64)
+    range_4 = h4 - l4
+    
     # VAR1A: (HHV(HIGH,4)-CLOSE)/(HHV(HIGH,4)-LLV(LOW,4))*100-90
-    range_4 = high_4 - low_4
-    data['VAR1A'] = ((high_4 - data['Close']) / range_4 * 100 - 90).fillna(0)
+    # VAR3A: (CLOSE-LLV(LOW,4))/(HHV(HIGH,4)-LLV(LOW,4))*100
+    # 窗口未满或 0/0 时为 NaN，记为 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var1a = (h4 - close) / range_4 * 100 - 90
+        var3a = (close - l4) / range_4 * 100
+    data['VAR1A'] = np.where(np.isnan(var1a), 0.0, var1a)
     
     # VAR2A: SMA(VAR1A,4,1)+100
     data['VAR2A'] = data['VAR1A'].rolling(window=4).mean() + 100
     
-    # VAR3A: (CLOSE-LLV(LOW,4))/(HHV(HIGH,4)-LLV(LOW,4))*100
-    data['VAR3A'] = ((data['Close'] - low_4) / range_4 * 100).fillna(0)
+    data['VAR3A'] = np.where(np.isnan(var3a), 0.0, var3a)
     
     # VAR4A: SMA(VAR3A,6,1)
     data['VAR4A'] = data['VAR3A'].rolling(window=6).mean()
@@ -47,7 +56,8 @@ def calculate_brick_indicator(data: pd.DataFrame) -> pd.DataFrame:
     data['VAR6A'] = data['VAR5A'] - data['VAR2A']
     
     # 砖型图: IF(VAR6A>4, VAR6A-4, 0)
-    data['砖型图'] = data['VAR6A'].apply(lambda x: max(x - 4, 0) if x > 4 else 0)
+    var6a = data['VAR6A'].to_numpy()
+    data['砖型图'] = np.where(var6a > 4, var6a - 4, 0.0)
     
     return data
 
@@ -76,58 +86,47 @@ def generate_signals(data: pd.DataFrame) -> pd.DataFrame:
 
 def backtest(data: pd.DataFrame, initial_capital: float = 10000) -> dict:
     """回测策略"""
-    data = data.dropna().copy()
-    
-    # 持仓状态
-    position = 0
-    entry_price = 0
-    trades = []
-    
-    for i in range(1, len(data)):
-        # 买入信号 且 未持仓
-        if data.iloc[i]['Buy_Signal'] == 1 and position == 0:
-            position = 1
-            entry_price = data.iloc[i]['Close']
-            trades.append({
-                'type': 'BUY',
-                'date': data.index[i],
-                'price': entry_price,
-                'brick': data.iloc[i]['砖型图']
-            })
-        
-        # 卖出信号 且 持仓
-        elif data.iloc[i]['Sell_Signal'] == 1 and position == 1:
-            position = 0
-            exit_price = data.iloc[i]['Close']
-            profit_pct = (exit_price - entry_price) / entry_price * 100
-            trades.append({
-                'type': 'SELL',
-                'date': data.index[i],
-                'price': exit_price,
-                'brick': data.iloc[i]['砖型图'],
-                'profit_pct': profit_pct
-            })
+    data = data.dropna()
+    
+    closes = data['Close'].to_numpy(dtype=np.float64)
+    bricks = data['砖型图'].to_numpy(dtype=np.float64)
+    
+    # 首根K线不交易
+    buy_idx = np.flatnonzero(data['Buy_Signal'].to_numpy()[1:] == 1) + 1
+    sell_idx = np.flatnonzero(data['Sell_Signal'].to_numpy()[1:] == 1) + 1
+    entries, exits = pair_long_trades(buy_idx.astype(np.int64), sell_idx.astype(np.int64))
+    
+    if len(entries) == 0:
+        return {'total_trades': 0, 'trades': []}
+    
+    # 每笔收益整列计算
+    entry_prices = closes[entries[:len(exits)]]
+    profit_pct = (closes[exits] - entry_prices) / entry_prices * 100
+    
+    # 交易记录按时间交替排列: 买, 卖, 买, 卖, ...
+    # 各字段先整列取出, 再逐笔组装
+    dates = data.index
+    buys = [
+        {'type': 'BUY', 'date': d, 'price': p, 'brick': b}
+        for d, p, b in zip(dates[entries], closes[entries].tolist(), bricks[entries].tolist())
+    ]
+    sells = [
+        {'type': 'SELL', 'date': d, 'price': p, 'brick': b, 'profit_pct': pct}
+        for d, p, b, pct in zip(dates[exits], closes[exits].tolist(), bricks[exits].tolist(), profit_pct.tolist())
+    ]
+    trades = [t for pair in zip(buys, sells) for t in pair] + buys[len(sells):]
     
     # 计算收益
-    if trades:
-        buy_trades = [t for t in trades if t['type'] == 'BUY']
-        sell_trades = [t for t in trades if t['type'] == 'SELL']
-        
-        total_profit = sum(t.get('profit_pct', 0) for t in trades if t['type'] == 'SELL')
-        wins = sum(1 for t in trades if t['type'] == 'SELL' and t.get('profit_pct', 0) > 0)
-        losses = sum(1 for t in trades if t['type'] == 'SELL' and t.get('profit_pct', 0) <= 0)
-        win_rate = wins / len(sell_trades) * 100 if sell_trades else 0
-        
-        return {
-            'total_trades': len(buy_trades),
-            'wins': wins,
-            'losses': losses,
-            'win_rate': win_rate,
-            'total_profit': total_profit,
-            'trades': trades
-        }
-    
-    return {'total_trades': 0, 'trades': []}
+    wins = int((profit_pct > 0).sum())
+    
+    return {
+        'total_trades': len(entries),
+        'wins': wins,
+        'losses': len(exits) - wins,
+        'win_rate': wins / len(exits) * 100 if len(exits) else 0,
+        'total_profit': profit_pct.sum() if len(exits) else 0,
+        'trades': trades
+    }
 
 
 def analyze_strategy(symbol: str, period: str = "2y"):
@@ -3,27 +3,51 @@
 每个策略独立文件，可自由组合
 """
 
-from .base import BaseStrategy, Signal
-from .factory import StrategyFactory, HybridStrategy, create_hybrid, create_preset, PRESETS
-from .momentum import MomentumStrategy
-from .breakout import BreakoutStrategy
-from .rsi import RSIStrategy
-from .ma import MAStrategy
-from .volume import VolumeStrategy
-from .macd import MACDStrategy
-from .bollinger import BollingerStrategy
-from .kdj import KDJStrategy
-from .cci import CCIStrategy
-from .atr import ATRStrategy
-from .dma import DMAStrategy
-from .trix import TRIXStrategy
-from .wr import WRStrategy
-from .obv import OBVStrategy
-from .limit_up import LimitUpStrategy
-from .chase_up import ChaseUpStrategy
-from .n_pattern import NPatternStrategy
-from .money_flow import MoneyFlowStrategy
-from .ma_divergence import MaDivergenceStrategy
+import importlib
+
+# 导出名 -> 所在子模块，首次访问时才导入 (PEP 562)，只用到一个策略时不必加载全部
+_LAZY = {
+    'BaseStrategy': 'base',
+    'Signal': 'base',
+    'StrategyFactory': 'factory',
+    'HybridStrategy': 'factory',
+    'create_hybrid': 'factory',
+    'create_preset': 'factory',
+    'PRESETS': 'factory',
+    'MomentumStrategy': 'momentum',
+    'BreakoutStrategy': 'breakout',
+    'RSIStrategy': 'rsi',
+    'MAStrategy': 'ma',
+    'VolumeStrategy': 'volume',
+    'MACDStrategy': 'macd',
+    'BollingerStrategy': 'bollinger',
+    'KDJStrategy': 'kdj',
+    'CCIStrategy': 'cci',
+    'ATRStrategy': 'atr',
+    'DMAStrategy': 'dma',
+    'TRIXStrategy': 'trix',
+    'WRStrategy': 'wr',
+    'OBVStrategy': 'obv',
+    'LimitUpStrategy': 'limit_up',
+    'ChaseUpStrategy': 'chase_up',
+    'NPatternStrategy': 'n_pattern',
+    'MoneyFlowStrategy': 'money_flow',
+    'MaDivergenceStrategy': 'ma_divergence',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __all__ = [
     'BaseStrategy',
@@ -0,0 +1,57 @@
+"""
+指标缓存
+HybridStrategy 组合的多个策略分析同一份行情、或参数扫描反复调用 FactorCalculator 时，相同的均线只计算一次
+"""
+
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+# 每个线程独立的缓存，仅在 shared_indicators() 作用域内启用
+_local = threading.local()
+
+
+@contextmanager
+def shared_indicators():
+    """
+    启用指标缓存，退出作用域时清空
+    
+    缓存条目持有源数组的引用，作用域内同一块内存不会被回收复用，
+    因此可以用数据地址识别 "同一列行情"
+    """
+    outer = getattr(_local, 'cache', None)
+    if outer is None:
+        _local.cache = {}
+    try:
+        yield
+    finally:
+        if outer is None:
+            _local.cache = None
+
+
+def rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    """series.rolling(window).mean()，缓存启用时同一序列同一窗口只算一次"""
+    return _cached(series, ('sma', window), lambda: series.rolling(window=window).mean())
+
+
+def ewm_mean(series: pd.Series, span: int) -> pd.Series:
+    """series.ewm(span, adjust=False).mean()，缓存启用时同一序列同一跨度只算一次"""
+    return _cached(series, ('ema', span), lambda: series.ewm(span=span, adjust=False).mean())
+
+
+def _cached(series: pd.Series, key: tuple, compute) -> pd.Series:
+    """按 (数据地址, 长度, 步长, 类型, 指标参数) 查找缓存，索引不同时重新计算"""
+    cache = getattr(_local, 'cache', None)
+    if cache is None:
+        return compute()
+    
+    values = series.to_numpy()
+    full_key = (values.__array_interface__['data'][0], len(values), values.strides, values.dtype.str) + key
+    hit = cache.get(full_key)
+    if hit is not None and (hit[1] is series.index or hit[1].equals(series.index)):
+        return hit[2]
+    
+    result = compute()
+    cache[full_key] = (values, series.index, result)
+    return result
@@ -4,28 +4,34 @@ ATR策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
 
 
 class ATRStrategy(BaseStrategy):
     """ATR策略 - 波动率突破"""
     
+    max_strength = 0.8
+    
     def __init__(self, period: int = 14, multiplier: float = 2.0):
         super().__init__("ATR策略")
         self.period = period
         self.multiplier = multiplier
     
+    def _atr(self, df: pd.DataFrame) -> pd.Series:
+        """计算ATR序列"""
+        h = df['high'].to_numpy(dtype=np.float64)
+        l = df['low'].to_numpy(dtype=np.float64)
+        prev = np.concatenate(([np.nan], df['close'].to_numpy(dtype=np.float64)[:-1]))
+        
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))
+        return pd.Series(tr, index=df.index).rolling(window=self.period).mean()
+    
     def analyze(self, df: pd.DataFrame) -> Signal:
-        high = df['high']
-        low = df['low']
         close = df['close']
         
-        # 计算ATR
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=self.period).mean()
+        # 计算ATR (最新值只需末端 period+1 根K线)
+        atr = self._atr(df.iloc[-(self.period + 1):])
         
         # 计算通道
         current_close = close.iloc[-1]
@@ -57,5 +63,19 @@ class ATRStrategy(BaseStrategy):
             reason="震荡整理"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close'].to_numpy(dtype=np.float64)
+        atr = self._atr(df).to_numpy()
+        
+        # 计算通道
+        upper = close + atr * self.multiplier
+        lower = close - atr * self.multiplier
+        
+        up = close > upper
+        down = close < lower
+        signal = np.select([up, down], [1, -1], 0)
+        strength = np.where(up | down, 0.8, 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "multiplier": self.multiplier}
@@ -6,10 +6,11 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, List
+import numpy as np
 import pandas as pd
 
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
     """交易信号"""
     strategy_name: str
@@ -18,9 +19,35 @@ class Signal:
     reason: str  # 信号原因
 
 
+@dataclass(slots=True)
+class SharedContext:
+    """
+    同一份行情的 OHLCV 数组，HybridStrategy 中各策略共用，只转换一次
+    
+    缺少的列为 None
+    """
+    df: pd.DataFrame
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    n: int
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SharedContext':
+        """从包含 OHLCV 的 DataFrame 构建"""
+        def column(name):
+            return df[name].to_numpy(dtype=np.float64) if name in df else None
+        
+        return cls(df, column('close'), column('high'), column('low'), column('volume'), len(df))
+
+
 class BaseStrategy(ABC):
     """策略基类"""
     
+    # 信号强度上限，HybridStrategy 提前结束投票时用来估计剩余策略的最大影响
+    max_strength = 1.0
+    
     def __init__(self, name: str = None):
         self.name = name or self.__class__.__name__
     
@@ -37,6 +64,88 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        """
+        基于共用数组分析，返回信号
+        
+        默认直接调用 analyze(ctx.df)，可直接用数组计算的子类应覆盖此方法
+        
+        Args:
+            ctx: SharedContext
+        
+        Returns:
+            Signal对象
+        """
+        return self.analyze(ctx.df)
+    
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        一次性计算每个bar的信号
+        
+        第i行等价于 analyze(df.iloc[:i+1]) 的结果。默认实现逐个前缀调用
+        analyze (O(N²))，子类应覆盖为基于整段指标的向量化实现。
+        
+        Args:
+            df: 包含OHLCV的DataFrame
+        
+        Returns:
+            DataFrame, 列为 signal / strength, 索引与df相同
+        """
+        n = len(df)
+        signal = np.zeros(n, dtype=np.int64)
+        strength = np.zeros(n, dtype=np.float64)
+        
+        for i in range(n):
+            try:
+                s = self.analyze(df.iloc[:i+1])
+            except Exception:
+                continue
+            signal[i] = s.signal
+            strength[i] = s.strength
+        
+        return self._signal_frame(df, signal, strength)
+    
+    def analyze_batch(self, panels: Dict[str, np.ndarray]):
+        """
+        批量分析多个标的的最新信号
+        
+        默认逐个标的组装 DataFrame 调用 analyze，分析失败的标的记为持有；
+        有批量内核的子类应覆盖为直接处理二维数组的实现。
+        
+        Args:
+            panels: 列名 -> [标的, bar] 二维数组，如 {'close': ..., 'volume': ...}
+        
+        Returns:
+            (signal, strength) 两个长度为标的数的数组
+        """
+        n = len(next(iter(panels.values())))
+        signal = np.zeros(n, dtype=np.int64)
+        strength = np.zeros(n, dtype=np.float64)
+        
+        for i in range(n):
+            df = pd.DataFrame({name: values[i] for name, values in panels.items()})
+            try:
+                s = self.analyze(df)
+            except Exception:
+                continue
+            signal[i] = s.signal
+            strength[i] = s.strength
+        
+        return signal, strength
+    
+    @staticmethod
+    def _close_panel(panels: Dict[str, np.ndarray]) -> np.ndarray:
+        """取出批量内核使用的二维收盘价数组"""
+        return np.ascontiguousarray(panels['close'], dtype=np.float64)
+    
+    @staticmethod
+    def _signal_frame(df: pd.DataFrame, signal, strength) -> pd.DataFrame:
+        """组装 precompute 的返回结果"""
+        return pd.DataFrame({
+            'signal': np.asarray(signal, dtype=np.int64),
+            'strength': np.asarray(strength, dtype=np.float64),
+        }, index=df.index)
+    
     def get_params(self) -> Dict:
         """获取策略参数"""
         return {}
@@ -4,25 +4,35 @@
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
+from ._cache import rolling_mean
+from .._ta_kernels import std_running
 
 
 class BollingerStrategy(BaseStrategy):
     """布林带策略"""
     
+    max_strength = 0.8
+    
     def __init__(self, period: int = 20, std_dev: float = 2.0):
         super().__init__("布林带策略")
         self.period = period
         self.std_dev = std_dev
     
+    def _bands(self, close: pd.Series):
+        """计算布林带中轨、上轨、下轨"""
+        ma = rolling_mean(close, self.period)
+        std = std_running(close.to_numpy(dtype=np.float64), self.period)
+        upper = ma + self.std_dev * std
+        lower = ma - self.std_dev * std
+        return ma, upper, lower
+    
     def analyze(self, df: pd.DataFrame) -> Signal:
         close = df['close']
         
-        # 计算布林带
-        ma = close.rolling(window=self.period).mean()
-        std = close.rolling(window=self.period).std()
-        upper = ma + self.std_dev * std
-        lower = ma - self.std_dev * std
+        # 计算布林带 (最新值只需末端一个窗口)
+        ma, upper, lower = self._bands(close.iloc[-self.period:])
         
         current_price = close.iloc[-1]
         current_upper = upper.iloc[-1]
@@ -61,5 +71,16 @@ class BollingerStrategy(BaseStrategy):
                 reason="在中轨下方"
             )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        ma, upper, lower = self._bands(close)
+        price = close.to_numpy(dtype=np.float64)
+        
+        up = price > upper.to_numpy()
+        down = price < lower.to_numpy()
+        signal = np.select([up, down], [1, -1], 0)
+        strength = np.where(up | down, 0.8, 0.3)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "std_dev": self.std_dev}
@@ -4,34 +4,35 @@
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
 
 
 class BreakoutStrategy(BaseStrategy):
     """突破策略 - 20日高点突破"""
     
+    max_strength = 0.8
+    
     def __init__(self, period: int = 20):
         super().__init__("突破策略")
         self.period = period
     
     def _calc_atr(self, df: pd.DataFrame) -> float:
-        high = df['high']
-        low = df['low']
-        close = df['close']
+        h = df['high'].to_numpy(dtype=np.float64)
+        l = df['low'].to_numpy(dtype=np.float64)
+        prev = np.concatenate(([np.nan], df['close'].to_numpy(dtype=np.float64)[:-1]))
         
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.iloc[-self.period:].mean()
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))[-self.period:]
+        tr = tr[~np.isnan(tr)]
+        return tr.mean() if len(tr) else np.nan
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        high = df['high']
-        
-        # 20日高点
-        highest = high.iloc[-self.period:].max()
-        current_price = close.iloc[-1]
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        # 20日高点 (忽略缺失值)
+        highest = np.fmax.reduce(ctx.high[-self.period:])
+        current_price = ctx.close[-1]
         
         if current_price > highest:
             return Signal(
@@ -55,5 +56,17 @@ class BreakoutStrategy(BaseStrategy):
             reason="震荡整理"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close'].to_numpy(dtype=np.float64)
+        
+        # 20日高点 (数据不足N日时取全部)
+        highest = df['high'].rolling(window=self.period, min_periods=1).max().to_numpy()
+        
+        up = close > highest
+        down = close < highest * 0.95
+        signal = np.select([up, down], [1, -1], 0)
+        strength = np.select([up, down], [0.8, 0.5], 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period}
@@ -4,6 +4,7 @@ CCI商品通道指数策略
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from .base import BaseStrategy, Signal
 
 
@@ -16,26 +17,28 @@ class CCIStrategy(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        high = df['high']
-        low = df['low']
-        close = df['close']
-        
+    def _cci(self, df: pd.DataFrame) -> pd.Series:
+        """计算CCI序列"""
         # 计算典型价格
-        tp = (high + low + close) / 3
+        tp = (df['high'] + df['low'] + df['close']) / 3
         
         # 计算SMA
         sma = tp.rolling(window=self.period).mean()
         
-        # 计算平均偏差
-        mad = tp.rolling(window=self.period).apply(
-            lambda x: np.abs(x - x.mean()).mean(), raw=True
-        )
+        # 计算平均偏差: 各窗口组成 (N-period+1, period) 视图后整体归约，窗口未满为 NaN
+        values = tp.to_numpy(dtype=np.float64)
+        mad = np.full(len(values), np.nan)
+        if len(values) >= self.period:
+            windows = sliding_window_view(values, self.period)
+            means = windows.mean(axis=1, keepdims=True)
+            mad[self.period - 1:] = np.abs(windows - means).mean(axis=1)
         
         # 计算CCI
-        cci = (tp - sma) / (0.015 * mad)
-        
-        cci_value = cci.iloc[-1]
+        return (tp - sma) / (0.015 * mad)
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        # 最新值只需末端一个窗口
+        cci_value = self._cci(df.iloc[-self.period:]).iloc[-1]
         
         # 超卖买入
         if cci_value < self.oversold:
@@ -63,5 +66,19 @@ class CCIStrategy(BaseStrategy):
             reason=f"CCI中性 {cci_value:.1f}"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        cci = self._cci(df).to_numpy()
+        
+        buy = cci < self.oversold
+        sell = cci > self.overbought
+        signal = np.select([buy, sell], [1, -1], 0)
+        strength = np.select(
+            [buy, sell],
+            [np.minimum(np.abs(cci - self.oversold) / 100, 1.0),
+             np.minimum((cci - self.overbought) / 100, 1.0)],
+            0.0
+        )
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period}
@@ -4,27 +4,32 @@
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
 
 
 class ChaseUpStrategy(BaseStrategy):
     """追涨策略 - 突破N日高点"""
     
+    max_strength = 0.8
+    
     def __init__(self, period: int = 20, strength: float = 0.03):
         super().__init__("追涨策略")
         self.period = period  # 周期
         self.strength = strength  # 涨幅要求
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        high = df['high']
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        close = ctx.close
         
-        # 20日高点
-        highest = high.iloc[-self.period:].max()
-        current = close.iloc[-1]
+        # 20日高点 (忽略缺失值)
+        highest = np.fmax.reduce(ctx.high[-self.period:])
+        current = close[-1]
         
         # 涨幅
-        change_pct = (current - close.iloc[-2]) / close.iloc[-2]
+        change_pct = (current - close[-2]) / close[-2]
         
         # 突破高点且涨幅够
         if current > highest * 1.01 and change_pct > self.strength:
@@ -51,5 +56,22 @@ class ChaseUpStrategy(BaseStrategy):
             reason="无追涨信号"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        
+        # 20日高点 (数据不足N日时取全部)
+        highest = df['high'].rolling(window=self.period, min_periods=1).max().to_numpy()
+        current = close.to_numpy(dtype=np.float64)
+        
+        # 涨幅
+        prev_close = close.shift(1)
+        change_pct = ((close - prev_close) / prev_close).to_numpy()
+        
+        breakout = (current > highest * 1.01) & (change_pct > self.strength)
+        near_high = ~breakout & (current > highest * 0.98)
+        signal = np.where(breakout, 1, 0)
+        strength = np.select([breakout, near_high], [0.8, 0.3], 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "strength": self.strength}
@@ -4,25 +4,32 @@ DMA策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
+from ._cache import rolling_mean
 
 
 class DMAStrategy(BaseStrategy):
     """DMA策略"""
     
+    max_strength = 0.8
+    
     def __init__(self, fast: int = 10, slow: int = 50):
         super().__init__("DMA策略")
         self.fast = fast
         self.slow = slow
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        
-        # 计算DMA
-        dma_fast = close.rolling(window=self.fast).mean()
-        dma_slow = close.rolling(window=self.slow).mean()
+    def _dma(self, close: pd.Series):
+        """计算DMA差值线和AMA平均线"""
+        dma_fast = rolling_mean(close, self.fast)
+        dma_slow = rolling_mean(close, self.slow)
         dd = dma_fast - dma_slow
         ama = dd.rolling(window=self.fast).mean()
+        return dd, ama
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        # 计算DMA (末端两个AMA值只需最后 slow+fast 根K线)
+        dd, ama = self._dma(df['close'].iloc[-(self.slow + self.fast):])
         
         # 金叉
         if dd.iloc[-1] > ama.iloc[-1] and dd.iloc[-2] <= ama.iloc[-2]:
@@ -57,5 +64,16 @@ class DMAStrategy(BaseStrategy):
             reason="空头排列"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        dd, ama = self._dma(df['close'])
+        dd_now, ama_now = dd.to_numpy(), ama.to_numpy()
+        dd_prev, ama_prev = dd.shift(1).to_numpy(), ama.shift(1).to_numpy()
+        
+        golden = (dd_now > ama_now) & (dd_prev <= ama_prev)
+        dead = (dd_now < ama_now) & (dd_prev >= ama_prev)
+        signal = np.select([golden, dead], [1, -1], 0)
+        strength = np.where(golden | dead, 0.8, 0.3)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"fast": self.fast, "slow": self.slow}
@@ -4,7 +4,10 @@
 """
 
 from typing import List, Dict
-from .base import BaseStrategy, Signal
+import numpy as np
+import pandas as pd
+from .base import BaseStrategy, Signal, SharedContext
+from ._cache import shared_indicators
 from .momentum import MomentumStrategy
 from .breakout import BreakoutStrategy
 from .rsi import RSIStrategy
@@ -82,13 +85,18 @@ class StrategyFactory:
 class HybridStrategy:
     """混合策略 - 组合多个策略"""
     
-    def __init__(self, strategies: List[BaseStrategy] = None, strategy_names: List[str] = None):
+    def __init__(self, strategies: List[BaseStrategy] = None, strategy_names: List[str] = None,
+                 early_exit: bool = False):
         """
         初始化混合策略
         
         Args:
             strategies: 策略实例列表
             strategy_names: 策略名称列表 (会自动创建)
+            early_exit: analyze 中剩余策略已无法改变买卖方向时提前结束。
+                每票按 max_strength 截断，买卖方向与截断后跑完全部策略的结果一致，
+                返回的 strength / 评分 / 统计 / 建议只包含已运行的策略，
+                通常小于完整投票的结果；按 strength 阈值下单的调用方开启后交易决策会变
         """
         if strategies:
             self.strategies = strategies
@@ -96,11 +104,20 @@ class HybridStrategy:
             self.strategies = StrategyFactory.create_multiple(strategy_names)
         else:
             raise ValueError("需要提供 strategies 或 strategy_names")
+        
+        self.early_exit = early_exit
+        # 按强度上限从大到小排列，remaining[i] 为第i个及之后策略的强度上限之和
+        self._ordered = sorted(self.strategies, key=lambda s: s.max_strength, reverse=True)
+        caps = np.array([s.max_strength for s in self._ordered], dtype=np.float64)
+        self._remaining = np.append(caps[::-1].cumsum()[::-1], 0.0)
     
     def analyze(self, df) -> Dict:
         """
         分析数据，返回组合信号
         
+        early_exit 开启时 strength / buy_score / sell_score 只统计已运行的策略，
+        与关闭时的数值不同
+        
         Returns:
             {
                 'signal': 1/-1/0,
@@ -115,19 +132,32 @@ class HybridStrategy:
         sell_score = 0
         signals = []
         
-        for strategy in self.strategies:
-            try:
-                signal = strategy.analyze(df)
-                signals.append(signal)
+        # 各策略共用同一份 OHLCV 数组和均线
+        ctx = SharedContext.from_frame(df)
+        strategies = self._ordered if self.early_exit else self.strategies
+        with shared_indicators():
+            for i, strategy in enumerate(strategies):
+                # 买卖差已超过剩余策略所能贡献的上限，方向不会再变
+                if self.early_exit and abs(buy_score - sell_score) > self._remaining[i]:
+                    break
                 
-                if signal.signal == 1:
-                    buy_score += signal.strength
-                elif signal.signal == -1:
-                    sell_score += signal.strength
+                try:
+                    signal = strategy.analyze_ctx(ctx)
+                    signals.append(signal)
+                    
+                    vote = signal.strength
+                    if self.early_exit:
+                        # 剩余上限只在每票不超过 max_strength 时成立
+                        vote = min(max(vote, 0.0), strategy.max_strength)
                     
-            except Exception as e:
-                # 策略分析失败，跳过
-                continue
+                    if signal.signal == 1:
+                        buy_score += vote
+                    elif signal.signal == -1:
+                        sell_score += vote
+                
+                except Exception:
+                    # 策略分析失败，跳过 (该策略不投票，但仍计入强度的分母)
+                    continue
         
         # 投票决定
         total = buy_score + sell_score
@@ -177,6 +207,100 @@ class HybridStrategy:
             'strategy_names': [s.name for s in self.strategies]
         }
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        一次性计算每个bar的组合信号
+        
+        第i行等价于 analyze(df.iloc[:i+1]) 的结果，但各策略的指标只在
+        整段数据上计算一次，回测循环中按下标取值即可。
+        
+        Returns:
+            DataFrame, 列为 signal / strength / buy_score / sell_score / recommendation
+        """
+        n = len(self.strategies)
+        signals = np.zeros((n, len(df)), dtype=np.int64)
+        strengths = np.zeros((n, len(df)), dtype=np.float64)
+        
+        # 各策略共用同一份均线
+        with shared_indicators():
+            for k, strategy in enumerate(self.strategies):
+                try:
+                    result = strategy.precompute(df)
+                except Exception:
+                    # 策略分析失败，跳过 (该策略不投票，但仍计入强度的分母)
+                    continue
+                signals[k] = result['signal'].to_numpy()
+                strengths[k] = result['strength'].to_numpy()
+        
+        return pd.DataFrame(self._vote(signals, strengths), index=df.index)
+    
+    def analyze_batch(self, panels: Dict[str, np.ndarray], symbols=None) -> pd.DataFrame:
+        """
+        批量分析多个标的的最新组合信号
+        
+        行情按 [标的, bar] 排成二维数组，有批量内核的策略 (动量/均线/MACD/RSI)
+        不经过 pandas、安装 numba 时按标的并行，其余策略逐个标的调用 analyze。
+        第i行的 signal / strength / buy_score / sell_score 与 analyze 对第i个标的的结果一致。
+        
+        Args:
+            panels: 列名 -> [标的, bar] 二维数组，如 {'close': ..., 'high': ..., 'volume': ...}
+            symbols: 标的代码，作为结果索引
+        
+        Returns:
+            DataFrame, 列为 signal / strength / buy_score / sell_score / recommendation
+        """
+        n_tickers = len(next(iter(panels.values())))
+        n = len(self.strategies)
+        signals = np.zeros((n, n_tickers), dtype=np.int64)
+        strengths = np.zeros((n, n_tickers), dtype=np.float64)
+        
+        with shared_indicators():
+            for k, strategy in enumerate(self.strategies):
+                try:
+                    signals[k], strengths[k] = strategy.analyze_batch(panels)
+                except Exception:
+                    # 策略分析失败，跳过 (该策略不投票，但仍计入强度的分母)
+                    continue
+        
+        return pd.DataFrame(self._vote(signals, strengths), index=symbols)
+    
+    @staticmethod
+    def _vote(signals: np.ndarray, strengths: np.ndarray) -> Dict:
+        """
+        按列汇总 [策略, 样本] 信号矩阵，返回 precompute / analyze_batch 的各列
+        
+        分析失败的策略整行为 0 (不投票)，与 analyze 一致，strength 与强烈买卖的
+        60% 门槛仍按全部策略数计算，失败的策略会拉低组合强度
+        """
+        n = len(signals)
+        buy_score = np.where(signals == 1, strengths, 0.0).sum(axis=0)
+        sell_score = np.where(signals == -1, strengths, 0.0).sum(axis=0)
+        
+        # 投票决定
+        total = buy_score + sell_score
+        is_buy = (buy_score > sell_score) & (buy_score > total * 0.4)
+        is_sell = (sell_score > buy_score) & (sell_score > total * 0.4)
+        final_signal = np.select([is_buy, is_sell], [1, -1], 0)
+        strength = np.select([is_buy, is_sell], [buy_score / n, sell_score / n], 0.0)
+        
+        # 建议
+        buy_count = (signals == 1).sum(axis=0)
+        sell_count = (signals == -1).sum(axis=0)
+        recommendation = np.select(
+            [is_buy & (buy_count >= n * 0.6), is_buy,
+             is_sell & (sell_count >= n * 0.6), is_sell],
+            ["强烈买入 ⭐⭐⭐", "买入 ⭐⭐", "强烈卖出 🔴🔴🔴", "卖出 🔴🔴"],
+            "持有 ➡️"
+        )
+        
+        return {
+            'signal': final_signal,
+            'strength': strength,
+            'buy_score': buy_score,
+            'sell_score': sell_score,
+            'recommendation': recommendation,
+        }
+    
     def get_params(self) -> Dict:
         """获取所有策略参数"""
         return {s.name: s.get_params() for s in self.strategies}
@@ -3,12 +3,16 @@ KDJ随机指标策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
+from .._ta_kernels import rolling_max, rolling_min
 
 
 class KDJStrategy(BaseStrategy):
     """KDJ策略"""
     
+    max_strength = 0.9
+    
     def __init__(self, k_period: int = 9, d_period: int = 3, oversold: int = 20, overbought: int = 80):
         super().__init__("KDJ策略")
         self.k_period = k_period
@@ -16,18 +20,21 @@ class KDJStrategy(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        high = df['high']
-        low = df['low']
-        close = df['close']
-        
-        # 计算KDJ
-        lowest_low = low.rolling(window=self.k_period).min()
-        highest_high = high.rolling(window=self.k_period).max()
+    def _kdj(self, df: pd.DataFrame):
+        """计算K、D、J序列"""
+        lowest_low = rolling_min(df['low'].to_numpy(dtype=np.float64), self.k_period)
+        highest_high = rolling_max(df['high'].to_numpy(dtype=np.float64), self.k_period)
         
-        k = 100 * (close - lowest_low) / (highest_high - lowest_low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = 100 * (df['close'].to_numpy(dtype=np.float64) - lowest_low) / (highest_high - lowest_low)
+        k = pd.Series(k, index=df.index)
         d = k.rolling(window=self.d_period).mean()
         j = 3 * k - 2 * d
+        return k, d, j
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        # 计算KDJ (最新两根K线的K、D值只需末端 k_period + d_period 根K线)
+        k, d, j = self._kdj(df.iloc[-(self.k_period + self.d_period):])
         
         k_value = k.iloc[-1]
         d_value = d.iloc[-1]
@@ -90,5 +97,26 @@ class KDJStrategy(BaseStrategy):
             reason=f"K={k_value:.1f} D={d_value:.1f}"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        k, d, j = self._kdj(df)
+        k_now, d_now, j_now = k.to_numpy(), d.to_numpy(), j.to_numpy()
+        k_prev, d_prev = k.shift(1).to_numpy(), d.shift(1).to_numpy()
+        
+        golden = (k_now > d_now) & (k_prev <= d_prev)
+        dead = ~golden & (k_now < d_now) & (k_prev >= d_prev)
+        rest = ~(golden | dead)
+        j_high = rest & (j_now > 100)
+        j_low = rest & (j_now < 0)
+        
+        signal = np.select([golden, dead, j_high, j_low], [1, -1, -1, 1], 0)
+        strength = np.select(
+            [golden, dead, j_high | j_low],
+            [np.where(k_now < self.oversold, 0.9, 0.6),
+             np.where(k_now > self.overbought, 0.9, 0.6),
+             0.7],
+            0.0
+        )
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"k_period": self.k_period, "d_period": self.d_period}
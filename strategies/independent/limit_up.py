@@ -4,33 +4,36 @@
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
 
 
 class LimitUpStrategy(BaseStrategy):
     """涨停板策略 - 追涨停股"""
     
+    max_strength = 0.9
+    
     def __init__(self, days: int = 3):
         super().__init__("涨停板策略")
         self.days = days  # 几天内涨停
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        high = df['high']
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        close = ctx.close
         
-        # 计算涨跌幅
-        change = (close - close.shift(1)) / close.shift(1) * 100
+        # 计算涨跌幅 (首日无前收盘，不算涨停)
+        is_limit = np.zeros(ctx.n, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            is_limit[1:] = (close[1:] - close[:-1]) / close[:-1] * 100 > 9.5
         
         # 最近N天有涨停
-        limit_up_days = (change > 9.5).sum()
+        limit_up_days = np.count_nonzero(is_limit)
         
-        # 连续涨停
-        consecutive = 0
-        for i in range(len(change)-1, -1, -1):
-            if change.iloc[i] > 9.5:
-                consecutive += 1
-            else:
-                break
+        # 连续涨停: 从末尾往前数到第一个非涨停日
+        breaks = np.flatnonzero(~is_limit)
+        consecutive = ctx.n - 1 - breaks[-1] if len(breaks) else ctx.n
         
         if consecutive >= self.days:
             return Signal(
@@ -54,5 +57,25 @@ class LimitUpStrategy(BaseStrategy):
             reason="无涨停"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        
+        # 计算涨跌幅
+        change = (close - close.shift(1)) / close.shift(1) * 100
+        is_limit = (change > 9.5).to_numpy()
+        
+        # 截至当日的涨停天数
+        limit_up_days = np.cumsum(is_limit)
+        
+        # 截至当日的连续涨停天数: 当前累计数减去最近一次非涨停时的累计数
+        last_break = np.maximum.accumulate(np.where(is_limit, 0, limit_up_days))
+        consecutive = limit_up_days - last_break
+        
+        streak = consecutive >= self.days
+        recent = ~streak & (limit_up_days >= self.days)
+        signal = np.where(streak | recent, 1, 0)
+        strength = np.select([streak, recent], [0.9, 0.7], 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"days": self.days}
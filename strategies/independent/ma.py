@@ -6,6 +6,8 @@
 import pandas as pd
 import numpy as np
 from .base import BaseStrategy, Signal
+from ._cache import rolling_mean
+from .._batch_kernels import ma_batch
 
 
 class MAStrategy(BaseStrategy):
@@ -16,9 +18,10 @@ class MAStrategy(BaseStrategy):
         self.periods = periods or [5, 10, 20, 60]
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
+        # 各均线最新值只需末端 最长周期 根K线
+        close = df['close'].iloc[-max(self.periods):]
         
-        mas = {p: close.rolling(window=p).mean().iloc[-1] for p in self.periods}
+        mas = {p: rolling_mean(close, p).iloc[-1] for p in self.periods}
         
         # 多头排列
         if all(mas[self.periods[i]] > mas[self.periods[i+1]] for i in range(len(self.periods)-1)):
@@ -47,5 +50,23 @@ class MAStrategy(BaseStrategy):
             reason="均线纠缠"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        
+        mas = np.vstack([rolling_mean(close, p).to_numpy() for p in self.periods])
+        fast, slow = mas[:-1], mas[1:]
+        
+        # 多头排列 / 空头排列
+        bull = np.all(fast > slow, axis=0)
+        bear = np.all(fast < slow, axis=0)
+        avg_slope = np.mean((fast - slow) / slow, axis=0)
+        
+        signal = np.select([bull, bear], [1, -1], 0)
+        strength = np.select([bull, bear], [np.minimum(avg_slope * 10, 1.0), 0.8], 0.0)
+        return self._signal_frame(df, signal, strength)
+    
+    def analyze_batch(self, panels: dict):
+        return ma_batch(self._close_panel(panels), np.asarray(self.periods, dtype=np.int64))
+    
     def get_params(self) -> dict:
         return {"periods": self.periods}
@@ -6,29 +6,28 @@
 import pandas as pd
 import numpy as np
 from .base import BaseStrategy, Signal
+from ._cache import rolling_mean
 
 
 class MaDivergenceStrategy(BaseStrategy):
     """均线发散策略"""
     
+    max_strength = 0.8
+    
     def __init__(self, periods: list = None):
         super().__init__("均线发散")
         self.periods = periods or [5, 10, 20]
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
+        # 只需各均线最新值和5日前的值, 取末端 最长周期+4 根K线即可
+        close = df['close'].iloc[-(max(self.periods) + 4):]
         
-        # 计算各均线
-        mas = {}
-        for p in self.periods:
-            mas[p] = close.rolling(window=p).mean().iloc[-1]
-            mas_prev = close.rolling(window=p).mean().iloc[-2]
-        
-        # 计算斜率
+        # 计算各均线斜率 (每条均线只算一次)
         slopes = {}
         for p in self.periods:
-            ma_now = close.rolling(window=p).mean().iloc[-1]
-            ma_prev = close.rolling(window=p).mean().iloc[-5]  # 5日前
+            ma = rolling_mean(close, p)
+            ma_now = ma.iloc[-1]
+            ma_prev = ma.iloc[-5]  # 5日前
             slopes[p] = (ma_now - ma_prev) / ma_prev
         
         # 所有均线向上且发散
@@ -61,5 +60,26 @@ class MaDivergenceStrategy(BaseStrategy):
             reason="均线纠缠"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        
+        # 各均线相对5日前的斜率
+        slopes = []
+        for p in self.periods:
+            ma = rolling_mean(close, p)
+            ma_prev = ma.shift(4)
+            slopes.append(((ma - ma_prev) / ma_prev).to_numpy())
+        slopes = np.vstack(slopes)
+        
+        all_up = np.all(slopes > 0, axis=0)
+        all_diverging = np.all(slopes[:-1] > slopes[1:], axis=0)
+        all_down = np.all(slopes < 0, axis=0)
+        
+        buy = all_up & all_diverging
+        sell = ~buy & all_down
+        signal = np.select([buy, sell], [1, -1], 0)
+        strength = np.select([buy, sell], [0.8, 0.7], 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"periods": self.periods}
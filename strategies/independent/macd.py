@@ -4,31 +4,44 @@ MACD金叉死叉
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
+from ._cache import ewm_mean
+from .._ta_kernels import macd_tail
+from .._batch_kernels import macd_batch
 
 
 class MACDStrategy(BaseStrategy):
     """MACD策略 - 金叉死叉"""
     
+    max_strength = 0.8
+    
     def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
         super().__init__("MACD策略")
         self.fast = fast
         self.slow = slow
         self.signal_period = signal
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        
-        # 计算MACD
-        ema_fast = close.ewm(span=self.fast, adjust=False).mean()
-        ema_slow = close.ewm(span=self.slow, adjust=False).mean()
+    def _macd(self, close: pd.Series):
+        """计算MACD线和柱状图"""
+        ema_fast = ewm_mean(close, self.fast)
+        ema_slow = ewm_mean(close, self.slow)
         macd = ema_fast - ema_slow
         signal_line = macd.ewm(span=self.signal_period, adjust=False).mean()
+        return macd, macd - signal_line
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        if ctx.n == 0:
+            raise IndexError("数据为空")
         
-        histogram = macd - signal_line
+        # 计算MACD (只需末端值)
+        macd_now, hist_prev, hist_now = macd_tail(ctx.close, self.fast, self.slow, self.signal_period)
         
         # 金叉
-        if histogram.iloc[-1] > 0 and histogram.iloc[-2] <= 0:
+        if hist_now > 0 and hist_prev <= 0:
             return Signal(
                 strategy_name=self.name,
                 signal=1,
@@ -36,7 +49,7 @@ class MACDStrategy(BaseStrategy):
                 reason="MACD金叉"
             )
         # 死叉
-        elif histogram.iloc[-1] < 0 and histogram.iloc[-2] >= 0:
+        elif hist_now < 0 and hist_prev >= 0:
             return Signal(
                 strategy_name=self.name,
                 signal=-1,
@@ -45,7 +58,7 @@ class MACDStrategy(BaseStrategy):
             )
         
         # 在零轴上方
-        if macd.iloc[-1] > 0:
+        if macd_now > 0:
             return Signal(
                 strategy_name=self.name,
                 signal=0,
@@ -60,5 +73,19 @@ class MACDStrategy(BaseStrategy):
                 reason="MACD空头"
             )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        macd, histogram = self._macd(df['close'])
+        hist = histogram.to_numpy()
+        hist_prev = histogram.shift(1).to_numpy()
+        
+        golden = (hist > 0) & (hist_prev <= 0)
+        dead = (hist < 0) & (hist_prev >= 0)
+        signal = np.select([golden, dead], [1, -1], 0)
+        strength = np.where(golden | dead, 0.8, 0.3)
+        return self._signal_frame(df, signal, strength)
+    
+    def analyze_batch(self, panels: dict):
+        return macd_batch(self._close_panel(panels), self.fast, self.slow, self.signal_period)
+    
     def get_params(self) -> dict:
         return {"fast": self.fast, "slow": self.slow, "signal": self.signal_period}
@@ -4,7 +4,9 @@
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
+from .._batch_kernels import momentum_batch
 
 
 class MomentumStrategy(BaseStrategy):
@@ -16,10 +18,13 @@ class MomentumStrategy(BaseStrategy):
         self.threshold = threshold
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        close = ctx.close
         
         # N日涨幅
-        momentum = (close.iloc[-1] - close.iloc[-self.period]) / close.iloc[-self.period]
+        momentum = (close[-1] - close[-self.period]) / close[-self.period]
         
         if momentum > self.threshold:
             return Signal(
@@ -43,5 +48,25 @@ class MomentumStrategy(BaseStrategy):
             reason="动量中性"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        
+        # N日涨幅 (与 close.iloc[-period] 对齐)
+        base = close.shift(self.period - 1)
+        momentum = ((close - base) / base).to_numpy()
+        
+        up = momentum > self.threshold
+        down = momentum < -self.threshold
+        signal = np.select([up, down], [1, -1], 0)
+        strength = np.select(
+            [up, down],
+            [np.minimum(momentum * 5, 1.0), np.minimum(np.abs(momentum) * 5, 1.0)],
+            0.0
+        )
+        return self._signal_frame(df, signal, strength)
+    
+    def analyze_batch(self, panels: dict):
+        return momentum_batch(self._close_panel(panels), self.period, self.threshold)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "threshold": self.threshold}
@@ -4,30 +4,42 @@
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
 
 
 class MoneyFlowStrategy(BaseStrategy):
     """资金流向策略"""
     
+    max_strength = 0.7
+    
     def __init__(self, period: int = 5):
         super().__init__("资金流向")
         self.period = period
     
     def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        volume = df['volume']
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        start = ctx.n - self.period
+        if start < 0:
+            raise IndexError(f"数据不足 {self.period} 天")
+        
+        # 最近N天及其前一天 (首日无前值, 补 NaN)
+        close = ctx.close[max(start - 1, 0):]
+        volume = ctx.volume[max(start - 1, 0):]
+        if start == 0:
+            close = np.concatenate(([np.nan], close))
+            volume = np.concatenate(([np.nan], volume))
         
         # 简单资金流: 价涨量增
-        price_change = close.diff()
+        price_change = np.diff(close)
         
         # 资金流入: 价格上涨且成交量放大
-        vol_change = volume.diff() / volume.shift(1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol_change = np.diff(volume) / volume[:-1]
         
-        inflow_days = 0
-        for i in range(-self.period, 0):
-            if price_change.iloc[i] > 0 and vol_change.iloc[i] > 0:
-                inflow_days += 1
+        inflow_days = np.count_nonzero((price_change > 0) & (vol_change > 0))
         
         if inflow_days >= self.period * 0.7:
             return Signal(
@@ -37,10 +49,7 @@ class MoneyFlowStrategy(BaseStrategy):
                 reason=f"连续{inflow_days}天资金流入"
             )
         
-        outflow_days = 0
-        for i in range(-self.period, 0):
-            if price_change.iloc[i] < 0:
-                outflow_days += 1
+        outflow_days = np.count_nonzero(price_change < 0)
         
         if outflow_days >= self.period * 0.7:
             return Signal(
@@ -57,5 +66,24 @@ class MoneyFlowStrategy(BaseStrategy):
             reason="资金平衡"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        volume = df['volume']
+        
+        price_change = close.diff()
+        vol_change = volume.diff() / volume.shift(1)
+        
+        # 最近N天的流入/流出天数 (不足N天时无信号)
+        inflow = ((price_change > 0) & (vol_change > 0)).astype(float)
+        outflow = (price_change < 0).astype(float)
+        inflow_days = inflow.rolling(window=self.period).sum().to_numpy()
+        outflow_days = outflow.rolling(window=self.period).sum().to_numpy()
+        
+        buy = inflow_days >= self.period * 0.7
+        sell = ~buy & (outflow_days >= self.period * 0.7)
+        signal = np.select([buy, sell], [1, -1], 0)
+        strength = np.where(buy | sell, 0.7, 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period}
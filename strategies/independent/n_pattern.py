@@ -4,12 +4,15 @@ N字反包策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
 
 
 class NPatternStrategy(BaseStrategy):
     """N字反包策略"""
     
+    max_strength = 0.8
+    
     def __init__(self):
         super().__init__("N字反包")
     
@@ -63,5 +66,28 @@ class NPatternStrategy(BaseStrategy):
             reason="无反包信号"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close'].to_numpy(dtype=np.float64)
+        open_price = df['open'].to_numpy(dtype=np.float64)
+        
+        # 昨天K线
+        yesterday_close = np.roll(close, 1)
+        yesterday_open = np.roll(open_price, 1)
+        
+        yesterday_is_bearish = yesterday_close < yesterday_open
+        yesterday_change = (yesterday_close - yesterday_open) / yesterday_open * 100
+        
+        # 今天反包
+        today_is_bullish = close > open_price
+        today_cover = close > yesterday_open
+        
+        pattern = (yesterday_is_bearish & (yesterday_change < -3) &
+                   today_is_bullish & today_cover)
+        pattern[:2] = False  # 数据不足
+        
+        signal = np.where(pattern, 1, 0)
+        strength = np.where(pattern, 0.8, 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {}
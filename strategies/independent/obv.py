@@ -3,34 +3,37 @@ OBV能量潮策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
 
 
 class OBVStrategy(BaseStrategy):
     """OBV能量潮策略"""
     
+    max_strength = 0.7
+    
     def __init__(self, period: int = 20):
         super().__init__("OBV策略")
         self.period = period
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        volume = df['volume']
+    def _obv(self, df: pd.DataFrame) -> pd.Series:
+        """OBV = 首日成交量 + 按涨跌方向累加的成交量 (持平或缺失不计)"""
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
         
+        diff = np.diff(close, prepend=close[:1])
+        direction = (diff > 0).view(np.int8) - (diff < 0).view(np.int8)
+        if len(direction):
+            direction[0] = 1
+        flow = np.where(direction == 0, 0.0, direction * volume)
+        return pd.Series(np.cumsum(flow), index=df.index)
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
         # 计算OBV
-        obv = (pd.Series(index=close.index, dtype=float))
-        obv.iloc[0] = volume.iloc[0]
-        
-        for i in range(1, len(close)):
-            if close.iloc[i] > close.iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] + volume.iloc[i]
-            elif close.iloc[i] < close.iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] - volume.iloc[i]
-            else:
-                obv.iloc[i] = obv.iloc[i-1]
+        obv = self._obv(df)
         
-        # OBV均线
-        obv_ma = obv.rolling(window=self.period).mean()
+        # OBV均线 (只需最新两个值, 取末端 period+1 个OBV即可)
+        obv_ma = obv.iloc[-(self.period + 1):].rolling(window=self.period).mean()
         
         # OBV突破均线
         if obv.iloc[-1] > obv_ma.iloc[-1] and obv.iloc[-2] <= obv_ma.iloc[-2]:
@@ -64,5 +67,18 @@ class OBVStrategy(BaseStrategy):
                 reason="OBV下降趋势"
             )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        obv = self._obv(df)
+        obv_ma = obv.rolling(window=self.period).mean()
+        
+        obv_now, ma_now = obv.to_numpy(), obv_ma.to_numpy()
+        obv_prev, ma_prev = obv.shift(1).to_numpy(), obv_ma.shift(1).to_numpy()
+        
+        up = (obv_now > ma_now) & (obv_prev <= ma_prev)
+        down = (obv_now < ma_now) & (obv_prev >= ma_prev)
+        signal = np.select([up, down], [1, -1], 0)
+        strength = np.where(up | down, 0.7, 0.3)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period}
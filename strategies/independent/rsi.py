@@ -4,7 +4,9 @@ RSI超卖买入，超买卖出
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
+from .._batch_kernels import rsi_batch
 
 
 class RSIStrategy(BaseStrategy):
@@ -16,17 +18,30 @@ class RSIStrategy(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        
-        # 计算RSI
+    def _rsi(self, close: pd.Series) -> pd.Series:
+        """计算RSI序列"""
         delta = close.diff()
         gain = delta.where(delta > 0, 0).rolling(window=self.period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
         rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        rsi_value = rsi.iloc[-1]
+        return 100 - (100 / (1 + rs))
+    
+    def _last_rsi(self, close: pd.Series) -> float:
+        """只用末端 period+1 个收盘价计算最新RSI, 与 _rsi(close).iloc[-1] 一致"""
+        tail = close.to_numpy(dtype=float)[-(self.period + 1):]
+        if len(tail) < self.period:
+            return np.nan
+        # 恰好 period 根时首个涨跌为 NaN, 同 _rsi 记为 0
+        delta = np.diff(tail, prepend=np.nan)[-self.period:]
+        # 与 where 一致: NaN 涨跌记为 0
+        gain = np.where(delta > 0, delta, 0.0).mean()
+        loss = np.where(delta < 0, -delta, 0.0).mean()
+        if loss > 0:
+            return 100 - 100 / (1 + gain / loss)
+        return 100.0 if gain > 0 else np.nan
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        rsi_value = self._last_rsi(df['close'])
         
         if rsi_value < self.oversold:
             strength = (self.oversold - rsi_value) / self.oversold
@@ -52,5 +67,23 @@ class RSIStrategy(BaseStrategy):
             reason=f"RSI {rsi_value:.1f} 中性"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        rsi = self._rsi(df['close']).to_numpy()
+        
+        buy = rsi < self.oversold
+        sell = rsi > self.overbought
+        signal = np.select([buy, sell], [1, -1], 0)
+        strength = np.select(
+            [buy, sell],
+            [(self.oversold - rsi) / self.oversold,
+             (rsi - self.overbought) / (100 - self.overbought)],
+            0.0
+        )
+        return self._signal_frame(df, signal, strength)
+    
+    def analyze_batch(self, panels: dict):
+        return rsi_batch(self._close_panel(panels), self.period,
+                         float(self.oversold), float(self.overbought))
+    
     def get_params(self) -> dict:
         return {"period": self.period, "oversold": self.oversold, "overbought": self.overbought}
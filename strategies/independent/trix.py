@@ -4,30 +4,44 @@ TRIX策略
 """
 
 import pandas as pd
-from .base import BaseStrategy, Signal
+import numpy as np
+from .base import BaseStrategy, Signal, SharedContext
+from ._cache import ewm_mean
+from .._ta_kernels import trix_tail
 
 
 class TRIXStrategy(BaseStrategy):
     """TRIX策略"""
     
+    max_strength = 0.8
+    
     def __init__(self, period: int = 12, signal: int = 9):
         super().__init__("TRIX策略")
         self.period = period
         self.signal = signal
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        close = df['close']
-        
-        # 计算TRIX
-        ema1 = close.ewm(span=self.period, adjust=False).mean()
+    def _trix(self, close: pd.Series):
+        """计算TRIX线和信号线"""
+        ema1 = ewm_mean(close, self.period)
         ema2 = ema1.ewm(span=self.period, adjust=False).mean()
         ema3 = ema2.ewm(span=self.period, adjust=False).mean()
         
         trix = ema3.pct_change() * 100
         signal_line = trix.ewm(span=self.signal, adjust=False).mean()
+        return trix, signal_line
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
+        return self.analyze_ctx(SharedContext.from_frame(df))
+    
+    def analyze_ctx(self, ctx: SharedContext) -> Signal:
+        if ctx.n == 0:
+            raise IndexError("数据为空")
+        
+        # 计算TRIX (只需末端值)
+        trix_prev, sig_prev, trix_now, sig_now = trix_tail(ctx.close, self.period, self.signal)
         
         # 金叉
-        if trix.iloc[-1] > signal_line.iloc[-1] and trix.iloc[-2] <= signal_line.iloc[-2]:
+        if trix_now > sig_now and trix_prev <= sig_prev:
             return Signal(
                 strategy_name=self.name,
                 signal=1,
@@ -35,7 +49,7 @@ class TRIXStrategy(BaseStrategy):
                 reason="TRIX金叉"
             )
         # 死叉
-        elif trix.iloc[-1] < signal_line.iloc[-1] and trix.iloc[-2] >= signal_line.iloc[-2]:
+        elif trix_now < sig_now and trix_prev >= sig_prev:
             return Signal(
                 strategy_name=self.name,
                 signal=-1,
@@ -50,5 +64,16 @@ class TRIXStrategy(BaseStrategy):
             reason="TRIX中性"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        trix, signal_line = self._trix(df['close'])
+        trix_now, sig_now = trix.to_numpy(), signal_line.to_numpy()
+        trix_prev, sig_prev = trix.shift(1).to_numpy(), signal_line.shift(1).to_numpy()
+        
+        golden = (trix_now > sig_now) & (trix_prev <= sig_prev)
+        dead = (trix_now < sig_now) & (trix_prev >= sig_prev)
+        signal = np.select([golden, dead], [1, -1], 0)
+        strength = np.where(golden | dead, 0.8, 0.3)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "signal": self.signal}
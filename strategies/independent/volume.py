@@ -4,6 +4,7 @@
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
 
 
@@ -52,5 +53,27 @@ class VolumeStrategy(BaseStrategy):
             reason="成交量正常"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        close = df['close']
+        volume = df['volume']
+        
+        # 成交量均线 (数据不足N日时取全部)
+        vol_ma = volume.rolling(window=self.period, min_periods=1).mean().to_numpy()
+        current_vol = volume.to_numpy(dtype=np.float64)
+        
+        # 价格变化
+        prev_close = close.shift(1)
+        price_change = ((close - prev_close) / prev_close).to_numpy()
+        
+        heavy = current_vol > vol_ma * self.volume_multiplier
+        up = heavy & (price_change > 0.01)
+        down = heavy & (price_change < -0.01)
+        
+        signal = np.select([up, down], [1, -1], 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = current_vol / vol_ma
+        strength = np.where(up | down, np.minimum((ratio - 1) * 2, 1.0), 0.0)
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period, "volume_multiplier": self.volume_multiplier}
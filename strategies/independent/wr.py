@@ -3,6 +3,7 @@ WR威廉指标策略
 """
 
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy, Signal
 
 
@@ -15,18 +16,16 @@ class WRStrategy(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
     
-    def analyze(self, df: pd.DataFrame) -> Signal:
-        high = df['high']
-        low = df['low']
-        close = df['close']
+    def _wr(self, df: pd.DataFrame) -> pd.Series:
+        """计算WR序列"""
+        highest = df['high'].rolling(window=self.period).max()
+        lowest = df['low'].rolling(window=self.period).min()
         
+        return 100 * (highest - df['close']) / (highest - lowest)
+    
+    def analyze(self, df: pd.DataFrame) -> Signal:
         # 计算WR
-        highest = high.rolling(window=self.period).max()
-        lowest = low.rolling(window=self.period).min()
-        
-        wr = 100 * (highest - close) / (highest - lowest)
-        
-        wr_value = wr.iloc[-1]
+        wr_value = self._wr(df).iloc[-1]
         
         # 超卖买入 (威廉指标接近0)
         if wr_value < self.oversold:
@@ -54,5 +53,19 @@ class WRStrategy(BaseStrategy):
             reason=f"WR中性 {wr_value:.1f}"
         )
     
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        wr = self._wr(df).to_numpy()
+        
+        buy = wr < self.oversold
+        sell = wr > self.overbought
+        signal = np.select([buy, sell], [1, -1], 0)
+        strength = np.select(
+            [buy, sell],
+            [(self.oversold - wr) / self.oversold,
+             (wr - self.overbought) / (100 - self.overbought)],
+            0.0
+        )
+        return self._signal_frame(df, signal, strength)
+    
     def get_params(self) -> dict:
         return {"period": self.period}
@@ -68,15 +68,13 @@ class BreakoutStrategy:
     
     def _calc_atr(self, df: pd.DataFrame) -> float:
         """计算ATR"""
-        high = df['high']
-        low = df['low']
-        close = df['close']
+        h = df['high'].to_numpy(dtype=np.float64)
+        l = df['low'].to_numpy(dtype=np.float64)
+        prev = np.concatenate(([np.nan], df['close'].to_numpy(dtype=np.float64)[:-1]))
         
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.iloc[-self.period:].mean()
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))[-self.period:]
+        tr = tr[~np.isnan(tr)]
+        return tr.mean() if len(tr) else np.nan
     
     def analyze(self, df: pd.DataFrame) -> StrategyResult:
         """分析"""
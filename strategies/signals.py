@@ -8,6 +8,12 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
+
 
 class SignalType(Enum):
     """信号类型"""
@@ -96,10 +102,19 @@ class SignalGenerator:
         Returns:
             信号序列
         """
-        ema_fast = self.data['close'].ewm(span=fast, adjust=False).mean()
-        ema_slow = self.data['close'].ewm(span=slow, adjust=False).mean()
-        macd = ema_fast - ema_slow
-        signal_line = macd.ewm(span=signal, adjust=False).mean()
+        if TALIB_AVAILABLE:
+            # talib 的C实现 (EMA以SMA起算，前 slow+signal-2 根为NaN)
+            macd_arr, signal_arr, _ = talib.MACD(
+                self.data['close'].to_numpy(dtype=np.float64),
+                fastperiod=fast, slowperiod=slow, signalperiod=signal
+            )
+            macd = pd.Series(macd_arr, index=self.data.index)
+            signal_line = pd.Series(signal_arr, index=self.data.index)
+        else:
+            ema_fast = self.data['close'].ewm(span=fast, adjust=False).mean()
+            ema_slow = self.data['close'].ewm(span=slow, adjust=False).mean()
+            macd = ema_fast - ema_slow
+            signal_line = macd.ewm(span=signal, adjust=False).mean()
         
         # MACD 金叉/死叉
         macd_hist = macd - signal_line
@@ -25,7 +25,7 @@ def test(symbol, name, strategies, sl, tp):
     fetcher = DataFetcher()
     df = fetcher.download(symbol, period="1y")
     if df is None or len(df) < 150: return None
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     hybrid = create_hybrid(strategies)
     engine = BacktestEngine(initial_capital=100000, commission=0.001, slippage=0.001, stamp_duty=0.001)
@@ -95,7 +95,7 @@ class BacktestTool:
             print(f"  {symbol}: 数据不足")
             return None
         
-        df.columns = df.columns.str.lower()
+        df.columns = [c.lower() for c in df.columns.tolist()]
         hybrid = create_hybrid(strategy_names)
         
         engine = BacktestEngine(
@@ -111,13 +111,13 @@ class BacktestTool:
         
         for i in range(50, len(df)):
             price = df['close'].iloc[i]
-            date = df.index[i]
             result = hybrid.analyze(df.iloc[:i+1])
             
             if position == 0 and result['signal'] == 1 and result['strength'] >= 0.3:
                 amount = engine.cash * 0.5
                 quantity = int(amount / price / 100) * 100
                 if quantity > 0:
+                    date = df.index[i]
                     engine.buy(date, symbol, price, quantity=quantity)
                     position = 1
                     entry_price = price
@@ -127,6 +127,7 @@ class BacktestTool:
                 if price < entry_price * (1 - stop_loss) or price > entry_price * (1 + take_profit):
                     pos = engine.positions.get(symbol)
                     if pos:
+                        date = df.index[i]
                         engine.sell(date, symbol, price, quantity=pos.quantity)
                         trades.append(('SELL', date, price))
                         position = 0
@@ -136,7 +137,6 @@ class BacktestTool:
             for sym, pos in engine.positions.items():
                 equity += pos.quantity * price
             engine.equity_history.append(equity)
-            engine.dates.append(date)
         
         final = engine.equity_history[-1] if engine.equity_history else self.initial_capital
         total_return = (final - self.initial_capital) / self.initial_capital * 100
@@ -148,7 +148,8 @@ class BacktestTool:
             'name': stock_name,
             'return': total_return,
             'trades': len(trades) // 2,
-            'equity_curve': pd.Series(engine.equity_history, index=engine.dates) if engine.equity_history else None
+            # 每根K线一个权益值，日期直接取索引切片，不逐根生成 Timestamp
+            'equity_curve': pd.Series(engine.equity_history, index=df.index[50:]) if engine.equity_history else None
         }
     
     def _summary(self, results, benchmark_return, name):
@@ -109,7 +109,7 @@ class BacktestTool:
         if df is None or len(df) < 200:
             return None
         
-        df.columns = df.columns.str.lower()
+        df.columns = [c.lower() for c in df.columns.tolist()]
         hybrid = create_hybrid(strategy_names)
         
         engine = BacktestEngine(
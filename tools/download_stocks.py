@@ -81,7 +81,7 @@ def download_stock(code, name):
         
         if df is not None and len(df) > 1000:
             # 统一列名
-            df.columns = df.columns.str.lower()
+            df.columns = [c.lower() for c in df.columns.tolist()]
             
             # 保存
             filename = f"{code.replace('.', '_')}.csv"
@@ -29,7 +29,7 @@ def run_backtest(symbol, strategy_names, initial_capital=300000,
     if df is None or len(df) < 200:
         return None
     
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     hybrid = create_hybrid(strategy_names)
     
     engine = BacktestEngine(
@@ -44,14 +44,13 @@ def run_backtest(symbol, strategy_names, initial_capital=300000,
     
     for i in range(50, len(df)):
         price = df['close'].iloc[i]
-        date = df.index[i]
         result = hybrid.analyze(df.iloc[:i+1])
         
         if position == 0 and result['signal'] == 1 and result['strength'] >= min_strength:
             amount = engine.cash * 0.8  # 提高到80%仓位
             quantity = int(amount / price / 100) * 100
             if quantity > 0:
-                engine.buy(date, symbol, price, quantity=quantity)
+                engine.buy(df.index[i], symbol, price, quantity=quantity)
                 position = 1
                 entry_price = price
         
@@ -60,12 +59,12 @@ def run_backtest(symbol, strategy_names, initial_capital=300000,
             if price < entry_price * (1 - stop_loss):
                 pos = engine.positions.get(symbol)
                 if pos:
-                    engine.sell(date, symbol, price, quantity=pos.quantity)
+                    engine.sell(df.index[i], symbol, price, quantity=pos.quantity)
                     position = 0
             elif price > entry_price * (1 + take_profit):
                 pos = engine.positions.get(symbol)
                 if pos:
-                    engine.sell(date, symbol, price, quantity=pos.quantity)
+                    engine.sell(df.index[i], symbol, price, quantity=pos.quantity)
                     position = 0
         
         equity = engine.cash
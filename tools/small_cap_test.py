@@ -34,7 +34,7 @@ def test(symbol, name, strategies, sl, tp):
     if df is None or len(df) < 200: 
         print(f"  {name}: 数据不足")
         return None
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     hybrid = create_hybrid(strategies)
     engine = BacktestEngine(initial_capital=100000, commission=0.001, slippage=0.002, stamp_duty=0.001)
@@ -29,7 +29,7 @@ def test(symbol, strategies, sl, tp, period):
     fetcher = DataFetcher()
     df = fetcher.download(symbol, period=period)
     if df is None or len(df) < 200: return None
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     hybrid = create_hybrid(strategies)
     engine = BacktestEngine(initial_capital=100000, commission=0.001, slippage=0.001, stamp_duty=0.001)
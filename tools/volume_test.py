@@ -116,7 +116,7 @@ def test(symbol, name, strategy, sl, tp):
     fetcher = DataFetcher()
     df = fetcher.download(symbol, period="1y")
     if df is None or len(df) < 200: return None
-    df.columns = df.columns.str.lower()
+    df.columns = [c.lower() for c in df.columns.tolist()]
     
     engine = BacktestEngine(initial_capital=100000, commission=0.001, slippage=0.001, stamp_duty=0.001)
     
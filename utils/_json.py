@@ -0,0 +1,45 @@
+"""
+JSON 序列化
+安装 orjson 时使用其 C 实现; 未安装时用标准库 json, 输出与 orjson 一致 (numpy 类型转为 Python 值, NaN/inf 写为 null)
+"""
+
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _jsonable(obj):
+    """递归转换为标准库 json 可序列化的对象, 非有限浮点数转为 None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return _jsonable(obj.tolist())
+    if isinstance(obj, np.generic):
+        return _jsonable(obj.item())
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return obj
+
+
+def dumps(obj, indent: bool = True) -> str:
+    """序列化为JSON字符串 (indent=False 时为紧凑格式)"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(_jsonable(obj), ensure_ascii=False, allow_nan=False,
+                      indent=2 if indent else None,
+                      separators=None if indent else (',', ':'))
@@ -0,0 +1,20 @@
+"""
+numba 可选依赖
+未安装 numba 时 njit 退化为原样返回的装饰器, prange 退化为 range, 代码按纯 Python 运行
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """numba.njit 的占位实现, 支持 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        
+        def decorator(func):
+            return func
+        return decorator